@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 from enum import Enum
 
 class LanguageCode(str, Enum):
@@ -43,13 +43,25 @@ class TranslationResponse(BaseModel):
     data: Optional[dict] = None
     message: Optional[str] = None
 
+class LanguageResult(BaseModel):
+    status: str  # pending, processing, completed, failed
+    result_url: Optional[str] = None
+    text_regions: Optional[List[TextRegion]] = None
+    timings: Optional[Dict[str, float]] = None
+    error_message: Optional[str] = None
+
 class TaskStatus(BaseModel):
     task_id: str
     status: str  # pending, processing, completed, failed
     progress: int  # 0-100
+    stage: Optional[str] = None  # decode, ocr, style, translate, redraw, done, failed
+    queue_position: Optional[int] = None  # 排队位置（1 表示下一个执行）
+    estimated_wait_seconds: Optional[int] = None  # 预计开始执行前的等待时间
     result_url: Optional[str] = None
     detected_language: Optional[str] = None
     text_regions: Optional[List[TextRegion]] = None
+    results: Optional[Dict[str, LanguageResult]] = None  # 多目标语言任务：语言 -> 结果
+    timings: Optional[Dict[str, float]] = None  # 各阶段耗时（秒），含 queue_wait
     error_message: Optional[str] = None
 
 class Language(BaseModel):
@@ -1,5 +1,9 @@
-from typing import Optional
+from typing import Callable, Dict, List, Optional, Tuple
+import asyncio
+import copy
+import json
 import os
+import time
 import uuid
 import shutil
 from fastapi import (
@@ -8,10 +12,9 @@ from fastapi import (
     File,
     Form,
     HTTPException,
-    BackgroundTasks,
     Request,
 )
-from fastapi.responses import FileResponse, HTMLResponse
+from fastapi.responses import FileResponse, HTMLResponse, StreamingResponse
 
 from app.api.models import (
     TranslationResponse,
@@ -22,19 +25,217 @@ from app.api.models import (
 from app.services.ocr_service import OCRService
 from app.services.translation_service import TranslationService
 from app.services.image_service import ImageService
+from app.services.task_store import create_task_store
+from app.services.result_cache import ResultCache
+from app.utils.image_buffer import ImageBuffer
+from app.utils.executors import run_cpu, run_io
+from app.utils.job_queue import JobQueue, QueueFull
+from app.utils.log import get_logger
+from app.utils.metrics import MetricsRegistry, StageTimer
+from app.utils.progress_bus import ProgressBus
+from app.utils.readiness import Readiness
+from app.utils.upload import MAX_FILE_SIZE, UploadRejected, ingest_upload
 
 router = APIRouter()
+logger = get_logger(__name__)
 
-# 存储任务状态
-tasks = {}
+# 存储任务状态（默认SQLite，多worker共享、重启后仍可查询）
+task_store = create_task_store()
+# 任务进度推送（SSE）
+progress_bus = ProgressBus()
+# 翻译任务队列：限制同时运行的流水线数量，队列满时返回 429
+job_queue = JobQueue()
+
+# 启动预热状态（/ready）；翻译API预连接失败不影响就绪
+readiness = Readiness(["ocr", "fonts", "translation"], optional=["translation"])
 
 # 初始化服务
 ocr_service = OCRService()
 translation_service = TranslationService()
 image_service = ImageService()
 
+# 结果缓存：相同图片 + 相同语言对直接复用上次的输出
+try:
+    result_cache: Optional[ResultCache] = ResultCache()
+except Exception as e:
+    logger.warning("结果缓存初始化失败，已禁用: %s", e)
+    result_cache = None
+
+# 监控指标（/metrics，Prometheus 文本格式；只统计当前进程）
+metrics_registry = MetricsRegistry()
+stage_seconds = metrics_registry.histogram(
+    "translator_stage_seconds", "流水线各阶段耗时（秒）", ["stage"]
+)
+queue_wait_seconds = metrics_registry.histogram(
+    "translator_queue_wait_seconds", "任务从创建到开始执行的等待时间（秒）"
+)
+regions_per_image = metrics_registry.histogram(
+    "translator_regions_per_image",
+    "每张图片识别出的文字区域数",
+    buckets=(0, 1, 5, 10, 20, 50, 100, 200, 500),
+)
+tasks_total = metrics_registry.counter(
+    "translator_tasks_total", "结束的任务数", ["status"]
+)
+ocr_engine_wait_seconds = metrics_registry.histogram(
+    "translator_ocr_engine_wait_seconds",
+    "等待空闲 PaddleOCR 实例的时间（秒）",
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+ocr_service.pool.wait_observer = ocr_engine_wait_seconds.observe
+ocr_rec_batch_crops = metrics_registry.histogram(
+    "translator_ocr_rec_batch_crops",
+    "每次送入识别模型的文字行数（跨请求合批）",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+if ocr_service.batcher is not None:
+    ocr_service.batcher.batch_observer = ocr_rec_batch_crops.observe
+
+
+def _cache_requests(stats: Callable[[], Optional[Dict]]) -> Callable[[], Optional[Dict]]:
+    """把缓存的 stats() 转换为按命中/未命中分组的查询次数（缓存未启用时返回 None）"""
+
+    def collect():
+        data = stats()
+        if data is None:
+            return None
+        return {"hit": data["hits"], "miss": data["misses"]}
+
+    return collect
+
+
+def _translation_cache_stats() -> Optional[Dict]:
+    cache = translation_service.cache
+    return cache.stats() if cache else None
+
+
+def _result_cache_stats() -> Optional[Dict]:
+    return result_cache.stats() if result_cache else None
+
+
+def _ocr_cache_stats() -> Optional[Dict]:
+    cache = ocr_service.cache
+    return cache.stats() if cache else None
+
+
+def _ocr_engine_counts() -> Dict:
+    stats = ocr_service.pool.stats()
+    return {"idle": stats["idle"], "in_use": stats["in_use"]}
+
+
+metrics_registry.gauge(
+    "translator_queue_depth", "排队中的任务数", lambda: job_queue.depth
+)
+metrics_registry.gauge(
+    "translator_queue_running", "正在执行的任务数", lambda: job_queue.running
+)
+metrics_registry.gauge(
+    "translator_queue_rejected_total",
+    "队列已满被拒绝的任务数",
+    lambda: job_queue.rejected,
+    metric_type="counter",
+)
+metrics_registry.gauge(
+    "translator_ocr_engines",
+    "PaddleOCR 实例池中的实例数",
+    _ocr_engine_counts,
+    ["state"],
+)
+metrics_registry.gauge(
+    "translator_translation_cache_requests_total",
+    "翻译缓存查询次数",
+    _cache_requests(_translation_cache_stats),
+    ["result"],
+    metric_type="counter",
+)
+metrics_registry.gauge(
+    "translator_translation_cache_hit_ratio",
+    "翻译缓存命中率",
+    lambda: (_translation_cache_stats() or {}).get("hit_ratio"),
+)
+metrics_registry.gauge(
+    "translator_translation_cache_entries",
+    "翻译缓存条目数",
+    lambda: (_translation_cache_stats() or {}).get("entries"),
+)
+metrics_registry.gauge(
+    "translator_result_cache_requests_total",
+    "结果缓存查询次数",
+    _cache_requests(_result_cache_stats),
+    ["result"],
+    metric_type="counter",
+)
+metrics_registry.gauge(
+    "translator_result_cache_bytes",
+    "结果缓存占用的字节数",
+    lambda: (_result_cache_stats() or {}).get("bytes"),
+)
+metrics_registry.gauge(
+    "translator_ocr_cache_requests_total",
+    "OCR结果缓存查询次数",
+    _cache_requests(_ocr_cache_stats),
+    ["result"],
+    metric_type="counter",
+)
+metrics_registry.gauge(
+    "translator_ocr_cache_bytes",
+    "OCR结果缓存占用的字节数",
+    lambda: (_ocr_cache_stats() or {}).get("bytes"),
+)
+metrics_registry.gauge(
+    "translator_font_cache_requests_total",
+    "字体缓存查询次数",
+    _cache_requests(image_service.font_registry.stats),
+    ["result"],
+    metric_type="counter",
+)
+metrics_registry.gauge(
+    "translator_font_cache_hit_ratio",
+    "字体缓存命中率",
+    lambda: image_service.font_registry.stats()["hit_ratio"],
+)
+metrics_registry.gauge(
+    "translator_font_cache_fonts",
+    "已缓存的字体对象数（所有线程）",
+    lambda: image_service.font_registry.stats()["cached_fonts"],
+)
+
 ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".bmp"}
-MAX_FILE_SIZE = 10 * 1024 * 1024
+FINAL_STATUSES = ("completed", "failed")
+# SSE：没有本进程事件时多久查询一次任务存储（任务可能在其他 worker 中处理）
+SSE_POLL_INTERVAL = 2.0
+# SSE：状态无变化时发送保活注释的间隔
+SSE_KEEPALIVE_INTERVAL = 15.0
+
+
+async def warm_up_services():
+    """
+    启动预热：OCR模型、字体和翻译客户端
+
+    由应用生命周期在后台启动，完成前 /ready 返回 503，负载均衡不会把请求转发过来。
+    WARMUP_ENABLED=false 时跳过预热，直接报告就绪（首个请求承担初始化开销）。
+    """
+    if os.environ.get("WARMUP_ENABLED", "true").lower() == "false":
+        for name in ("ocr", "fonts", "translation"):
+            readiness.mark_skipped(name)
+        return
+
+    async def step(name: str, warm_up):
+        readiness.start(name)
+        try:
+            detail = await warm_up()
+        except Exception as e:
+            logger.exception("预热 %s 失败: %s", name, e)
+            readiness.mark_failed(name, str(e))
+        else:
+            logger.info("预热 %s 完成: %s", name, detail)
+            readiness.mark_ready(name, detail)
+
+    await asyncio.gather(
+        step("translation", translation_service.warm_up),
+        step("fonts", lambda: run_cpu(image_service.warm_up)),
+        step("ocr", lambda: run_cpu(ocr_service.warm_up)),
+    )
 
 
 @router.get("/languages", response_model=list[Language])
@@ -55,12 +256,18 @@ async def get_languages():
 @router.post("/translate")
 async def translate_image(
     request: Request,
-    background_tasks: BackgroundTasks,
     image: UploadFile = File(...),
-    target_language: str = Form(...),
+    target_language: List[str] = Form(...),
     source_language: Optional[str] = Form(None),
 ):
-    """上传图片并开始翻译任务"""
+    """上传图片并开始翻译任务
+
+    target_language 可以重复提交或用逗号分隔多个语言：此时创建一个父任务，
+    OCR和样式提取只做一次，各语言结果记录在 results 中，按 ?language= 下载。
+    """
+    target_languages = _parse_target_languages(target_language)
+    if not target_languages:
+        raise HTTPException(status_code=400, detail="目标语言不能为空")
 
     if not image.filename:
         raise HTTPException(status_code=400, detail="文件名不能为空")
@@ -73,24 +280,37 @@ async def translate_image(
         )
 
     task_id = str(uuid.uuid4())
-    upload_path = f"uploads/{task_id}{file_ext}"
+    source_language = source_language or None
 
-    with open(upload_path, "wb") as buffer:
-        shutil.copyfileobj(image.file, buffer)
+    # 流式写入：边读边校验格式、尺寸和大小，并计算内容哈希；
+    # 按文件内容识别出的格式保存（uploads/<task_id>.<扩展名>）
+    try:
+        upload_info = await ingest_upload(image, f"uploads/{task_id}", MAX_FILE_SIZE)
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    upload_path = upload_info.path
+    content_hash = upload_info.content_hash
+    image_size = (upload_info.width, upload_info.height)
 
-    file_size = os.path.getsize(upload_path)
-    if file_size > MAX_FILE_SIZE:
-        os.remove(upload_path)
-        raise HTTPException(
-            status_code=400,
-            detail=f"文件太大。最大允许: {MAX_FILE_SIZE / 1024 / 1024}MB",
+    if len(target_languages) > 1:
+        return await _start_multi_translation(
+            request,
+            task_id,
+            upload_path,
+            content_hash,
+            image_size,
+            target_languages,
+            source_language,
         )
+    target_language = target_languages[0]
 
-    tasks[task_id] = {
+    task = {
         "task_id": task_id,
         "status": "pending",
         "progress": 0,
         "upload_path": upload_path,
+        "content_hash": content_hash,
+        "image_size": image_size,
         "target_language": target_language,
         "source_language": source_language,
         "result_url": None,
@@ -99,30 +319,177 @@ async def translate_image(
         "error_message": None,
     }
 
-    background_tasks.add_task(
-        process_translation_task,
+    # 相同内容已经翻译过：直接复用缓存结果，不再进入流水线
+    cached = await run_io(
+        _load_cached_result,
         task_id,
-        upload_path,
-        target_language,
+        content_hash,
+        image_size,
         source_language,
+        target_language,
     )
+    if cached:
+        logger.info(
+            "命中结果缓存: %.12s → 任务 %s", content_hash, task_id, extra={"task_id": task_id}
+        )
+        task.update(cached)
+        await run_io(task_store.create, task)
+    else:
+        try:
+            queue_position = await _enqueue_task(
+                task,
+                process_translation_task,
+                task_id,
+                upload_path,
+                target_language,
+                source_language,
+                content_hash,
+            )
+        except HTTPException:
+            os.remove(upload_path)
+            raise
 
     # 检查是否是浏览器表单提交
     accept_header = request.headers.get("accept", "")
     if "text/html" in accept_header:
-        html_response = f"""<!DOCTYPE html>
+        return _processing_page(task_id)
+
+    data = {
+        "task_id": task_id,
+        "status": "completed" if cached else "pending",
+        "progress": 100 if cached else 0,
+    }
+    if not cached:
+        data["queue_position"] = queue_position
+        data["estimated_wait_seconds"] = job_queue.estimated_wait(queue_position)
+    return TranslationResponse(success=True, data=data)
+
+
+async def _start_multi_translation(
+    request: Request,
+    task_id: str,
+    upload_path: str,
+    content_hash: str,
+    image_size: Tuple[int, int],
+    target_languages: List[str],
+    source_language: Optional[str],
+):
+    """创建多目标语言父任务：已缓存的语言直接完成，其余语言进入同一个流水线"""
+    results: Dict[str, Dict] = {}
+    pending_languages = []
+    styled_regions = None
+    for language in target_languages:
+        cached = await run_io(
+            _load_cached_result,
+            f"{task_id}_{language}",
+            content_hash,
+            image_size,
+            source_language,
+            language,
+        )
+        if cached:
+            results[language] = _language_result(
+                "completed",
+                output_path=cached["output_path"],
+                text_regions=cached["text_regions"],
+            )
+            styled_regions = styled_regions or cached["styled_regions"]
+        else:
+            results[language] = _language_result("pending")
+            pending_languages.append(language)
+
+    primary = results[target_languages[0]]
+    task = {
+        "task_id": task_id,
+        "status": "pending",
+        "progress": 0,
+        "upload_path": upload_path,
+        "content_hash": content_hash,
+        "image_size": image_size,
+        "target_language": target_languages[0],
+        "target_languages": target_languages,
+        "source_language": source_language,
+        "results": results,
+        "result_url": None,
+        "detected_language": None,
+        "text_regions": None,
+        "error_message": None,
+    }
+
+    queue_position = None
+    if pending_languages:
+        try:
+            queue_position = await _enqueue_task(
+                task,
+                process_multi_translation_task,
+                task_id,
+                upload_path,
+                pending_languages,
+                source_language,
+                content_hash,
+            )
+        except HTTPException:
+            os.remove(upload_path)
+            raise
+    else:
+        logger.info(
+            "命中结果缓存: %.12s → 任务 %s（全部语言）",
+            content_hash,
+            task_id,
+            extra={"task_id": task_id},
+        )
+        task.update(
+            status="completed",
+            progress=100,
+            stage="done",
+            output_path=primary["output_path"],
+            text_regions=primary["text_regions"],
+            styled_regions=styled_regions,
+            cache_hit=True,
+        )
+        await run_io(task_store.create, task)
+
+    if "text/html" in request.headers.get("accept", ""):
+        return _processing_page(task_id)
+
+    data = {
+        "task_id": task_id,
+        "status": task["status"],
+        "progress": task["progress"],
+        "target_languages": target_languages,
+    }
+    if queue_position:
+        data["queue_position"] = queue_position
+        data["estimated_wait_seconds"] = job_queue.estimated_wait(queue_position)
+    return TranslationResponse(success=True, data=data)
+
+
+def _parse_target_languages(values: List[str]) -> List[str]:
+    """展开逗号分隔的目标语言，去除空值和重复项（保持顺序）"""
+    languages = []
+    for value in values:
+        for language in value.split(","):
+            language = language.strip()
+            if language and language not in languages:
+                languages.append(language)
+    return languages
+
+
+def _processing_page(task_id: str) -> HTMLResponse:
+    """表单提交后的处理中页面"""
+    html_response = f"""<!DOCTYPE html>
 <html lang="zh-CN">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>处理中 - 图片翻译工具</title>
-    <meta http-equiv="refresh" content="3;url=/api/v1/tasks/{task_id}">
+    <noscript><meta http-equiv="refresh" content="3;url=/api/v1/tasks/{task_id}"></noscript>
     <style>
         body {{ font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; margin: 0; padding: 0; background: #f5f5f5; }}
         .container {{ max-width: 600px; margin: 100px auto; padding: 40px; background: white; border-radius: 8px; box-shadow: 0 2px 8px rgba(0,0,0,0.1); text-align: center; }}
         .loading {{ font-size: 48px; margin-bottom: 20px; }}
         .progress-bar {{ width: 100%; height: 20px; background: #f0f0f0; border-radius: 10px; overflow: hidden; margin: 20px 0; }}
-        .progress-fill {{ height: 100%; background: #1890ff; width: 30%; animation: progress 2s infinite; }}
+        .progress-fill {{ height: 100%; background: #1890ff; width: 30%; animation: progress 2s infinite; transition: width 0.5s; }}
         @keyframes progress {{ 0% {{ width: 30%; }} 50% {{ width: 70%; }} 100% {{ width: 30%; }} }}
     </style>
 </head>
@@ -130,27 +497,117 @@ async def translate_image(
     <div class="container">
         <div class="loading">⏳</div>
         <h2>正在处理中...</h2>
-        <p>正在识别文字并翻译，请稍候</p>
-        <p style="color: #999; font-size: 14px;">首次使用需下载OCR模型（约2-3分钟）</p>
+        <p id="progressText">正在识别文字并翻译，请稍候</p>
+        <p id="stageText" style="color: #999; font-size: 14px;">首次使用需下载OCR模型（约2-3分钟）</p>
         <div class="progress-bar">
-            <div class="progress-fill"></div>
+            <div class="progress-fill" id="progressFill"></div>
         </div>
         <p style="margin-top: 20px; font-size: 12px; color: #999;">任务ID: {task_id}</p>
     </div>
+    {_progress_script(task_id)}
 </body>
 </html>"""
-        return HTMLResponse(content=html_response)
+    return HTMLResponse(content=html_response)
 
-    return TranslationResponse(
-        success=True,
-        data={"task_id": task_id, "status": "processing", "progress": 0},
-    )
+
+async def _enqueue_task(task: Dict, func, *args) -> int:
+    """创建任务并加入队列，返回排队位置；队列已满时删除任务并返回 429"""
+    await run_io(task_store.create, task)
+    try:
+        return job_queue.submit(task["task_id"], func, *args)
+    except QueueFull as e:
+        await run_io(task_store.delete, task["task_id"])
+        raise HTTPException(
+            status_code=429,
+            detail="服务繁忙，排队任务已满，请稍后重试",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+
+def _result_cache_config(image_size: Optional[Tuple[int, int]]) -> Optional[Dict]:
+    """
+    结果缓存键中的流水线配置：OCR配置（与图片尺寸有关）和翻译模型
+
+    图片尺寸未知（旧版本创建的任务）或OCR引擎尚未初始化时无法确定配置，返回 None，
+    此时不读写结果缓存。
+    """
+    if image_size is None or ocr_service.engine_config is None:
+        return None
+    return {
+        "ocr": ocr_service.cache_config(tuple(image_size)),
+        "model": translation_service.model,
+    }
+
+
+def _load_cached_result(
+    task_id: str,
+    content_hash: str,
+    image_size: Optional[Tuple[int, int]],
+    source_language: Optional[str],
+    target_language: str,
+) -> Optional[Dict]:
+    """查询结果缓存，命中时把输出图片放到 outputs/ 并返回任务字段"""
+    config = _result_cache_config(image_size)
+    if result_cache is None or config is None:
+        return None
+    try:
+        cached = result_cache.get(
+            content_hash, source_language, target_language, config
+        )
+        if cached is None:
+            return None
+
+        output_path = f"outputs/{task_id}.png"
+        try:
+            os.link(cached["image_path"], output_path)
+        except OSError:
+            shutil.copyfile(cached["image_path"], output_path)
+    except Exception as e:
+        logger.warning("读取结果缓存失败: %s", e)
+        return None
+
+    return {
+        "status": "completed",
+        "progress": 100,
+        "output_path": output_path,
+        "text_regions": cached["text_regions"],
+        "styled_regions": cached.get("styled_regions"),
+        "cache_hit": True,
+    }
+
+
+def _store_cached_result(
+    content_hash: str,
+    image_size: Tuple[int, int],
+    source_language: Optional[str],
+    target_language: str,
+    output_path: str,
+    text_regions: List[Dict],
+    styled_regions: Optional[List[Dict]] = None,
+):
+    """把流水线输出写入结果缓存，失败不影响任务"""
+    config = _result_cache_config(image_size)
+    if result_cache is None or config is None:
+        return
+    try:
+        result_cache.put(
+            content_hash,
+            source_language,
+            target_language,
+            config,
+            output_path,
+            text_regions,
+            styled_regions,
+        )
+    except Exception as e:
+        logger.warning("写入结果缓存失败: %s", e)
 
 
 @router.get("/tasks/{task_id}")
 async def get_task_status(request: Request, task_id: str):
     """查询任务状态"""
-    if task_id not in tasks:
+    task = await run_io(task_store.get, task_id)
+    if task is None:
         if "text/html" in request.headers.get("accept", ""):
             return HTMLResponse(
                 content="<h1>错误</h1><p>任务不存在</p><a href='/'>返回首页</a>",
@@ -158,8 +615,6 @@ async def get_task_status(request: Request, task_id: str):
             )
         raise HTTPException(status_code=404, detail="任务不存在")
 
-    task = tasks[task_id]
-
     # 浏览器访问返回HTML页面
     if "text/html" in request.headers.get("accept", ""):
         if task["status"] == "completed":
@@ -167,6 +622,12 @@ async def get_task_status(request: Request, task_id: str):
             upload_path = task.get("upload_path", "")
             original_filename = os.path.basename(upload_path) if upload_path else ""
             original_url = f"/uploads/{original_filename}" if original_filename else ""
+            language_links = "".join(
+                f'<a href="{r["result_url"]}" download class="download-btn">'
+                f"⬇️ {language}</a>"
+                for language, r in (_language_results(task, False) or {}).items()
+                if r["result_url"]
+            )
 
             html_content = f"""<!DOCTYPE html>
 <html lang="zh-CN">
@@ -228,6 +689,7 @@ async def get_task_status(request: Request, task_id: str):
         
         <div class="download-section">
             <a href="/api/v1/download/{task_id}" download class="download-btn">⬇️ 下载翻译结果</a>
+            {language_links}
             <a href="/" class="back-btn">🔄 翻译新图片</a>
         </div>
     </div>
@@ -241,13 +703,19 @@ async def get_task_status(request: Request, task_id: str):
             )
         else:
             progress = task.get("progress", 0)
+            position = job_queue.position(task_id)
+            if position:
+                wait = job_queue.estimated_wait(position)
+                stage_text = f"排队中：第 {position} 位，预计等待 {wait} 秒"
+            else:
+                stage_text = "识别中..." if progress < 50 else "翻译中..."
             html_content = f"""<!DOCTYPE html>
 <html lang="zh-CN">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>处理中 - 图片翻译工具</title>
-    <meta http-equiv="refresh" content="3;url=/api/v1/tasks/{task_id}">
+    <noscript><meta http-equiv="refresh" content="3;url=/api/v1/tasks/{task_id}"></noscript>
     <style>
         body {{ font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; margin: 0; padding: 0; background: #f5f5f5; }}
         .container {{ max-width: 600px; margin: 100px auto; padding: 40px; background: white; border-radius: 8px; box-shadow: 0 2px 8px rgba(0,0,0,0.1); text-align: center; }}
@@ -260,18 +728,23 @@ async def get_task_status(request: Request, task_id: str):
     <div class="container">
         <div class="loading">⏳</div>
         <h2>正在处理中...</h2>
-        <p>进度: {progress}%</p>
+        <p id="progressText">进度: {progress}%</p>
         <div class="progress-bar">
-            <div class="progress-fill"></div>
+            <div class="progress-fill" id="progressFill"></div>
         </div>
-        <p style="color: #999; font-size: 14px;">{"识别中..." if progress < 50 else "翻译中..."}</p>
+        <p id="stageText" style="color: #999; font-size: 14px;">{stage_text}</p>
         <p style="margin-top: 20px; font-size: 12px; color: #999;">任务ID: {task_id}</p>
     </div>
+    {_progress_script(task_id)}
 </body>
 </html>"""
             return HTMLResponse(content=html_content)
 
     # API调用返回JSON
+    # 排队位置只有处理该任务的进程知道；其他 worker 进程返回 None
+    queue_position = (
+        job_queue.position(task_id) if task["status"] == "pending" else None
+    )
     return TaskStatus(
         task_id=task["task_id"],
         status=task["status"],
@@ -279,30 +752,278 @@ async def get_task_status(request: Request, task_id: str):
         result_url=f"/api/v1/download/{task_id}"
         if task["status"] == "completed"
         else None,
+        stage=task.get("stage"),
+        queue_position=queue_position,
+        estimated_wait_seconds=job_queue.estimated_wait(queue_position)
+        if queue_position
+        else None,
         detected_language=task.get("detected_language"),
         text_regions=task.get("text_regions"),
+        results=_language_results(task),
+        timings=task.get("timings"),
         error_message=task.get("error_message"),
     )
 
 
+@router.post("/tasks/{task_id}/retranslate")
+async def retranslate_task(
+    task_id: str,
+    target_language: str,
+    source_language: Optional[str] = None,
+):
+    """把已完成任务的图片翻译成另一种语言
+
+    复用原任务保存的OCR区域和样式，只重新翻译和重绘；
+    原任务没有可复用的识别结果时（例如旧版本创建的任务）走完整流水线。
+    """
+    source_task = await run_io(task_store.get, task_id)
+    if source_task is None:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    if source_task["status"] != "completed":
+        raise HTTPException(status_code=400, detail="任务尚未完成")
+
+    upload_path = source_task.get("upload_path")
+    if not upload_path or not os.path.exists(upload_path):
+        raise HTTPException(status_code=404, detail="原图不存在")
+
+    source_language = source_language or source_task.get("source_language")
+    content_hash = source_task.get("content_hash")
+    image_size = source_task.get("image_size")
+    styled_regions = source_task.get("styled_regions")
+
+    new_task_id = str(uuid.uuid4())
+    task = {
+        "task_id": new_task_id,
+        "status": "pending",
+        "progress": 0,
+        "upload_path": upload_path,
+        "content_hash": content_hash,
+        "image_size": image_size,
+        "source_task_id": task_id,
+        "target_language": target_language,
+        "source_language": source_language,
+        "result_url": None,
+        "detected_language": source_task.get("detected_language"),
+        "text_regions": None,
+        "error_message": None,
+    }
+
+    cached = None
+    if content_hash:
+        cached = await run_io(
+            _load_cached_result,
+            new_task_id,
+            content_hash,
+            image_size,
+            source_language,
+            target_language,
+        )
+
+    if cached:
+        task.update(cached)
+        await run_io(task_store.create, task)
+        queue_position = None
+    elif styled_regions is not None:
+        queue_position = await _enqueue_task(
+            task,
+            process_retranslation_task,
+            new_task_id,
+            upload_path,
+            target_language,
+            source_language,
+            content_hash,
+            styled_regions,
+            image_size,
+        )
+    else:
+        queue_position = await _enqueue_task(
+            task,
+            process_translation_task,
+            new_task_id,
+            upload_path,
+            target_language,
+            source_language,
+            content_hash,
+        )
+
+    data = {
+        "task_id": new_task_id,
+        "status": task["status"],
+        "progress": task["progress"],
+        "source_task_id": task_id,
+    }
+    if queue_position:
+        data["queue_position"] = queue_position
+        data["estimated_wait_seconds"] = job_queue.estimated_wait(queue_position)
+    return TranslationResponse(success=True, data=data)
+
+
+@router.get("/tasks/{task_id}/events")
+async def task_events(request: Request, task_id: str):
+    """任务进度推送（Server-Sent Events），每次状态或进度变化发送一个 progress 事件，
+    任务完成或失败后关闭连接"""
+    task = await run_io(task_store.get, task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail="任务不存在")
+
+    return StreamingResponse(
+        _task_event_stream(request, task_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _task_event_stream(request: Request, task_id: str):
+    # 先订阅再读取当前状态，避免两者之间的更新丢失
+    queue = progress_bus.subscribe(task_id)
+    try:
+        task = await run_io(task_store.get, task_id)
+        if task is None:
+            return
+        last = _task_event(task)
+        yield "retry: 3000\n" + _sse(last)
+
+        idle = 0.0
+        while last["status"] not in FINAL_STATUSES:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=SSE_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    return
+                # 本进程没有收到事件：任务可能在其他 worker 中处理，查询存储
+                task = await run_io(task_store.get, task_id)
+                if task is None:
+                    return
+                event = _task_event(task)
+
+            if event == last:
+                idle += SSE_POLL_INTERVAL
+                if idle >= SSE_KEEPALIVE_INTERVAL:
+                    idle = 0.0
+                    yield ": keepalive\n\n"
+                continue
+
+            idle = 0.0
+            last = event
+            yield _sse(event)
+    finally:
+        progress_bus.unsubscribe(task_id, queue)
+
+
+def _sse(event: Dict) -> str:
+    data = json.dumps(event, ensure_ascii=False, separators=(",", ":"))
+    return f"event: progress\ndata: {data}\n\n"
+
+
+def _task_event(task: Dict) -> Dict:
+    """推送给客户端的任务摘要（不含文字区域等大字段）"""
+    task_id = task["task_id"]
+    event = {
+        "task_id": task_id,
+        "status": task["status"],
+        "progress": task.get("progress", 0),
+        "stage": task.get("stage"),
+        "result_url": f"/api/v1/download/{task_id}"
+        if task["status"] == "completed"
+        else None,
+        "error_message": task.get("error_message"),
+    }
+    results = _language_results(task, with_regions=False)
+    if results is not None:
+        event["results"] = results
+    return event
+
+
+def _language_results(task: Dict, with_regions: bool = True) -> Optional[Dict]:
+    """多目标语言任务各语言的状态和下载地址；单语言任务返回 None"""
+    results = task.get("results")
+    if results is None:
+        return None
+    task_id = task["task_id"]
+    summary = {}
+    for language, result in results.items():
+        item = {
+            "status": result["status"],
+            "result_url": f"/api/v1/download/{task_id}?language={language}"
+            if result["status"] == "completed"
+            else None,
+            "error_message": result.get("error_message"),
+        }
+        if with_regions:
+            item["text_regions"] = result.get("text_regions")
+            item["timings"] = result.get("timings")
+        summary[language] = item
+    return summary
+
+
+async def _update_task(task_id: str, **fields) -> Optional[Dict]:
+    """更新任务存储并推送进度事件"""
+    task = await run_io(task_store.update, task_id, **fields)
+    if task is not None:
+        progress_bus.publish(task_id, _task_event(task))
+        if fields.get("status") in FINAL_STATUSES:
+            tasks_total.inc(status=fields["status"])
+    return task
+
+
+def _progress_script(task_id: str) -> str:
+    """处理中页面的进度推送脚本：EventSource 更新进度条，结束后刷新页面；
+    不支持 EventSource 或连接失败时回退到定时刷新"""
+    return f"""<script>
+        (function() {{
+            var taskUrl = "/api/v1/tasks/{task_id}";
+            var stages = {{ decode: "读取图片...", ocr: "识别中...", style: "分析样式...", translate: "翻译中...", redraw: "生成图片..." }};
+            function fallback() {{ setTimeout(function() {{ location.href = taskUrl; }}, 3000); }}
+            if (!window.EventSource) {{ fallback(); return; }}
+            var source = new EventSource(taskUrl + "/events");
+            source.addEventListener("progress", function(e) {{
+                var data = JSON.parse(e.data);
+                var fill = document.getElementById("progressFill");
+                fill.style.animation = "none";
+                fill.style.width = data.progress + "%";
+                document.getElementById("progressText").textContent = "进度: " + data.progress + "%";
+                if (stages[data.stage]) {{ document.getElementById("stageText").textContent = stages[data.stage]; }}
+                if (data.status === "completed" || data.status === "failed") {{
+                    source.close();
+                    location.href = taskUrl;
+                }}
+            }});
+            source.onerror = function() {{ source.close(); fallback(); }};
+        }})();
+    </script>"""
+
+
 @router.get("/download/{task_id}")
-async def download_result(task_id: str):
-    """下载翻译后的图片"""
-    if task_id not in tasks:
+async def download_result(task_id: str, language: Optional[str] = None):
+    """下载翻译后的图片；多目标语言任务用 language 指定语言"""
+    task = await run_io(task_store.get, task_id)
+    if task is None:
         raise HTTPException(status_code=404, detail="任务不存在")
 
-    task = tasks[task_id]
-    if task["status"] != "completed":
-        raise HTTPException(status_code=400, detail="任务尚未完成")
+    results = task.get("results")
+    if language and results is not None:
+        result = results.get(language)
+        if result is None:
+            raise HTTPException(status_code=404, detail=f"任务不包含语言: {language}")
+        if result["status"] != "completed":
+            raise HTTPException(status_code=400, detail=f"语言 {language} 尚未完成")
+        output_path = result.get("output_path")
+        filename = f"translated_{task_id}_{language}.png"
+    else:
+        if language and language != task.get("target_language"):
+            raise HTTPException(status_code=404, detail=f"任务不包含语言: {language}")
+        if task["status"] != "completed":
+            raise HTTPException(status_code=400, detail="任务尚未完成")
+        output_path = task.get("output_path")
+        filename = f"translated_{task_id}.png"
 
-    output_path = task.get("output_path")
     if not output_path or not os.path.exists(output_path):
         raise HTTPException(status_code=404, detail="结果文件不存在")
 
     return FileResponse(
         output_path,
         media_type="image/png",
-        filename=f"translated_{task_id}.png",
+        filename=filename,
     )
 
 
@@ -311,76 +1032,446 @@ async def process_translation_task(
     upload_path: str,
     target_language: str,
     source_language: Optional[str],
+    content_hash: Optional[str] = None,
 ):
-    """后台处理翻译任务"""
+    """后台处理翻译任务
+
+    OCR、样式提取和重绘在CPU线程池中执行，翻译通过异步HTTP客户端并发请求，
+    事件循环只负责调度，保证 /health 和任务查询接口在处理期间仍可响应。
+    各阶段耗时写入 timings 和 /metrics。
+    """
+    timer = await _start_task(task_id)
     try:
-        task = tasks[task_id]
+        # 1-2. OCR识别、提取样式
+        buffer, regions_with_style = await _recognize_and_style(
+            task_id, upload_path, content_hash, timer
+        )
+        if not regions_with_style:
+            await _complete_without_text(
+                task_id,
+                upload_path,
+                buffer.size,
+                target_language,
+                source_language,
+                content_hash,
+                timer,
+            )
+            return
+
+        # 3-4. 翻译并重绘；识别和样式结果随任务保存，供重新翻译复用
+        await _translate_and_redraw(
+            task_id,
+            buffer,
+            regions_with_style,
+            target_language,
+            source_language,
+            content_hash,
+            timer,
+        )
+
+    except Exception as e:
+        await _fail_task(task_id, timer, e)
 
-        # 1. OCR识别
-        task["status"] = "processing"
-        task["progress"] = 20
-        text_regions = ocr_service.recognize(upload_path)
 
-        if not text_regions:
-            task["status"] = "completed"
-            task["progress"] = 100
-            task["output_path"] = upload_path
+async def process_multi_translation_task(
+    task_id: str,
+    upload_path: str,
+    target_languages: List[str],
+    source_language: Optional[str],
+    content_hash: Optional[str] = None,
+):
+    """后台处理多目标语言任务：OCR和样式提取只做一次，各语言并发翻译、并行重绘"""
+    timer = await _start_task(task_id)
+    try:
+        buffer, regions_with_style = await _recognize_and_style(
+            task_id, upload_path, content_hash, timer
+        )
+        await _fan_out(
+            task_id,
+            upload_path,
+            buffer,
+            regions_with_style,
+            target_languages,
+            source_language,
+            content_hash,
+            timer,
+        )
+
+    except Exception as e:
+        await _fail_task(task_id, timer, e)
+
+
+async def process_retranslation_task(
+    task_id: str,
+    upload_path: str,
+    target_language: str,
+    source_language: Optional[str],
+    content_hash: Optional[str],
+    styled_regions: List[Dict],
+    image_size: Optional[Tuple[int, int]] = None,
+):
+    """后台处理重新翻译任务：复用原任务的OCR和样式结果，只做翻译和重绘"""
+    timer = await _start_task(task_id)
+    try:
+        if not styled_regions:
+            await _complete_without_text(
+                task_id,
+                upload_path,
+                image_size,
+                target_language,
+                source_language,
+                content_hash,
+                timer,
+            )
             return
 
-        # 2. 提取样式
-        task["progress"] = 40
-        regions_with_style = image_service.extract_styles(upload_path, text_regions)
+        with timer.stage("decode"):
+            buffer = await run_cpu(ImageBuffer, upload_path, content_hash)
+        await _translate_and_redraw(
+            task_id,
+            buffer,
+            styled_regions,
+            target_language,
+            source_language,
+            content_hash,
+            timer,
+        )
+
+    except Exception as e:
+        await _fail_task(task_id, timer, e)
+
 
-        # 3. 翻译
-        task["progress"] = 60
-        texts = [r["text"] for r in text_regions]
-        translations = translation_service.translate(
+async def _start_task(task_id: str) -> StageTimer:
+    """任务开始执行：标记为处理中，记录排队等待时间，返回阶段计时器"""
+    task = await _update_task(task_id, status="processing", progress=10, stage="decode")
+    timer = StageTimer(stage_seconds)
+    if task is not None and task.get("created_at"):
+        wait = max(0.0, time.time() - task["created_at"])
+        queue_wait_seconds.observe(wait)
+        timer.timings["queue_wait"] = round(wait, 4)
+    return timer
+
+
+async def _fail_task(task_id: str, timer: StageTimer, error: Exception):
+    """任务处理失败：记录错误信息和已完成阶段的耗时"""
+    await _update_task(
+        task_id,
+        status="failed",
+        stage="failed",
+        error_message=str(error),
+        timings=timer.timings,
+    )
+    logger.exception(
+        "任务 %s 处理失败: %s", task_id, error, extra={"task_id": task_id}
+    )
+
+
+async def _recognize_and_style(
+    task_id: str, upload_path: str, content_hash: Optional[str], timer: StageTimer
+) -> Tuple[ImageBuffer, List[Dict]]:
+    """解码图片、OCR识别并提取样式；没有文字时返回空列表"""
+    # 图片只解码一次，OCR、样式提取、重绘共用同一份数据
+    with timer.stage("decode"):
+        buffer = await run_cpu(ImageBuffer, upload_path, content_hash)
+
+    # 1. OCR识别
+    await _update_task(task_id, progress=20, stage="ocr", timings=timer.timings)
+    with timer.stage("ocr"):
+        text_regions = await run_cpu(ocr_service.recognize, buffer)
+    buffer.release_views()
+    regions_per_image.observe(len(text_regions))
+    if not text_regions:
+        return buffer, []
+
+    # 2. 提取样式
+    await _update_task(task_id, progress=40, stage="style", timings=timer.timings)
+    with timer.stage("style"):
+        regions_with_style = await run_cpu(
+            image_service.extract_styles, buffer, text_regions
+        )
+    return buffer, regions_with_style
+
+
+async def _complete_without_text(
+    task_id: str,
+    upload_path: str,
+    image_size: Optional[Tuple[int, int]],
+    target_language: str,
+    source_language: Optional[str],
+    content_hash: Optional[str],
+    timer: StageTimer,
+):
+    """图片中没有文字：原图即结果"""
+    await _update_task(
+        task_id,
+        status="completed",
+        progress=100,
+        stage="done",
+        output_path=upload_path,
+        styled_regions=[],
+        timings=timer.timings,
+    )
+    if content_hash:
+        await run_io(
+            _store_cached_result,
+            content_hash,
+            image_size,
+            source_language,
+            target_language,
+            upload_path,
+            [],
+            [],
+        )
+
+
+async def _translate_and_redraw(
+    task_id: str,
+    buffer: ImageBuffer,
+    regions_with_style: List[Dict],
+    target_language: str,
+    source_language: Optional[str],
+    content_hash: Optional[str],
+    timer: StageTimer,
+):
+    """翻译文字区域并重绘图片，完成后更新任务并写入结果缓存"""
+    # 翻译前保存一份识别和样式结果（下面会写入译文和跳过标记）
+    styled_regions = copy.deepcopy(regions_with_style)
+
+    # 3. 翻译
+    await _update_task(
+        task_id,
+        progress=60,
+        stage="translate",
+        styled_regions=styled_regions,
+        timings=timer.timings,
+    )
+    untranslated = await _translate_regions(
+        regions_with_style, target_language, source_language, timer
+    )
+
+    # 4. 重绘图片
+    await _update_task(task_id, progress=80, stage="redraw", timings=timer.timings)
+    output_path = f"outputs/{task_id}.png"
+    final_regions = await _redraw_regions(
+        buffer, regions_with_style, output_path, timer
+    )
+
+    await _update_task(
+        task_id,
+        status="completed",
+        progress=100,
+        stage="done",
+        output_path=output_path,
+        text_regions=final_regions,
+        timings=timer.timings,
+    )
+    # 有片段翻译失败（保留了原文）时不写入结果缓存，下次请求重新翻译
+    if content_hash and not untranslated:
+        await run_io(
+            _store_cached_result,
+            content_hash,
+            buffer.size,
+            source_language,
+            target_language,
+            output_path,
+            final_regions,
+            styled_regions,
+        )
+
+
+async def _fan_out(
+    task_id: str,
+    upload_path: str,
+    buffer: ImageBuffer,
+    regions_with_style: List[Dict],
+    target_languages: List[str],
+    source_language: Optional[str],
+    content_hash: Optional[str],
+    timer: StageTimer,
+):
+    """
+    把同一份识别结果翻译成多种语言
+
+    各语言的翻译请求并发发出，重绘在CPU线程池中并行执行（每种语言各自一份区域副本，
+    画布由 ImageBuffer 每次新建）。每完成一种语言就更新 results；
+    至少一种语言成功时父任务完成，全部失败时父任务失败。
+    父任务的 timings 记录共享阶段，各语言的翻译和重绘耗时记录在各自的结果中。
+    """
+    styled_regions = copy.deepcopy(regions_with_style)
+    task = await _update_task(
+        task_id,
+        progress=60,
+        stage="translate",
+        styled_regions=styled_regions,
+        timings=timer.timings,
+    )
+    results: Dict[str, Dict] = dict(task.get("results") or {}) if task else {}
+    for language in target_languages:
+        results[language] = _language_result("processing")
+    await _update_task(task_id, results=results)
+
+    finished = 0
+
+    async def render(language: str):
+        nonlocal finished
+        language_timer = StageTimer(stage_seconds)
+        try:
+            if regions_with_style:
+                output_path = f"outputs/{task_id}_{language}.png"
+                regions = copy.deepcopy(styled_regions)
+                untranslated = await _translate_regions(
+                    regions, language, source_language, language_timer
+                )
+                final_regions = await _redraw_regions(
+                    buffer, regions, output_path, language_timer
+                )
+            else:
+                output_path, final_regions, untranslated = upload_path, [], 0
+            results[language] = _language_result(
+                "completed",
+                output_path=output_path,
+                text_regions=final_regions,
+                timings=language_timer.timings,
+            )
+            if content_hash and not untranslated:
+                await run_io(
+                    _store_cached_result,
+                    content_hash,
+                    buffer.size,
+                    source_language,
+                    language,
+                    output_path,
+                    final_regions,
+                    styled_regions,
+                )
+        except Exception as e:
+            results[language] = _language_result(
+                "failed", error_message=str(e), timings=language_timer.timings
+            )
+            logger.exception(
+                "任务 %s 语言 %s 处理失败: %s",
+                task_id,
+                language,
+                e,
+                extra={"task_id": task_id, "language": language},
+            )
+
+        finished += 1
+        await _update_task(
+            task_id,
+            progress=60 + 39 * finished // len(target_languages),
+            stage="redraw",
+            results=dict(results),
+        )
+
+    await asyncio.gather(*(render(language) for language in target_languages))
+
+    # 父任务的 output_path/text_regions 指向第一个成功的语言，兼容单语言客户端
+    primary = next(
+        (r for r in results.values() if r["status"] == "completed"), None
+    )
+    if primary is None:
+        errors = "; ".join(
+            f"{language}: {r['error_message']}" for language, r in results.items()
+        )
+        await _update_task(
+            task_id,
+            status="failed",
+            stage="failed",
+            error_message=errors,
+            results=results,
+            timings=timer.timings,
+        )
+        return
+    await _update_task(
+        task_id,
+        status="completed",
+        progress=100,
+        stage="done",
+        output_path=primary["output_path"],
+        text_regions=primary["text_regions"],
+        results=results,
+        timings=timer.timings,
+    )
+
+
+def _language_result(
+    status: str,
+    output_path: Optional[str] = None,
+    text_regions: Optional[List[Dict]] = None,
+    error_message: Optional[str] = None,
+    timings: Optional[Dict[str, float]] = None,
+) -> Dict:
+    """多语言任务中单个目标语言的结果"""
+    return {
+        "status": status,
+        "output_path": output_path,
+        "text_regions": text_regions,
+        "error_message": error_message,
+        "timings": timings,
+    }
+
+
+async def _translate_regions(
+    regions_with_style: List[Dict],
+    target_language: str,
+    source_language: Optional[str],
+    timer: StageTimer,
+) -> int:
+    """翻译区域文字，把译文和跳过重绘标记写回区域，返回翻译失败（保留原文）的区域数"""
+    texts = [r["region"]["text"] for r in regions_with_style]
+    with timer.stage("translate"):
+        translations = await translation_service.translate_async(
             texts, target_language, source_language
         )
 
-        # 更新翻译结果
-        for i, region in enumerate(regions_with_style):
-            if i < len(translations):
-                trans_result = translations[i]
-
-                # 如果是字典类型，获取翻译文本
-                if isinstance(trans_result, dict):
-                    region["region"]["translated_text"] = trans_result.get("text", "")
-                    skip = trans_result.get("skip_redraw", False)
-                else:
-                    # 兼容旧格式（字符串）
-                    region["region"]["translated_text"] = trans_result
-                    skip = False
-
-                # 跳过逻辑：
-                # - 如果是明确不需要翻译的内容（如数字、符号、序列号、IP规格），跳过重绘
-                # - 只有需要翻译的内容才重绘
-                if target_language == "zh":
-                    # 中文目标：只重绘需要翻译的内容（skip_redraw=False）
-                    region["skip_redraw"] = skip
-                else:
-                    # 非中文目标：按skip_redraw决定
-                    region["skip_redraw"] = skip
-
-        # 4. 重绘图片 - 过滤掉不需要重绘的区域
-        task["progress"] = 80
-        output_path = f"outputs/{task_id}.png"
+    # 更新翻译结果
+    for i, region in enumerate(regions_with_style):
+        if i < len(translations):
+            trans_result = translations[i]
+
+            # 如果是字典类型，获取翻译文本
+            if isinstance(trans_result, dict):
+                region["region"]["translated_text"] = trans_result.get("text", "")
+                skip = trans_result.get("skip_redraw", False)
+            else:
+                # 兼容旧格式（字符串）
+                region["region"]["translated_text"] = trans_result
+                skip = False
+
+            # 明确不需要翻译的内容（如数字、符号、序列号、IP规格）跳过重绘，
+            # 只有需要翻译的内容才重绘
+            region["skip_redraw"] = skip
 
-        # 过滤出需要重绘的区域
-        regions_to_redraw = [
-            r for r in regions_with_style if not r.get("skip_redraw", False)
-        ]
-        print(
-            f"需要重绘的区域数量: {len(regions_to_redraw)} / {len(regions_with_style)}"
+    untranslated = sum(
+        1 for t in translations if isinstance(t, dict) and t.get("failed")
+    )
+    if untranslated:
+        logger.warning(
+            "%d / %d 个区域翻译失败，保留原文，结果不写入缓存",
+            untranslated,
+            len(regions_with_style),
         )
+    return untranslated
 
-        image_service.redraw_image(upload_path, regions_to_redraw, output_path)
 
-        task["status"] = "completed"
-        task["progress"] = 100
-        task["output_path"] = output_path
+async def _redraw_regions(
+    buffer: ImageBuffer,
+    regions_with_style: List[Dict],
+    output_path: str,
+    timer: StageTimer,
+) -> List[Dict]:
+    """重绘图片（过滤掉不需要重绘的区域），返回最终的文字区域"""
+    regions_to_redraw = [
+        r for r in regions_with_style if not r.get("skip_redraw", False)
+    ]
+    logger.debug(
+        "需要重绘的区域数量: %d / %d", len(regions_to_redraw), len(regions_with_style)
+    )
 
-    except Exception as e:
-        task["status"] = "failed"
-        task["error_message"] = str(e)
-        print(f"任务 {task_id} 处理失败: {str(e)}")
+    # 绘制和编码分开计时：大图的 PNG 编码本身可能占重绘的相当一部分
+    with timer.stage("redraw"):
+        image = await run_cpu(image_service.render_image, buffer, regions_to_redraw)
+    with timer.stage("encode"):
+        await run_cpu(image_service.save_image, image, output_path)
+    return [r["region"] for r in regions_with_style]
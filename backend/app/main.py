@@ -1,7 +1,9 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response
 import os
 
 # 加载环境变量
@@ -13,14 +15,45 @@ dotenv_path = os.path.join(
 )
 load_dotenv(dotenv_path)
 
-from app.api.routes import router
+from app.utils.log import setup_logging
+
+# 日志需要在导入服务模块（会在初始化时输出日志）之前配置
+setup_logging()
+
+from app.api.routes import (
+    router,
+    translation_service,
+    job_queue,
+    metrics_registry,
+    readiness,
+    warm_up_services,
+)
+from app.utils.executors import shutdown_executors
+from app.utils.upload import MAX_FILE_SIZE, MULTIPART_OVERHEAD, UploadSizeLimitMiddleware
 
 # 创建必要的目录
 os.makedirs("uploads", exist_ok=True)
 os.makedirs("outputs", exist_ok=True)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期：启动任务队列 worker 并在后台预热模型；
+    退出时停止队列，关闭HTTP客户端和工作线程池"""
+    await job_queue.start()
+    warm_up = asyncio.create_task(warm_up_services())
+    yield
+    warm_up.cancel()
+    await job_queue.stop()
+    await translation_service.aclose()
+    shutdown_executors(wait=False)
+
+
 app = FastAPI(
-    title="图片翻译服务", description="支持多语言的图片文字翻译服务", version="1.0.0"
+    title="图片翻译服务",
+    description="支持多语言的图片文字翻译服务",
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 # 配置CORS
@@ -32,6 +65,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 上传大小限制：在表单解析前拒绝超大请求体
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    max_body_size=MAX_FILE_SIZE + MULTIPART_OVERHEAD,
+    paths=("/translate",),
+)
+
 # 注册路由
 app.include_router(router, prefix="/api/v1")
 
@@ -211,3 +251,19 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+
+@app.get("/ready")
+async def readiness_check():
+    """就绪检查：OCR模型和字体预热完成前返回 503（/health 只表示进程存活）"""
+    snapshot = readiness.snapshot()
+    status_code = 200 if snapshot["status"] == "ready" else 503
+    return JSONResponse(snapshot, status_code=status_code)
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus 指标（当前进程）"""
+    return Response(
+        content=metrics_registry.render(), media_type=metrics_registry.content_type
+    )
@@ -0,0 +1,181 @@
+"""
+预派生（pre-fork）多进程服务
+
+父进程加载OCR模型和字体后再 fork 出多个 uvicorn worker，模型权重所在的内存页
+由各 worker 写时复制共享，增加 worker 不再成倍增加模型内存。
+worker 共享同一个监听 socket，任务状态和缓存通过 SQLite 共享（需要 TASK_STORE=sqlite）。
+父进程只负责监督：worker 异常退出时从已加载模型的父进程重新 fork。
+
+用法（在 backend 目录下）：
+    python -m app.prefork --workers 4 --port 8000
+"""
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict
+
+import uvicorn
+
+# 导入应用：加载环境变量、配置日志、创建各服务实例（此时还没有任何线程）
+from app.main import app
+from app.api.routes import image_service, ocr_service
+from app.utils.log import get_logger
+
+logger = get_logger("app.prefork")
+
+# worker 启动后存活不到这么久就退出，视为启动失败，重新 fork 前等待
+MIN_WORKER_UPTIME = 5.0
+RESTART_BACKOFF = 5.0
+# 收到停止信号后等待 worker 优雅退出的时间，超时后强制结束
+GRACEFUL_TIMEOUT = 30.0
+
+
+def preload():
+    """在父进程中加载模型和字体，然后冻结现有对象，减少 worker 中的写时复制"""
+    try:
+        engine = ocr_service.preload()
+        logger.info("父进程已加载OCR模型: %s", engine)
+    except Exception as e:
+        # worker 启动后会再次尝试初始化，并在 /ready 中报告失败
+        logger.warning("父进程加载OCR模型失败，由各 worker 自行初始化: %s", e)
+    logger.info("父进程已加载字体: %s", image_service.warm_up())
+
+    # 把已有对象移出垃圾回收的跟踪范围：worker 中的 GC 不会再写这些对象所在的页
+    gc.collect()
+    gc.freeze()
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class Supervisor:
+    """fork 并监督 worker 进程"""
+
+    def __init__(self, sock: socket.socket, workers: int, config_kwargs: Dict):
+        self.sock = sock
+        self.workers = workers
+        self.config_kwargs = config_kwargs
+        self.children: Dict[int, float] = {}
+        self.stopping = False
+        self.stop_deadline = 0.0
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+
+        for _ in range(self.workers):
+            self._spawn()
+
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                if self.stopping and time.monotonic() > self.stop_deadline:
+                    self._signal_children(signal.SIGKILL)
+                time.sleep(0.5)
+                continue
+
+            started = self.children.pop(pid, time.monotonic())
+            if self.stopping:
+                continue
+            uptime = time.monotonic() - started
+            logger.warning(
+                "worker %d 退出（状态 %d，运行 %.1f 秒），重新启动",
+                pid,
+                os.waitstatus_to_exitcode(status),
+                uptime,
+            )
+            if uptime < MIN_WORKER_UPTIME:
+                time.sleep(RESTART_BACKOFF)
+            if not self.stopping:
+                self._spawn()
+
+        logger.info("所有 worker 已退出")
+
+    def _spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                self._run_worker()
+            except BaseException:
+                logger.exception("worker %d 异常退出", os.getpid())
+                code = 1
+            finally:
+                os._exit(code)
+        self.children[pid] = time.monotonic()
+        logger.info("已启动 worker %d", pid)
+
+    def _run_worker(self):
+        # 恢复默认信号处理，由 uvicorn 自己处理 SIGTERM/SIGINT 并优雅退出
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        config = uvicorn.Config(app, lifespan="on", **self.config_kwargs)
+        uvicorn.Server(config).run(sockets=[self.sock])
+
+    def _handle_stop(self, signum, frame):
+        if self.stopping:
+            return
+        logger.info("收到信号 %d，停止所有 worker", signum)
+        self.stopping = True
+        self.stop_deadline = time.monotonic() + GRACEFUL_TIMEOUT
+        self._signal_children(signal.SIGTERM)
+
+    def _signal_children(self, signum: int):
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="预派生多进程服务（共享已加载的OCR模型）")
+    parser.add_argument("--host", default=os.environ.get("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 8000)))
+    parser.add_argument(
+        "--workers", type=int, default=int(os.environ.get("WEB_CONCURRENCY", 2))
+    )
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--timeout-keep-alive", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if args.workers > 1 and os.environ.get("TASK_STORE", "sqlite") == "memory":
+        logger.warning("TASK_STORE=memory 时各 worker 的任务状态互不可见，请使用 sqlite")
+
+    preload()
+    sock = bind_socket(args.host, args.port)
+    logger.info(
+        "在 %s:%d 上启动 %d 个 worker（父进程 %d）",
+        args.host,
+        args.port,
+        args.workers,
+        os.getpid(),
+    )
+    Supervisor(
+        sock,
+        args.workers,
+        {
+            "log_level": args.log_level,
+            "timeout_keep_alive": args.timeout_keep_alive,
+        },
+    ).run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+import fnmatch
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from PIL import ImageFont
+
+# 各语言的字体名称优先级（在字体目录中按文件名匹配）
+FONT_PRIORITY = {
+    "zh": ["NotoSansCJK", "NotoSansSC", "SimHei", "Microsoft YaHei", "SimSun"],
+    "ja": ["NotoSansCJK", "NotoSansJP", "MS Gothic", "Hiragino Sans"],
+    "ko": ["NotoSansCJK", "NotoSansKR", "Malgun Gothic"],
+    "en": ["Arial", "DejaVuSans", "NotoSans"],
+    "default": ["NotoSansCJK", "DejaVuSans", "Arial"],
+}
+
+# 各语言的系统字体路径
+SYSTEM_FONTS = {
+    "zh": [
+        "C:\\Windows\\Fonts\\msyh.ttc",
+        "C:\\Windows\\Fonts\\simhei.ttf",
+        "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+    ],
+    "ja": [
+        "C:\\Windows\\Fonts\\msgothic.ttc",
+        "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+    ],
+    "ko": [
+        "C:\\Windows\\Fonts\\malgun.ttf",
+        "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+    ],
+    "en": [
+        "C:\\Windows\\Fonts\\arial.ttf",
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    ],
+}
+
+# 不区分语言时的系统回退字体（跨平台）
+if os.name == "nt":  # Windows
+    DEFAULT_SYSTEM_FONTS = [
+        "C:\\Windows\\Fonts\\msyh.ttc",  # 微软雅黑
+        "C:\\Windows\\Fonts\\simsun.ttc",  # 宋体
+        "C:\\Windows\\Fonts\\arial.ttf",
+    ]
+else:  # Linux/Mac
+    DEFAULT_SYSTEM_FONTS = [
+        "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+        "/usr/share/fonts/truetype/wqy/wqy-microhei.ttc",
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    ]
+
+FONT_EXTENSIONS = (".ttc", ".otf", ".ttf")
+
+
+class FontRegistry:
+    """
+    字体注册表
+
+    启动时扫描一次字体目录，把语言解析为按优先级排列的字体路径列表；
+    已加载的 FreeTypeFont 按 (路径, 字号) 做 LRU 缓存，避免在字号搜索循环中
+    反复扫描目录和解析字体文件。
+
+    FreeType 字体对象不保证线程安全，缓存按线程隔离。
+    """
+
+    def __init__(self, font_dir: Optional[str] = None, cache_size: Optional[int] = None):
+        self.font_dir = font_dir or os.environ.get("FONT_DIR", "./fonts")
+        self.cache_size = cache_size or int(os.environ.get("FONT_CACHE_SIZE", 256))
+
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._resolved: Dict[Optional[str], List[str]] = {}
+        self._broken: set = set()
+        self._caches: List[OrderedDict] = []
+        self.hits = 0
+        self.misses = 0
+        self.load_errors = 0
+
+        self.scan()
+
+    def scan(self):
+        """扫描字体目录和系统字体路径（字体文件变化后可重新调用）"""
+        # 与 glob 的行为一致：目录顺序、跳过隐藏文件
+        dir_fonts: Dict[str, List[str]] = {ext: [] for ext in FONT_EXTENSIONS}
+        if os.path.isdir(self.font_dir):
+            for name in os.listdir(self.font_dir):
+                ext = os.path.splitext(name)[1]
+                if ext in dir_fonts and not name.startswith("."):
+                    dir_fonts[ext].append(os.path.join(self.font_dir, name))
+
+        self._dir_fonts = dir_fonts
+        self._system_fonts = {
+            lang: [p for p in paths if os.path.exists(p)]
+            for lang, paths in SYSTEM_FONTS.items()
+        }
+        self._default_system_fonts = [
+            p for p in DEFAULT_SYSTEM_FONTS if os.path.exists(p)
+        ]
+        self._resolved = {}
+
+    def candidates(self, language: Optional[str] = None) -> List[str]:
+        """
+        返回按优先级排列的字体路径
+
+        language 为 None 时使用字体目录中的任意字体，再回退到系统字体；
+        指定语言时先按该语言的字体名称优先级匹配，再依次回退到该语言的
+        系统字体和通用字体。
+        """
+        if language not in self._resolved:
+            paths = []
+            if language is not None:
+                for font_name in FONT_PRIORITY.get(language, FONT_PRIORITY["default"]):
+                    for ext in FONT_EXTENSIONS:
+                        pattern = f"*{font_name}*{ext}"
+                        paths.extend(
+                            p
+                            for p in self._dir_fonts[ext]
+                            if fnmatch.fnmatch(os.path.basename(p), pattern)
+                        )
+                paths.extend(
+                    self._system_fonts.get(language, self._system_fonts["en"])
+                )
+
+            for ext in FONT_EXTENSIONS:
+                paths.extend(self._dir_fonts[ext])
+            paths.extend(self._default_system_fonts)
+
+            # 去重，保持优先级顺序
+            self._resolved[language] = list(OrderedDict.fromkeys(paths))
+
+        return self._resolved[language]
+
+    def get_font(
+        self, size: int, language: Optional[str] = None
+    ) -> ImageFont.ImageFont:
+        """获取指定字号的字体，所有候选都无法加载时返回 Pillow 默认字体"""
+        for path in self.candidates(language):
+            if path in self._broken:
+                continue
+            font = self.load(path, size)
+            if font is not None:
+                return font
+
+        return ImageFont.load_default()
+
+    def load(self, path: str, size: int) -> Optional[ImageFont.FreeTypeFont]:
+        """加载 (路径, 字号) 对应的字体，带 LRU 缓存；加载失败返回 None"""
+        cache = self._thread_cache()
+        key = (path, size)
+        font = cache.get(key)
+        if font is not None:
+            cache.move_to_end(key)
+            with self._stats_lock:
+                self.hits += 1
+            return font
+
+        try:
+            font = ImageFont.truetype(path, size)
+        except Exception:
+            with self._stats_lock:
+                self.load_errors += 1
+            self._broken.add(path)
+            return None
+
+        with self._stats_lock:
+            self.misses += 1
+        cache[key] = font
+        while len(cache) > self.cache_size:
+            cache.popitem(last=False)
+        return font
+
+    def stats(self) -> Dict:
+        """字体缓存统计"""
+        with self._stats_lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "load_errors": self.load_errors,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "cached_fonts": sum(len(c) for c in self._caches),
+                "font_files": sum(len(v) for v in self._dir_fonts.values()),
+            }
+
+    def _thread_cache(self) -> "OrderedDict[Tuple[str, int], ImageFont.FreeTypeFont]":
+        cache = getattr(self._local, "cache", None)
+        if cache is None:
+            cache = OrderedDict()
+            self._local.cache = cache
+            with self._stats_lock:
+                self._caches.append(cache)
+        return cache
@@ -1,16 +1,28 @@
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 import cv2
 import numpy as np
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, Union
 import os
 import re
 
+from app.services.font_registry import FontRegistry
+from app.services.text_measure import TextMeasurer
+from app.utils.image_buffer import ImageBuffer
+from app.utils.log import SAMPLED, get_logger
+
+logger = get_logger(__name__)
+
 
 class ImageService:
     def __init__(self):
         self.font_dir = os.environ.get("FONT_DIR", "./fonts")
         self.default_font_size = 20
 
+        # 启动时扫描一次字体目录，之后按 (路径, 字号) 复用已加载的字体
+        self.font_registry = FontRegistry(self.font_dir)
+        # 按字体缓存字符宽度，换行和字号搜索时不再反复调用 textbbox
+        self.text_measurer = TextMeasurer()
+
         # 修复4: 专业术语词典 - 扩展版
         self.terminology_dict = {
             # 光伏/电力领域
@@ -59,133 +71,166 @@ class ImageService:
         # 反向词典用于修正翻译
         self.reverse_terminology = {v: k for k, v in self.terminology_dict.items()}
 
-    def extract_styles(self, image_path: str, text_regions: List[Dict]) -> List[Dict]:
-        """提取每个文字区域的样式信息"""
-        image = Image.open(image_path)
-        if image.mode != "RGB":
-            image = image.convert("RGB")
+    def warm_up(self, sizes: Tuple[int, ...] = (12, 16, 20, 24, 32)) -> str:
+        """预先解析字体候选、加载常用字号并缓存常用字符宽度，返回实际使用的中文字体"""
+        sample = "图片翻译文字区域 Image translation 0123456789"
+        for language in ("en", "zh"):
+            for size in sizes:
+                font = self.font_registry.get_font(size, language)
+                self.text_measurer.textwidth(sample, font)
+        return getattr(font, "path", "default")
+
+    def extract_styles(
+        self, image: Union[str, ImageBuffer], text_regions: List[Dict]
+    ) -> List[Dict]:
+        """
+        提取每个文字区域的样式信息
 
-        regions_with_style = []
+        整张图只转换一次为数组，所有区域的边缘采样点和中心窗口用向量化索引
+        一次取出，再分组计算背景色（众数）和文字颜色（掩码均值）。
+        """
+        img_array = ImageBuffer.ensure(image).rgb
+        img_h, img_w = img_array.shape[:2]
 
+        boxes = []
         for region in text_regions:
             bbox = region["bbox"]
-            style = self._extract_region_style(image, bbox, region["text"])
-            regions_with_style.append({"region": region, "style": style})
+            x_coords = [p[0] for p in bbox]
+            y_coords = [p[1] for p in bbox]
+            x1, x2 = min(x_coords), max(x_coords)
+            y1, y2 = min(y_coords), max(y_coords)
 
-        return regions_with_style
+            margin = 3
+            x1 = max(0, x1 - margin)
+            y1 = max(0, y1 - margin)
+            x2 = min(img_w, x2 + margin)
+            y2 = min(img_h, y2 + margin)
+            boxes.append((x1, y1, x2, y2))
 
-    def _extract_region_style(
-        self, image: Image.Image, bbox: List[List[int]], text: str
-    ) -> Dict:
-        """提取单个区域的样式"""
-        img_array = np.array(image)
+        bg_colors, text_colors = self._extract_region_colors(img_array, boxes)
 
-        x_coords = [p[0] for p in bbox]
-        y_coords = [p[1] for p in bbox]
-        x1, x2 = min(x_coords), max(x_coords)
-        y1, y2 = min(y_coords), max(y_coords)
+        regions_with_style = []
+        for region, (x1, y1, x2, y2), bg_color, text_color in zip(
+            text_regions, boxes, bg_colors, text_colors
+        ):
+            font_size = self._estimate_font_size(y2 - y1, region["text"])
+
+            # 修复3: 改进对齐检测
+            alignment = self._detect_alignment_v2(
+                img_w, img_h, x1, x2, y1, y2, region["text"]
+            )
 
-        margin = 3
-        x1 = max(0, x1 - margin)
-        y1 = max(0, y1 - margin)
-        x2 = min(img_array.shape[1], x2 + margin)
-        y2 = min(img_array.shape[0], y2 + margin)
+            # 修复5: 检测是否为图例区域
+            is_legend = self._detect_legend_region(img_w, img_h, x1, x2, y1, y2)
+
+            style = {
+                "font_color": text_color,
+                "background_color": bg_color,
+                "font_size": font_size,
+                "font_weight": "normal",
+                "alignment": alignment,
+                "is_vertical": False,
+                "is_legend": is_legend,
+                "bbox": [x1, y1, x2, y2],
+            }
+            regions_with_style.append({"region": region, "style": style})
 
-        region_img = img_array[y1:y2, x1:x2]
+        return regions_with_style
 
-        bg_color = self._extract_background_color(region_img)
-        text_color = self._extract_text_color(region_img, bg_color)
-        font_size = self._estimate_font_size(y2 - y1, text)
+    def _extract_region_colors(
+        self, img_array: np.ndarray, boxes: List[Tuple[int, int, int, int]]
+    ) -> Tuple[List[List[int]], List[List[int]]]:
+        """
+        批量计算所有区域的背景色和文字颜色
 
-        # 修复3: 改进对齐检测
-        alignment = self._detect_alignment_v2(
-            img_array.shape[1], img_array.shape[0], x1, x2, y1, y2, text
+        背景色：区域四条边等间距采样（上下边约20个点，左右边约10个点），
+        取出现次数最多的颜色；文字颜色：区域中心 6x20 窗口内与背景色距离
+        大于30的像素均值。空区域分别返回白色和黑色。
+        """
+        img_h, img_w = img_array.shape[:2]
+        count = len(boxes)
+        bg_colors: List[List[int]] = [[255, 255, 255] for _ in range(count)]
+        text_colors: List[List[int]] = [[0, 0, 0] for _ in range(count)]
+
+        # 每个区域在数组中的实际切片范围（与 img_array[y1:y2, x1:x2] 一致）
+        origins, sizes, valid = [], [], []
+        for i, (x1, y1, x2, y2) in enumerate(boxes):
+            ys, ye, _ = slice(y1, y2).indices(img_h)
+            xs, xe, _ = slice(x1, x2).indices(img_w)
+            h, w = max(0, ye - ys), max(0, xe - xs)
+            if h and w:
+                valid.append(i)
+                origins.append((ys, xs))
+                sizes.append((h, w))
+
+        if not valid:
+            return bg_colors, text_colors
+
+        # 1. 收集所有区域的边缘采样点坐标
+        sample_rows, sample_cols, sample_ids = [], [], []
+        for k, ((oy, ox), (h, w)) in enumerate(zip(origins, sizes)):
+            cols = np.arange(0, w, max(1, w // 20))
+            rows = [np.zeros_like(cols), np.full_like(cols, h - 1)]
+            cols = [cols, cols]
+            if h > 2:
+                side = np.arange(0, h, max(1, h // 10))
+                rows += [side, side]
+                cols += [np.zeros_like(side), np.full_like(side, w - 1)]
+            rows = np.concatenate(rows)
+            sample_rows.append(rows + oy)
+            sample_cols.append(np.concatenate(cols) + ox)
+            sample_ids.append(np.full(len(rows), k, dtype=np.int64))
+
+        sample_ids = np.concatenate(sample_ids)
+        samples = img_array[np.concatenate(sample_rows), np.concatenate(sample_cols)]
+
+        # 2. 打包为 (区域编号, RGB) 整数键统计众数；
+        #    次数相同时取数值最小的颜色，与按颜色排序后取首个最大值一致
+        packed = (
+            (samples[:, 0].astype(np.int64) << 16)
+            | (samples[:, 1].astype(np.int64) << 8)
+            | samples[:, 2].astype(np.int64)
         )
-
-        # 修复5: 检测是否为图例区域
-        is_legend = self._detect_legend_region(
-            img_array.shape[1], img_array.shape[0], x1, x2, y1, y2
+        keys, counts = np.unique((sample_ids << 24) | packed, return_counts=True)
+        key_ids = keys >> 24
+        order = np.lexsort((keys, -counts, key_ids))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = key_ids[order][1:] != key_ids[order][:-1]
+        dominant = keys[order][first] & 0xFFFFFF
+        bg = np.stack(
+            [(dominant >> 16) & 0xFF, (dominant >> 8) & 0xFF, dominant & 0xFF], axis=1
         )
 
-        return {
-            "font_color": text_color,
-            "background_color": bg_color,
-            "font_size": font_size,
-            "font_weight": "normal",
-            "alignment": alignment,
-            "is_vertical": False,
-            "is_legend": is_legend,
-            "bbox": [x1, y1, x2, y2],
-        }
-
-    def _extract_background_color(self, region_img: np.ndarray) -> List[int]:
-        """提取背景色 - 改进版"""
-        if region_img.size == 0:
-            return [255, 255, 255]
-
-        h, w = region_img.shape[:2]
-
-        # 修复2: 使用更大范围的边缘采样
-        edge_pixels = []
-
-        # 上下边缘（采样更多点）
-        if w > 0:
-            for i in range(0, w, max(1, w // 20)):  # 采样20个点
-                edge_pixels.append(region_img[0, i, :].tolist())
-                edge_pixels.append(region_img[-1, i, :].tolist())
-
-        # 左右边缘
-        if h > 2:
-            for i in range(0, h, max(1, h // 10)):
-                edge_pixels.append(region_img[i, 0, :].tolist())
-                edge_pixels.append(region_img[i, -1, :].tolist())
-
-        if not edge_pixels:
-            return [255, 255, 255]
-
-        # 使用聚类找出主要背景色
-        edge_pixels_array = np.array(edge_pixels)
-
-        # 简单的众数计算
-        unique_colors, counts = np.unique(edge_pixels_array, axis=0, return_counts=True)
-        dominant_color = unique_colors[np.argmax(counts)]
-
-        return dominant_color.tolist()
-
-    def _extract_text_color(
-        self, region_img: np.ndarray, bg_color: List[int]
-    ) -> List[int]:
-        """提取文字颜色"""
-        if region_img.size == 0:
-            return [0, 0, 0]
-
-        h, w = region_img.shape[:2]
-        center_y, center_x = h // 2, w // 2
-
-        # 取中心区域
-        center_region = region_img[
-            max(0, center_y - 3) : min(h, center_y + 3),
-            max(0, center_x - 10) : min(w, center_x + 10),
-        ]
-
-        if center_region.size == 0:
-            return [0, 0, 0]
-
-        pixels = center_region.reshape(-1, 3)
-        bg_array = np.array(bg_color)
-
-        # 找出与背景色差异最大的颜色
-        distances = np.linalg.norm(pixels - bg_array, axis=1)
-
-        # 过滤掉背景色（距离太小的）
-        text_pixels = pixels[distances > 30]
-
-        if len(text_pixels) > 0:
-            # 取平均文字颜色
-            text_color = np.mean(text_pixels, axis=0).astype(int)
-            return text_color.tolist()
-
-        return [0, 0, 0]
+        # 3. 中心窗口（最多 6 行 x 20 列），用掩码处理靠近边缘的小区域
+        origins_arr = np.array(origins, dtype=np.int64)
+        sizes_arr = np.array(sizes, dtype=np.int64)
+        h, w = sizes_arr[:, 0], sizes_arr[:, 1]
+        cy, cx = h // 2, w // 2
+        r0, r1 = np.maximum(0, cy - 3), np.minimum(h, cy + 3)
+        c0, c1 = np.maximum(0, cx - 10), np.minimum(w, cx + 10)
+
+        dy = np.arange(6)[None, :, None]
+        dx = np.arange(20)[None, None, :]
+        rows = r0[:, None, None] + dy
+        cols = c0[:, None, None] + dx
+        mask = (rows < r1[:, None, None]) & (cols < c1[:, None, None])
+        rows = np.where(mask, rows, 0) + origins_arr[:, 0, None, None]
+        cols = np.where(mask, cols, 0) + origins_arr[:, 1, None, None]
+
+        window = img_array[rows, cols].astype(np.int64)  # (区域数, 6, 20, 3)
+        diff = window - bg[:, None, None, :]
+        # 距离 > 30 等价于距离平方 > 900，避免开方
+        mask &= (diff * diff).sum(axis=3) > 900
+
+        pixel_counts = mask.sum(axis=(1, 2))
+        sums = (window * mask[..., None]).sum(axis=(1, 2))
+
+        for k, i in enumerate(valid):
+            bg_colors[i] = bg[k].tolist()
+            if pixel_counts[k] > 0:
+                text_colors[i] = (sums[k] / pixel_counts[k]).astype(int).tolist()
+
+        return bg_colors, text_colors
 
     def _estimate_font_size(self, region_height: int, text: str) -> int:
         """估算字体大小 - 改进版"""
@@ -245,19 +290,36 @@ class ImageService:
         return is_right_edge or is_top_area
 
     def redraw_image(
-        self, image_path: str, regions_with_style: List[Dict], output_path: str
+        self,
+        image: Union[str, ImageBuffer],
+        regions_with_style: List[Dict],
+        output_path: str,
     ):
-        """重绘图片 - 全面改进版V3（添加重叠检测）"""
-        print(f"🎨 开始重绘图片: {image_path}")
-        print(f"   共 {len(regions_with_style)} 个文字区域")
+        """重绘图片并保存"""
+        self.save_image(self.render_image(image, regions_with_style), output_path)
+
+    def save_image(self, image: Image.Image, output_path: str):
+        """编码并保存重绘结果"""
+        image.save(output_path, quality=95)
+        logger.info("重绘完成: %s", output_path)
+
+    def render_image(
+        self,
+        image: Union[str, ImageBuffer],
+        regions_with_style: List[Dict],
+    ) -> Image.Image:
+        """重绘图片 - 全面改进版V3（添加重叠检测），返回未保存的结果图"""
+        buffer = ImageBuffer.ensure(image)
+        logger.debug(
+            "开始重绘图片: %s，共 %d 个文字区域", buffer.path, len(regions_with_style)
+        )
 
-        image = Image.open(image_path)
-        original_mode = image.mode
-        if image.mode != "RGBA":
-            image = image.convert("RGBA")
+        original_mode = buffer.mode
+        # rgba_image 每次返回新图，可以直接作为画布
+        image = buffer.rgba_image()
 
         # 修复2: 使用矩形填充替代Inpainting，效果更好
-        result_img = image.copy()
+        result_img = image
         draw = ImageDraw.Draw(result_img)
 
         # 修复7: 检测重叠区域并排序处理
@@ -299,8 +361,12 @@ class ImageService:
             if not translated_text:
                 translated_text = original_text
 
-            print(
-                f"   区域 {i + 1}: '{original_text[:30]}...' → '{translated_text[:30]}...'"
+            logger.debug(
+                "区域 %d: '%.30s...' → '%.30s...'",
+                i + 1,
+                original_text,
+                translated_text,
+                extra=SAMPLED,
             )
 
             # 检查区域位置和类型
@@ -315,7 +381,7 @@ class ImageService:
             # 大幅放宽重叠阈值，避免丢失文字
             overlap_threshold = 0.6 if is_bottom else 0.5
             if self._check_overlap(region["bbox"], drawn_regions, overlap_threshold):
-                print(f"   ⚠️  检测到严重重叠，尝试偏移绘制")
+                logger.debug("区域 %d 检测到严重重叠，尝试偏移绘制", i + 1, extra=SAMPLED)
                 # 不再跳过，而是尝试偏移绘制
                 # continue
 
@@ -337,8 +403,7 @@ class ImageService:
         if original_mode != "RGBA":
             result_img = result_img.convert(original_mode)
 
-        result_img.save(output_path, quality=95)
-        print(f"✅ 重绘完成: {output_path}")
+        return result_img
 
     def _sort_regions_by_priority(
         self, regions_with_style: List[Dict], img_height: int
@@ -504,7 +569,7 @@ class ImageService:
 
         # 逐行绘制
         for i, line in enumerate(lines):
-            bbox_line = draw.textbbox((0, 0), line, font=font)
+            bbox_line = self.text_measurer.textbbox(line, font)
             line_width = bbox_line[2] - bbox_line[0]
 
             # 检测溢出
@@ -577,9 +642,7 @@ class ImageService:
                 # 检查每行是否都在边界内
                 all_fit = True
                 for line in lines:
-                    line_bbox = ImageDraw.Draw(Image.new("RGB", (1, 1))).textbbox(
-                        (0, 0), line, font=font
-                    )
+                    line_bbox = self.text_measurer.textbbox(line, font)
                     if line_bbox[2] > region_width:
                         all_fit = False
                         break
@@ -616,27 +679,17 @@ class ImageService:
         best_lines = [text]
         found_fit = False
 
-        for font_size in range(max_font_size, min_font_size - 1, -1):
-            font = self._get_font(font_size)
-            lines = self._wrap_text_to_lines(text, adjusted_width, font)
-
-            line_height = font_size * line_height_mult
-            total_height = len(lines) * line_height
-
-            # 检查是否所有行都能放下
-            all_lines_fit = all(
-                ImageDraw.Draw(Image.new("RGB", (1, 1))).textbbox(
-                    (0, 0), line, font=font
-                )[2]
-                <= adjusted_width
-                for line in lines
-            )
-
-            if total_height <= adjusted_height and all_lines_fit:
-                best_font_size = font_size
-                best_lines = lines
-                found_fit = True
-                break
+        fit = self._fit_font_size(
+            text,
+            adjusted_width,
+            adjusted_height,
+            min_font_size,
+            max_font_size,
+            line_height_mult,
+        )
+        if fit is not None:
+            best_font_size, best_lines = fit
+            found_fit = True
 
         # 如果没找到合适的大小，使用最小字体并强制适应
         if not found_fit and is_bottom_region:
@@ -652,6 +705,69 @@ class ImageService:
 
         return best_font_size, best_lines
 
+    def _fit_font_size(
+        self,
+        text: str,
+        max_width: int,
+        max_height: int,
+        min_font_size: int,
+        max_font_size: int,
+        line_height_mult: float,
+    ) -> Optional[Tuple[int, List[str]]]:
+        """
+        在 [min_font_size, max_font_size] 中找最大的、换行后能放进区域的字号
+
+        大多数区域在最大字号下就能放下，先检查最大字号，放得下直接返回（只换行一次）。
+        否则利用换行后的总高度随字号单调变化（字号越小每行容纳的字越多、行高越小），
+        二分查找高度满足的最大字号；逐行宽度检查不单调（CJK 换行允许 10% 超出），
+        再从该字号往下逐个检查。结果与从大到小逐个尝试完全一致。
+        每个字号的换行结果只计算一次。
+        """
+        if max_font_size < min_font_size:
+            return None
+
+        wrapped: Dict[int, Tuple[object, List[str]]] = {}
+
+        def wrap(font_size: int) -> Tuple[object, List[str]]:
+            if font_size not in wrapped:
+                font = self._get_font(font_size)
+                wrapped[font_size] = (
+                    font,
+                    self._wrap_text_to_lines(text, max_width, font),
+                )
+            return wrapped[font_size]
+
+        def height_fits(font_size: int) -> bool:
+            lines = wrap(font_size)[1]
+            return len(lines) * (font_size * line_height_mult) <= max_height
+
+        def fits(font_size: int) -> bool:
+            font, lines = wrap(font_size)
+            return height_fits(font_size) and all(
+                self.text_measurer.textbbox(line, font)[2] <= max_width
+                for line in lines
+            )
+
+        if fits(max_font_size):
+            return max_font_size, wrapped[max_font_size][1]
+        if not height_fits(min_font_size):
+            return None
+
+        # 最大字号已确认放不下，在 [min, max - 1] 中查找
+        low, high = min_font_size, max_font_size - 1
+        while low < high:
+            mid = (low + high + 1) // 2
+            if height_fits(mid):
+                low = mid
+            else:
+                high = mid - 1
+
+        for font_size in range(low, min_font_size - 1, -1):
+            if fits(font_size):
+                return font_size, wrapped[font_size][1]
+
+        return None
+
     def _fix_translation_terms(self, text: str) -> str:
         """修复翻译中的术语错误"""
         # 修正常见错误翻译
@@ -753,6 +869,8 @@ class ImageService:
         """CJK 文本换行 - 优化版，减少不必要的换行"""
         lines = []
         current_line = ""
+        # 当前行的增量测量：每个字符只累加一次宽度
+        meter = self.text_measurer.line(font)
 
         # 标点符号（不允许在行首）
         no_start = set("，。！？）】》、；：,.!?:;)]}>")
@@ -763,10 +881,8 @@ class ImageService:
             test_line = current_line + char
 
             # 检查宽度
-            bbox = ImageDraw.Draw(Image.new("RGB", (1, 1))).textbbox(
-                (0, 0), test_line, font=font
-            )
-            line_width = bbox[2] - bbox[0]
+            test_meter = meter.extend(char)
+            line_width = test_meter.width
 
             # 超过宽度才换行，允许少量超出以减少断行
             overflow_threshold = max_width * 1.1  # 允许10%超出
@@ -784,8 +900,10 @@ class ImageService:
                 else:
                     lines.append(current_line)
                     current_line = char
+                meter = self.text_measurer.line(font, current_line)
             else:
                 current_line = test_line
+                meter = test_meter
 
         if current_line:
             lines.append(current_line)
@@ -800,19 +918,20 @@ class ImageService:
 
         lines = []
         current_line = words[0]
+        meter = self.text_measurer.line(font, current_line)
 
         for word in words[1:]:
             test_line = current_line + " " + word
-            bbox = ImageDraw.Draw(Image.new("RGB", (1, 1))).textbbox(
-                (0, 0), test_line, font=font
-            )
-            test_width = bbox[2] - bbox[0]
+            test_meter = meter.extend(" " + word)
+            test_width = test_meter.width
 
             if test_width <= max_width:
                 current_line = test_line
+                meter = test_meter
             else:
                 lines.append(current_line)
                 current_line = word
+                meter = self.text_measurer.line(font, current_line)
 
         if current_line:
             lines.append(current_line)
@@ -876,9 +995,7 @@ class ImageService:
         self, text: str, region_width: int, region_height: int, font
     ) -> Dict:
         """检测文本是否超出区域边界"""
-        bbox = ImageDraw.Draw(Image.new("RGB", (1, 1))).textbbox(
-            (0, 0), text, font=font
-        )
+        bbox = self.text_measurer.textbbox(text, font)
         text_width = bbox[2] - bbox[0]
         text_height = bbox[3] - bbox[1]
 
@@ -900,60 +1017,8 @@ class ImageService:
     def _get_font_with_fallback(
         self, size: int, language: str = "zh", is_bold: bool = False
     ):
-        """多语言字体 fallback 支持"""
-        import glob as glob_module
-
-        font_priority = {
-            "zh": ["NotoSansCJK", "NotoSansSC", "SimHei", "Microsoft YaHei", "SimSun"],
-            "ja": ["NotoSansCJK", "NotoSansJP", "MS Gothic", "Hiragino Sans"],
-            "ko": ["NotoSansCJK", "NotoSansKR", "Malgun Gothic"],
-            "en": ["Arial", "DejaVuSans", "NotoSans"],
-            "default": ["NotoSansCJK", "DejaVuSans", "Arial"],
-        }
-
-        font_names = font_priority.get(language, font_priority["default"])
-
-        for font_name in font_names:
-            patterns = [
-                os.path.join(self.font_dir, f"*{font_name}*.ttc"),
-                os.path.join(self.font_dir, f"*{font_name}*.otf"),
-                os.path.join(self.font_dir, f"*{font_name}*.ttf"),
-            ]
-            for pattern in patterns:
-                for font_path in glob_module.glob(pattern):
-                    try:
-                        return ImageFont.truetype(font_path, size)
-                    except Exception:
-                        continue
-
-        system_fonts = {
-            "zh": [
-                "C:\\Windows\\Fonts\\msyh.ttc",
-                "C:\\Windows\\Fonts\\simhei.ttf",
-                "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
-            ],
-            "ja": [
-                "C:\\Windows\\Fonts\\msgothic.ttc",
-                "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
-            ],
-            "ko": [
-                "C:\\Windows\\Fonts\\malgun.ttf",
-                "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
-            ],
-            "en": [
-                "C:\\Windows\\Fonts\\arial.ttf",
-                "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
-            ],
-        }
-
-        for font_path in system_fonts.get(language, system_fonts["en"]):
-            if os.path.exists(font_path):
-                try:
-                    return ImageFont.truetype(font_path, size)
-                except:
-                    continue
-
-        return self._get_font(size, is_bold)
+        """多语言字体 fallback 支持（由字体注册表按语言解析并缓存）"""
+        return self.font_registry.get_font(size, language)
 
     def _optimize_paragraph_layout(
         self, text: str, max_width: int, font, min_line_length: int = 10
@@ -977,9 +1042,7 @@ class ImageService:
                 if len(line) < min_line_length and i < len(lines) - 1:
                     next_line = lines[i + 1] if i + 1 < len(lines) else ""
                     merged = line + " " + next_line
-                    merged_bbox = ImageDraw.Draw(Image.new("RGB", (1, 1))).textbbox(
-                        (0, 0), merged, font=font
-                    )
+                    merged_bbox = self.text_measurer.textbbox(merged, font)
                     if merged_bbox[2] <= max_width:
                         lines[i + 1] = merged
                         continue
@@ -1026,44 +1089,5 @@ class ImageService:
         draw.text((x, y), text, font=font, fill=text_color)
 
     def _get_font(self, size: int, is_bold: bool = False):
-        """获取字体 - 优先从配置目录加载"""
-        import glob as glob_module
-
-        # 1. 优先从 font_dir 加载
-        font_patterns = [
-            os.path.join(self.font_dir, "*.ttc"),
-            os.path.join(self.font_dir, "*.otf"),
-            os.path.join(self.font_dir, "*.ttf"),
-        ]
-
-        for pattern in font_patterns:
-            for font_path in glob_module.glob(pattern):
-                try:
-                    return ImageFont.truetype(font_path, size)
-                except Exception:
-                    continue
-
-        # 2. 回退到系统路径（跨平台）
-        system_paths = []
-        if os.name == "nt":  # Windows
-            system_paths = [
-                "C:\\Windows\\Fonts\\msyh.ttc",  # 微软雅黑
-                "C:\\Windows\\Fonts\\simsun.ttc",  # 宋体
-                "C:\\Windows\\Fonts\\arial.ttf",
-            ]
-        else:  # Linux/Mac
-            system_paths = [
-                "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
-                "/usr/share/fonts/truetype/wqy/wqy-microhei.ttc",
-                "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
-            ]
-
-        for font_path in system_paths:
-            if os.path.exists(font_path):
-                try:
-                    return ImageFont.truetype(font_path, size)
-                except:
-                    continue
-
-        # 3. 最后回退
-        return ImageFont.load_default()
+        """获取字体 - 优先从配置目录加载，其次系统字体，最后默认字体"""
+        return self.font_registry.get_font(size)
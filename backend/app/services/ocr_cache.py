@@ -0,0 +1,180 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.utils.forksafe import abandon, after_fork_in_child
+
+# 条目格式版本号：存储格式或区域字段变化时递增，旧条目自然失效并被淘汰
+OCR_CACHE_VERSION = "1"
+
+
+class OCRCache:
+    """
+    OCR识别结果缓存
+
+    以 (图片内容哈希, 引擎配置) 为键保存识别出的区域列表。引擎配置包括引擎名称、
+    版本、语言模型和检测参数，任何一项变化都会得到不同的键。
+    同一张图片换目标语言、模板变化后重新渲染、流水线版本号递增时，
+    都可以跳过最耗时的识别阶段。
+
+    条目紧凑存储：区域编号和四边形坐标为 int32 数组，置信度为 float32 数组，
+    文字和语言为 JSON。总大小超过上限时淘汰最久未访问的条目。
+    """
+
+    def __init__(self, path: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.path = path or os.environ.get("OCR_CACHE_PATH", "cache/ocr_cache.db")
+        self.max_bytes = max_bytes or int(
+            float(os.environ.get("OCR_CACHE_MAX_MB", 64)) * 1024 * 1024
+        )
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = self._connect()
+        after_fork_in_child(self._reopen)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS regions (
+                key TEXT PRIMARY KEY,
+                boxes BLOB NOT NULL,
+                scores BLOB NOT NULL,
+                texts TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_regions_accessed ON regions (accessed_at)"
+        )
+        conn.commit()
+        return conn
+
+    def _reopen(self):
+        """fork 后在子进程中重新打开连接"""
+        abandon(self._conn)
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+
+    @staticmethod
+    def make_key(content_hash: str, engine_config: Dict) -> str:
+        config = json.dumps(engine_config, sort_keys=True, separators=(",", ":"))
+        raw = "|".join([content_hash, config, OCR_CACHE_VERSION])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, content_hash: str, engine_config: Dict) -> Optional[List[Dict]]:
+        """查询识别结果，未命中返回 None（每次返回新的区域列表，调用方可直接修改）"""
+        key = self.make_key(content_hash, engine_config)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT boxes, scores, texts FROM regions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE regions SET accessed_at = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+            self.hits += 1
+        return self._decode(*row)
+
+    def put(self, content_hash: str, engine_config: Dict, regions: List[Dict]):
+        """保存识别结果（没有识别到文字也保存，空结果同样可以跳过识别）"""
+        key = self.make_key(content_hash, engine_config)
+        boxes, scores, texts = self._encode(regions)
+        size = len(key) + len(boxes) + len(scores) + len(texts.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO regions "
+                "(key, boxes, scores, texts, size, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, boxes, scores, texts, size, time.time()),
+            )
+            self._conn.commit()
+            self._evict()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM regions"
+            ).fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": count,
+                "bytes": total,
+                "max_bytes": self.max_bytes,
+            }
+
+    @staticmethod
+    def _encode(regions: List[Dict]):
+        """区域列表 -> (编号和坐标 int32 数组, 置信度 float32 数组, 文字和语言 JSON)"""
+        boxes = np.array(
+            [[r["id"]] + [c for point in r["bbox"] for c in point] for r in regions],
+            dtype="<i4",
+        ).reshape(-1, 9)
+        scores = np.array([r["confidence"] for r in regions], dtype="<f4")
+        texts = json.dumps(
+            [[r["text"], r["language"]] for r in regions],
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+        return boxes.tobytes(), scores.tobytes(), texts
+
+    @staticmethod
+    def _decode(boxes: bytes, scores: bytes, texts: str) -> List[Dict]:
+        box_rows = np.frombuffer(boxes, dtype="<i4").reshape(-1, 9).tolist()
+        score_values = np.frombuffer(scores, dtype="<f4").tolist()
+        regions = []
+        for row, score, (text, language) in zip(
+            box_rows, score_values, json.loads(texts)
+        ):
+            regions.append(
+                {
+                    "id": row[0],
+                    "bbox": [row[i : i + 2] for i in range(1, 9, 2)],
+                    "text": text,
+                    "confidence": round(score, 4),
+                    "language": language,
+                    "translated_text": None,
+                }
+            )
+        return regions
+
+    def _evict(self):
+        """总大小超过上限时删除最久未访问的条目（调用方持有锁）"""
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM regions"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        rows = self._conn.execute(
+            "SELECT key, size FROM regions ORDER BY accessed_at"
+        ).fetchall()
+        removed = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            removed.append((key,))
+            total -= size
+
+        self._conn.executemany("DELETE FROM regions WHERE key = ?", removed)
+        self._conn.commit()
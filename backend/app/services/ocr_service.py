@@ -1,86 +1,357 @@
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple, Union
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from app.services.ocr_cache import OCRCache
+from app.services.ocr_tiling import TilePlanner
+from app.utils.engine_pool import EnginePool
+from app.utils.image_buffer import ImageBuffer
+from app.utils.log import SAMPLED, get_logger
+from app.utils.micro_batch import MicroBatcher
+
+logger = get_logger(__name__)
+
+
+def _default_pool_size(cpu_threads: int) -> int:
+    """按CPU核数和内存预算估算 PaddleOCR 实例数上限"""
+    by_cpu = (os.cpu_count() or 1) // cpu_threads
+    by_memory = int(
+        float(os.environ.get("OCR_POOL_MAX_MEMORY_MB", 2048))
+        // float(os.environ.get("OCR_ENGINE_MEMORY_MB", 400))
+    )
+    return max(1, min(by_cpu, by_memory))
 
 
 class OCRService:
     def __init__(self):
-        self.ocr = None
         self._initialized = False
         self._use_tesseract = False
+        # 保护引擎初始化
+        self._lock = threading.Lock()
+
+        # PaddleOCR 实例不支持并发调用：每个线程从实例池借出独立的实例，
+        # 实例按需创建、空闲时释放。每个实例的推理线程数为 OCR_CPU_THREADS
+        self.cpu_threads = max(1, int(os.environ.get("OCR_CPU_THREADS", 2)))
+        self.pool = EnginePool(
+            self._create_paddle_engine,
+            max_size=int(
+                os.environ.get("OCR_POOL_SIZE", 0)
+                or _default_pool_size(self.cpu_threads)
+            ),
+            idle_seconds=float(os.environ.get("OCR_POOL_IDLE_SECONDS", 300)),
+        )
+
+        # 语言模型和检测参数（同时作为识别结果缓存键的一部分）
+        self.paddle_lang = "ch"
+        self.tesseract_lang = "chi_sim+eng"
+        self.tesseract_min_confidence = 30
+        self.engine_config: Optional[Dict] = None
+        # 超大图片分块识别
+        self.tiler = TilePlanner()
+        # 缩小检测（仅 PaddleOCR）：检测在缩小的副本上运行，识别仍使用原图裁剪。
+        # OCR_DETECT_DOWNSCALE 为最大缩小倍数（1 表示关闭），缩小后长边不小于
+        # OCR_DETECT_MIN_SIDE（PaddleOCR 检测模型本身会把长边限制在 960 以内）
+        self.detect_downscale = int(os.environ.get("OCR_DETECT_DOWNSCALE", 1))
+        self.detect_min_side = int(os.environ.get("OCR_DETECT_MIN_SIDE", 960))
+
+        # 跨请求合批识别：同时运行的多个任务在时间窗口内裁剪出的文字行
+        # 合并为一批送入识别模型，识别模型对大批次的单行推理效率更高
+        self.rec_batch_size = int(os.environ.get("OCR_REC_BATCH_SIZE", 32))
+        self.batcher: Optional[MicroBatcher] = None
+        if os.environ.get("OCR_REC_BATCH_ENABLED", "true").lower() in (
+            "1",
+            "true",
+            "yes",
+        ):
+            self.batcher = MicroBatcher(
+                self._run_recognizer,
+                window_seconds=float(os.environ.get("OCR_REC_BATCH_WINDOW_MS", 15))
+                / 1000,
+                max_items=int(os.environ.get("OCR_REC_BATCH_MAX_CROPS", 128)),
+            )
+        # 正在执行 PaddleOCR 识别的调用数
+        self._in_flight = 0
+        self._flight_lock = threading.Lock()
+
+        # 识别结果缓存：同一张图片（相同引擎配置）不重复识别
+        self.cache: Optional[OCRCache] = None
+        if os.environ.get("OCR_CACHE_ENABLED", "true").lower() in ("1", "true", "yes"):
+            try:
+                self.cache = OCRCache()
+            except Exception as e:
+                logger.warning("OCR结果缓存初始化失败，已禁用: %s", e)
 
     def _init_ocr(self):
         """延迟初始化OCR（第一次使用时）"""
         if not self._initialized:
-            print("正在初始化OCR模型...")
+            logger.info("正在初始化OCR模型...")
 
             # 首先尝试 PaddleOCR
             try:
-                from paddleocr import PaddleOCR
+                import paddleocr
 
                 os.environ["PADDLE_PDX_DISABLE_MODEL_SOURCE_CHECK"] = "True"
-                print("尝试初始化 PaddleOCR...")
-                self.ocr = PaddleOCR(use_angle_cls=False, lang="ch")
+                logger.info("尝试初始化 PaddleOCR...")
+                self.pool.add(self._create_paddle_engine())
+                self.engine_config = {
+                    "engine": "paddleocr",
+                    "version": getattr(paddleocr, "__version__", None),
+                    "lang": self.paddle_lang,
+                    "use_angle_cls": False,
+                    "cls": False,
+                }
                 self._initialized = True
-                print("✅ PaddleOCR 初始化成功！")
+                logger.info(
+                    "PaddleOCR 初始化成功（实例池上限 %d，每个实例 %d 个推理线程）",
+                    self.pool.max_size,
+                    self.cpu_threads,
+                )
                 return
             except Exception as e:
-                print(f"⚠️ PaddleOCR 初始化失败: {str(e)}")
-                print("尝试使用 Tesseract 作为备选方案...")
+                logger.warning(
+                    "PaddleOCR 初始化失败: %s，尝试使用 Tesseract 作为备选方案", e
+                )
 
             # 如果 PaddleOCR 失败，使用 Tesseract
             try:
                 import pytesseract
 
                 # 检查 tesseract 是否可用
-                pytesseract.get_tesseract_version()
+                version = pytesseract.get_tesseract_version()
+                self.engine_config = {
+                    "engine": "tesseract",
+                    "version": str(version),
+                    "lang": self.tesseract_lang,
+                    "min_confidence": self.tesseract_min_confidence,
+                }
                 self._use_tesseract = True
                 self._initialized = True
-                print("✅ Tesseract OCR 初始化成功！")
+                logger.info("Tesseract OCR 初始化成功")
             except Exception as e:
-                print(f"❌ Tesseract 也失败了: {str(e)}")
+                logger.error("Tesseract 也失败了: %s", e)
                 raise Exception("无法初始化任何 OCR 引擎")
 
-    def recognize(self, image_path: str) -> List[Dict]:
-        """识别图片中的文字"""
-        if not os.path.exists(image_path):
-            raise FileNotFoundError(f"图片不存在: {image_path}")
+    def _create_paddle_engine(self):
+        """创建一个 PaddleOCR 实例（实例池按需调用）"""
+        from paddleocr import PaddleOCR
 
-        if not self._initialized:
-            self._init_ocr()
+        return PaddleOCR(
+            use_angle_cls=False,
+            lang=self.paddle_lang,
+            cpu_threads=self.cpu_threads,
+            rec_batch_num=self.rec_batch_size,
+        )
 
-        try:
-            print(f"开始OCR识别: {image_path}")
+    def warm_up(self) -> str:
+        """
+        初始化OCR引擎并用一张合成图片跑一次识别，返回使用的引擎名
+
+        首次识别会加载模型、分配推理缓冲区，放在启动阶段做，第一个用户请求不再等待。
+        """
+        engine = self.preload()
+        image = Image.new("RGB", (320, 64), "white")
+        ImageDraw.Draw(image).text((10, 24), "Warm up 0123", fill="black")
+        self.recognize(ImageBuffer.from_array(np.asarray(image), path="<warm-up>"))
+        return engine
+
+    def preload(self) -> str:
+        """只加载OCR模型、不执行推理，返回使用的引擎名
+
+        pre-fork 模式下由父进程在 fork 之前调用：模型权重由各 worker 写时复制共享，
+        推理（以及推理库内部的线程池）留给 worker 自己初始化。
+        """
+        with self._lock:
+            if not self._initialized:
+                self._init_ocr()
+        return "tesseract" if self._use_tesseract else "paddleocr"
+
+    def recognize(self, image: Union[str, ImageBuffer]) -> List[Dict]:
+        """识别图片中的文字（传入路径或已解码的 ImageBuffer）
+
+        ImageBuffer 带有内容哈希时先查识别结果缓存，命中则不执行识别。
+        识别出错时抛出异常，失败的结果不写入缓存。
+        """
+        if isinstance(image, str) and not os.path.exists(image):
+            raise FileNotFoundError(f"图片不存在: {image}")
+
+        with self._lock:
+            if not self._initialized:
+                self._init_ocr()
+
+        content_hash = image.content_hash if isinstance(image, ImageBuffer) else None
+        if self.cache is not None and content_hash:
+            try:
+                cached = self.cache.get(content_hash, self.cache_config(image.size))
+            except Exception as e:
+                logger.warning("读取OCR结果缓存失败: %s", e)
+                cached = None
+            if cached is not None:
+                logger.info("OCR结果缓存命中，共 %d 个文本区域", len(cached))
+                return cached
 
-            # 检查图片是否可读
-            from PIL import Image
+        # Tesseract 每次调用独立进程，可以并发；PaddleOCR 从实例池借出实例
+        regions = self._recognize(image)
 
-            img = Image.open(image_path)
-            print(f"图片信息: 格式={img.format}, 尺寸={img.size}, 模式={img.mode}")
-            img.close()
+        if self.cache is not None and content_hash:
+            try:
+                self.cache.put(content_hash, self.cache_config(image.size), regions)
+            except Exception as e:
+                logger.warning("保存OCR结果缓存失败: %s", e)
+        return regions
+
+    def cache_config(self, size: Tuple[int, int]) -> Dict:
+        """OCR和翻译结果缓存键使用的配置：引擎配置 + 实际生效的分块和缩小检测参数
+
+        分块参数只影响超过阈值的图片，小图的缓存键不包含分块参数，
+        调整分块配置不会让小图的缓存失效。
+        """
+        config = dict(self.engine_config or {})
+        if self.tiler.should_tile(size):
+            config.update(self.tiler.config())
+        if not self._use_tesseract and self.detect_downscale > 1:
+            config["detect_downscale"] = self.detect_downscale
+            config["detect_min_side"] = self.detect_min_side
+        return config
+
+    def _recognize(self, image: Union[str, ImageBuffer]) -> List[Dict]:
+        """执行识别；出错时抛出异常，由调用方把任务标记为失败"""
+        buffer = ImageBuffer.ensure(image)
+        logger.debug(
+            "开始OCR识别: %s（格式=%s, 尺寸=%s, 模式=%s）",
+            buffer.path,
+            buffer.format,
+            buffer.size,
+            buffer.mode,
+        )
+
+        if self.tiler.should_tile(buffer.size):
+            return self._recognize_tiled(buffer)
+        return self._recognize_buffer(buffer)
+
+    def _recognize_buffer(self, buffer: ImageBuffer) -> List[Dict]:
+        if self._use_tesseract:
+            return self._recognize_with_tesseract(buffer)
+        return self._recognize_with_paddleocr(buffer)
+
+    def _recognize_tiled(self, buffer: ImageBuffer) -> List[Dict]:
+        """
+        超大图片分块识别
+
+        整图送入检测模型时，小字会在缩放中丢失，中间张量也会占用数GB内存。
+        分块识别后映射回原图坐标，合并重叠区域中的重复结果。
+        """
+        tiles = self.tiler.plan(buffer.size)
+        workers = min(len(tiles), self.tiler.max_parallel(), os.cpu_count() or 1)
+        if not self._use_tesseract:
+            # PaddleOCR 每个并行分块占用实例池中的一个实例
+            workers = min(workers, self.pool.max_size)
+        logger.info(
+            "图片尺寸 %s 超过分块阈值，切成 %d 个分块识别（并行 %d）",
+            buffer.size,
+            len(tiles),
+            workers,
+        )
 
-            if self._use_tesseract:
-                return self._recognize_with_tesseract(image_path)
-            else:
-                return self._recognize_with_paddleocr(image_path)
+        def run(tile):
+            return tile, self._recognize_buffer(buffer.crop(*tile))
 
-        except Exception as e:
-            print(f"OCR识别出错: {str(e)}")
-            import traceback
+        if workers > 1:
+            with ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="ocr-tile"
+            ) as pool:
+                results = list(pool.map(run, tiles))
+        else:
+            results = [run(tile) for tile in tiles]
 
-            traceback.print_exc()
-            return []
+        return self.tiler.merge(results, buffer.size)
 
-    def _recognize_with_paddleocr(self, image_path: str) -> List[Dict]:
-        """使用 PaddleOCR 识别"""
-        result = self.ocr.ocr(image_path, cls=False)
-        print(f"PaddleOCR 原始结果: {result}")
+    def _recognize_with_paddleocr(self, buffer: ImageBuffer) -> List[Dict]:
+        """
+        使用 PaddleOCR 识别：检测文字框 -> 从原图裁剪文字行 -> 识别
 
-        if not result or not result[0]:
-            print("PaddleOCR 未检测到任何文本")
-            return []
+        与 PaddleOCR.ocr() 的流程相同（裁剪和排序使用 PaddleOCR 自带的实现），
+        拆开后检测可以在缩小的副本上运行，识别可以和其他请求的文字行合批。
+        """
+        from tools.infer.predict_system import sorted_boxes
+        from tools.infer.utility import get_rotate_crop_image
 
+        with self._flight_lock:
+            self._in_flight += 1
+        try:
+            # 大多数图片的文字相对图片很大，检测不需要全分辨率；
+            # 识别模型对小字更敏感，裁剪仍取自原图
+            factor = self.detect_factor(buffer.size)
+            detect_input = buffer.reduced(factor) if factor > 1 else buffer
+            with self.pool.engine() as ocr:
+                dt_boxes, _ = ocr.text_detector(detect_input.bgr)
+                drop_score = ocr.drop_score
+            if dt_boxes is None or len(dt_boxes) == 0:
+                logger.info("PaddleOCR 未检测到任何文本")
+                return []
+
+            scale = np.array(
+                [buffer.width / detect_input.width, buffer.height / detect_input.height],
+                dtype=np.float32,
+            )
+            limit = np.array([buffer.width - 1, buffer.height - 1], dtype=np.float32)
+            boxes = sorted_boxes(np.clip(dt_boxes * scale, 0, limit).astype(np.float32))
+            # 从 RGB 原图裁剪后再转为 BGR，缩小检测时不需要复制整张图的 BGR 视图
+            crops = [
+                np.ascontiguousarray(
+                    get_rotate_crop_image(buffer.rgb, box.copy())[..., ::-1]
+                )
+                for box in boxes
+            ]
+            rec_res = self._recognize_crops(crops)
+        finally:
+            with self._flight_lock:
+                self._in_flight -= 1
+
+        # 原始结果可能有几十KB，只在调试级别输出
+        logger.debug(
+            "PaddleOCR 检测（1/%d）: %d 个文字框，识别结果: %s",
+            factor,
+            len(boxes),
+            rec_res,
+        )
+        lines = [
+            [box.tolist(), (text, score)]
+            for box, (text, score) in zip(boxes, rec_res)
+            if score >= drop_score
+        ]
+        return self._parse_paddle_lines(lines)
+
+    def detect_factor(self, size) -> int:
+        """缩小检测使用的倍数（2 的幂，1 表示使用原图检测）"""
+        factor = 1
+        while (
+            factor * 2 <= self.detect_downscale
+            and max(size) // (factor * 2) >= self.detect_min_side
+        ):
+            factor *= 2
+        return factor
+
+    def _recognize_crops(self, crops: List[np.ndarray]) -> List:
+        """识别文字行裁剪图，返回 [(文字, 置信度), ...]"""
+        if self.batcher is None:
+            return self._run_recognizer(crops)
+        # 只有当前一个识别在进行时，不会有其他请求加入批次，不必等待时间窗口
+        return self.batcher.submit(crops, wait=self._in_flight > 1)
+
+    def _run_recognizer(self, crops: List[np.ndarray]) -> List:
+        """借出一个实例执行识别模型（PaddleOCR 内部按 rec_batch_num 分批推理）"""
+        with self.pool.engine() as ocr:
+            rec_res, _ = ocr.text_recognizer(crops)
+        return rec_res
+
+    def _parse_paddle_lines(self, lines) -> List[Dict]:
+        """PaddleOCR 结果行 [[四边形坐标, (文字, 置信度)], ...] -> 区域列表"""
         text_regions = []
-        for idx, line in enumerate(result[0]):
+        for idx, line in enumerate(lines):
             try:
                 if len(line) >= 2:
                     bbox = line[0]
@@ -101,33 +372,26 @@ class OCRService:
                             "translated_text": None,
                         }
                     )
-                    print(f"检测到文本: {text} (置信度: {confidence:.2f})")
+                    logger.debug(
+                        "检测到文本: %s (置信度: %.2f)", text, confidence, extra=SAMPLED
+                    )
             except Exception as e:
-                print(f"解析结果出错: {str(e)}")
+                logger.warning("解析结果出错: %s", e)
                 continue
 
-        print(f"共检测到 {len(text_regions)} 个文本区域")
+        logger.info("共检测到 %d 个文本区域", len(text_regions))
         return text_regions
 
-    def _recognize_with_tesseract(self, image_path: str) -> List[Dict]:
+    def _recognize_with_tesseract(self, buffer: ImageBuffer) -> List[Dict]:
         """使用 Tesseract 识别"""
         import pytesseract
-        from PIL import Image
-        import cv2
-        import numpy as np
-
-        # 读取图片
-        img = cv2.imread(image_path)
-        if img is None:
-            print(f"无法读取图片: {image_path}")
-            return []
 
-        # 转换为灰度图
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        # 灰度图
+        gray = buffer.gray
 
         # 使用 Tesseract 进行 OCR，获取详细信息
         data = pytesseract.image_to_data(
-            gray, lang="chi_sim+eng", output_type=pytesseract.Output.DICT
+            gray, lang=self.tesseract_lang, output_type=pytesseract.Output.DICT
         )
 
         text_regions = []
@@ -138,7 +402,7 @@ class OCRService:
             conf = int(data["conf"][i])
 
             # 过滤低置信度和空文本
-            if conf > 30 and text:
+            if conf > self.tesseract_min_confidence and text:
                 x = data["left"][i]
                 y = data["top"][i]
                 w = data["width"][i]
@@ -159,9 +423,11 @@ class OCRService:
                     }
                 )
                 idx += 1
-                print(f"检测到文本: {text} (置信度: {conf / 100:.2f})")
+                logger.debug(
+                    "检测到文本: %s (置信度: %.2f)", text, conf / 100, extra=SAMPLED
+                )
 
-        print(f"共检测到 {len(text_regions)} 个文本区域")
+        logger.info("共检测到 %d 个文本区域", len(text_regions))
         return text_regions
 
     def _detect_language(self, text: str) -> str:
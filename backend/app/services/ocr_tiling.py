@@ -0,0 +1,147 @@
+import os
+from typing import Dict, List, Optional, Tuple
+
+# 识别一个分块时每个像素大约占用的工作内存（字节）：检测模型的特征图、
+# 概率图和中间缓冲区按 float32 计算，约为原图 RGB 数据的 20 倍
+TILE_BYTES_PER_PIXEL = 60
+
+
+class TilePlanner:
+    """
+    超大图片分块识别的参数和几何计算
+
+    长边超过阈值的图片切成有重叠的分块，分别检测和识别，再把坐标映射回原图。
+    跨越分块边界的文字行在重叠区域会被识别两次（一次完整、一次被截断），
+    合并时按 IoU / 包含关系去重，优先保留没有被分块边缘截断的区域。
+    """
+
+    def __init__(
+        self,
+        threshold: Optional[int] = None,
+        tile_size: Optional[int] = None,
+        overlap: Optional[int] = None,
+        max_memory_mb: Optional[float] = None,
+        iou_threshold: Optional[float] = None,
+    ):
+        self.enabled = os.environ.get("OCR_TILE_ENABLED", "true").lower() in (
+            "1",
+            "true",
+            "yes",
+        )
+        self.threshold = threshold or int(os.environ.get("OCR_TILE_THRESHOLD", 4000))
+        self.tile_size = tile_size or int(os.environ.get("OCR_TILE_SIZE", 2048))
+        self.overlap = overlap or int(os.environ.get("OCR_TILE_OVERLAP", 256))
+        self.max_memory_mb = max_memory_mb or float(
+            os.environ.get("OCR_TILE_MAX_MEMORY_MB", 1024)
+        )
+        self.iou_threshold = iou_threshold or float(
+            os.environ.get("OCR_TILE_IOU", 0.5)
+        )
+        # 重叠部分不能超过半个分块，否则步长过小
+        self.overlap = min(self.overlap, self.tile_size // 2)
+
+    def config(self) -> Dict:
+        """影响分块识别结果的参数（分块识别的图片把它作为OCR结果缓存键的一部分）"""
+        return {
+            "tiling": True,
+            "tile_threshold": self.threshold,
+            "tile_size": self.tile_size,
+            "tile_overlap": self.overlap,
+            "tile_iou": self.iou_threshold,
+        }
+
+    def should_tile(self, size: Tuple[int, int]) -> bool:
+        return self.enabled and max(size) > self.threshold
+
+    def max_parallel(self) -> int:
+        """在内存上限内可以同时识别的分块数（至少 1 个）"""
+        per_tile = self.tile_size * self.tile_size * TILE_BYTES_PER_PIXEL
+        return max(1, int(self.max_memory_mb * 1024 * 1024 // per_tile))
+
+    def plan(self, size: Tuple[int, int]) -> List[Tuple[int, int, int, int]]:
+        """返回覆盖整张图片的分块列表 [(x, y, 宽, 高)]"""
+        width, height = size
+        return [
+            (x, y, min(self.tile_size, width - x), min(self.tile_size, height - y))
+            for y in self._starts(height)
+            for x in self._starts(width)
+        ]
+
+    def _starts(self, length: int) -> List[int]:
+        if length <= self.tile_size:
+            return [0]
+        step = self.tile_size - self.overlap
+        starts = list(range(0, length - self.tile_size, step))
+        # 最后一块贴齐图片边缘
+        starts.append(length - self.tile_size)
+        return starts
+
+    def merge(
+        self,
+        tiles: List[Tuple[Tuple[int, int, int, int], List[Dict]]],
+        size: Tuple[int, int],
+    ) -> List[Dict]:
+        """
+        把各分块的识别结果映射回原图坐标并去重
+
+        候选区域按 (未被截断, 面积, 置信度) 排序，依次保留；与已保留区域的
+        IoU 超过阈值，或者大部分面积被已保留区域包含时丢弃。
+        结果按阅读顺序（从上到下、从左到右）重新编号。
+        """
+        candidates = []
+        for tile_index, ((x, y, w, h), regions) in enumerate(tiles):
+            for region in regions:
+                bbox = [[px + x, py + y] for px, py in region["bbox"]]
+                rect = _bounds(bbox)
+                truncated = self._touches_inner_edge(rect, (x, y, w, h), size)
+                area = (rect[2] - rect[0]) * (rect[3] - rect[1])
+                priority = (not truncated, area, region["confidence"])
+                candidates.append((priority, tile_index, rect, dict(region, bbox=bbox)))
+        candidates.sort(key=lambda c: c[0], reverse=True)
+
+        # 同一分块内的区域由引擎给出，不互相去重；只去掉其他分块中的重复识别
+        kept: List[Tuple[int, Tuple[int, int, int, int], Dict]] = []
+        for _, tile_index, rect, region in candidates:
+            if any(
+                other_tile != tile_index and self._duplicate(rect, other)
+                for other_tile, other, _ in kept
+            ):
+                continue
+            kept.append((tile_index, rect, region))
+
+        kept.sort(key=lambda item: (item[1][1], item[1][0]))
+        merged = []
+        for idx, (_, _, region) in enumerate(kept):
+            region["id"] = idx + 1
+            merged.append(region)
+        return merged
+
+    def _touches_inner_edge(self, rect, tile, size, margin: int = 2) -> bool:
+        """区域是否贴着分块的内侧边缘（不是原图边缘），即可能被截断"""
+        x0, y0, x1, y1 = rect
+        tx, ty, tw, th = tile
+        width, height = size
+        return (
+            (tx > 0 and x0 <= tx + margin)
+            or (ty > 0 and y0 <= ty + margin)
+            or (tx + tw < width and x1 >= tx + tw - margin)
+            or (ty + th < height and y1 >= ty + th - margin)
+        )
+
+    def _duplicate(self, a, b, containment: float = 0.8) -> bool:
+        ix = min(a[2], b[2]) - max(a[0], b[0])
+        iy = min(a[3], b[3]) - max(a[1], b[1])
+        if ix <= 0 or iy <= 0:
+            return False
+        inter = ix * iy
+        area_a = (a[2] - a[0]) * (a[3] - a[1])
+        area_b = (b[2] - b[0]) * (b[3] - b[1])
+        if inter / (area_a + area_b - inter) >= self.iou_threshold:
+            return True
+        return inter / max(1, min(area_a, area_b)) >= containment
+
+
+def _bounds(bbox: List[List[int]]) -> Tuple[int, int, int, int]:
+    xs = [p[0] for p in bbox]
+    ys = [p[1] for p in bbox]
+    return min(xs), min(ys), max(xs), max(ys)
@@ -0,0 +1,215 @@
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from app.utils.forksafe import abandon, after_fork_in_child
+
+# 流水线版本号：OCR、翻译、样式或重绘逻辑变化导致输出不同时需要递增，
+# 旧版本的缓存结果会自然失效并被淘汰
+# 2: 粗体检测顺序调整、超大图片分块识别、缩小检测 + 原图裁剪识别
+PIPELINE_VERSION = "2"
+
+
+class ResultCache:
+    """
+    翻译结果缓存（按内容寻址）
+
+    以 (图片内容哈希, 源语言, 目标语言, 流水线配置, 流水线版本) 为键，保存最终输出图片
+    和文字区域JSON。流水线配置包括OCR引擎配置和翻译模型，任何一项变化都会得到不同的键。相同图片再次上传时直接复用结果，跳过整个流水线。
+    文件按键名分目录存放，SQLite 索引记录大小和访问时间，总大小超过上限时
+    淘汰最久未访问的条目。
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.directory = directory or os.environ.get(
+            "RESULT_CACHE_DIR", "cache/results"
+        )
+        self.max_bytes = max_bytes or int(
+            float(os.environ.get("RESULT_CACHE_MAX_MB", 1024)) * 1024 * 1024
+        )
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._conn = self._connect()
+        after_fork_in_child(self._reopen)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            os.path.join(self.directory, "index.db"),
+            check_same_thread=False,
+            timeout=30,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_results_accessed ON results (accessed_at)"
+        )
+        conn.commit()
+        return conn
+
+    def _reopen(self):
+        """fork 后在子进程中重新打开索引连接"""
+        abandon(self._conn)
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+
+    @staticmethod
+    def make_key(
+        content_hash: str,
+        source_language: Optional[str],
+        target_language: str,
+        config: Dict,
+    ) -> str:
+        config_json = json.dumps(config, sort_keys=True, separators=(",", ":"))
+        raw = "|".join(
+            [
+                content_hash,
+                source_language or "auto",
+                target_language,
+                config_json,
+                PIPELINE_VERSION,
+            ]
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _paths(self, key: str):
+        base = os.path.join(self.directory, key[:2], key)
+        return base + ".png", base + ".json"
+
+    def get(
+        self,
+        content_hash: str,
+        source_language: Optional[str],
+        target_language: str,
+        config: Dict,
+    ) -> Optional[Dict]:
+        """
+        查询缓存结果
+
+        Returns:
+            {"image_path": 缓存图片路径, "text_regions": 区域列表,
+             "styled_regions": 识别区域和样式（可能为 None）}，未命中返回 None
+        """
+        key = self.make_key(content_hash, source_language, target_language, config)
+        image_path, meta_path = self._paths(key)
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or not os.path.exists(image_path):
+                self.misses += 1
+                return None
+            try:
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE results SET accessed_at = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+            self.hits += 1
+
+        return {
+            "image_path": image_path,
+            "text_regions": meta.get("text_regions"),
+            "styled_regions": meta.get("styled_regions"),
+        }
+
+    def put(
+        self,
+        content_hash: str,
+        source_language: Optional[str],
+        target_language: str,
+        config: Dict,
+        output_path: str,
+        text_regions: Optional[List[Dict]],
+        styled_regions: Optional[List[Dict]] = None,
+    ):
+        """保存翻译结果（复制输出图片，写入区域JSON）
+
+        styled_regions 是翻译前的识别区域和样式，命中缓存的任务也能据此重新翻译成其他语言。
+        """
+        key = self.make_key(content_hash, source_language, target_language, config)
+        image_path, meta_path = self._paths(key)
+        os.makedirs(os.path.dirname(image_path), exist_ok=True)
+
+        # 先写临时文件再原子替换，避免并发读到不完整的文件
+        suffix = f".{uuid.uuid4().hex}.tmp"
+        shutil.copyfile(output_path, image_path + suffix)
+        with open(meta_path + suffix, "w", encoding="utf-8") as f:
+            json.dump(
+                {"text_regions": text_regions, "styled_regions": styled_regions},
+                f,
+                ensure_ascii=False,
+                separators=(",", ":"),
+            )
+        os.replace(meta_path + suffix, meta_path)
+        os.replace(image_path + suffix, image_path)
+
+        size = os.path.getsize(image_path) + os.path.getsize(meta_path)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, size, accessed_at) VALUES (?, ?, ?)",
+                (key, size, time.time()),
+            )
+            self._conn.commit()
+            self._evict()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results"
+            ).fetchone()
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": count,
+                "bytes": total,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _evict(self):
+        """总大小超过上限时删除最久未访问的条目（调用方持有锁）"""
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM results"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        rows = self._conn.execute(
+            "SELECT key, size FROM results ORDER BY accessed_at"
+        ).fetchall()
+        removed = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            removed.append((key,))
+            total -= size
+
+        self._conn.executemany("DELETE FROM results WHERE key = ?", removed)
+        self._conn.commit()
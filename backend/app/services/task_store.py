@@ -0,0 +1,247 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from app.utils.forksafe import abandon, after_fork_in_child
+from app.utils.log import get_logger
+
+logger = get_logger(__name__)
+
+
+class TaskStore(ABC):
+    """
+    任务状态存储接口
+
+    任务以字典形式保存，所有实现都支持 TTL 过期（按最后更新时间计算）。
+    """
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+
+    @abstractmethod
+    def create(self, task: Dict):
+        """新建任务，task 必须包含 task_id 和 status"""
+
+    @abstractmethod
+    def get(self, task_id: str) -> Optional[Dict]:
+        """获取任务，不存在或已过期返回 None"""
+
+    @abstractmethod
+    def update(self, task_id: str, **fields) -> Optional[Dict]:
+        """更新任务字段，返回更新后的任务；任务不存在返回 None"""
+
+    @abstractmethod
+    def delete(self, task_id: str):
+        """删除任务"""
+
+
+class MemoryTaskStore(TaskStore):
+    """进程内 LRU 任务存储，适合单进程部署和开发环境"""
+
+    def __init__(self, ttl_seconds: int, max_tasks: int = 10000):
+        super().__init__(ttl_seconds)
+        self.max_tasks = max_tasks
+        self._tasks: "OrderedDict[str, Dict]" = OrderedDict()
+        self._updated_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def create(self, task: Dict):
+        now = time.time()
+        task = dict(task)
+        task.setdefault("created_at", now)
+        with self._lock:
+            self._remove(task["task_id"])
+            self._tasks[task["task_id"]] = task
+            self._updated_at[task["task_id"]] = now
+            while len(self._tasks) > self.max_tasks:
+                oldest = next(iter(self._tasks))
+                self._remove(oldest)
+
+    def get(self, task_id: str) -> Optional[Dict]:
+        with self._lock:
+            task = self._get_live(task_id)
+            return dict(task) if task is not None else None
+
+    def update(self, task_id: str, **fields) -> Optional[Dict]:
+        with self._lock:
+            task = self._get_live(task_id)
+            if task is None:
+                return None
+            task.update(fields)
+            self._updated_at[task_id] = time.time()
+            self._tasks.move_to_end(task_id)
+            return dict(task)
+
+    def delete(self, task_id: str):
+        with self._lock:
+            self._remove(task_id)
+
+    def _expired(self, task_id: str) -> bool:
+        return time.time() - self._updated_at.get(task_id, 0) > self.ttl_seconds
+
+    def _get_live(self, task_id: str) -> Optional[Dict]:
+        """获取未过期任务（调用方持有锁）"""
+        task = self._tasks.get(task_id)
+        if task is None:
+            return None
+        if self._expired(task_id):
+            self._remove(task_id)
+            return None
+        return task
+
+    def _remove(self, task_id: str):
+        """删除任务（调用方持有锁）"""
+        self._tasks.pop(task_id, None)
+        self._updated_at.pop(task_id, None)
+
+
+class SQLiteTaskStore(TaskStore):
+    """
+    SQLite 任务存储（WAL 模式）
+
+    多个 uvicorn worker 共享同一个数据库文件，重启后任务状态仍然可查。
+    任务数据以紧凑 JSON + zlib 压缩保存，过期时间单独建列并建立索引。
+    """
+
+    # 每执行多少次写入顺带清理一次过期任务
+    PURGE_EVERY = 200
+
+    def __init__(self, path: str, ttl_seconds: int):
+        super().__init__(ttl_seconds)
+        self.path = path
+        self._lock = threading.Lock()
+        self._writes = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = self._connect()
+        after_fork_in_child(self._reopen)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path, check_same_thread=False, isolation_level=None, timeout=30
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS tasks (
+                task_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                data BLOB NOT NULL
+            )
+            """
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_tasks_expires ON tasks (expires_at)"
+        )
+        return conn
+
+    def _reopen(self):
+        """fork 后在子进程中重新打开连接（SQLite 连接不能跨进程使用）"""
+        abandon(self._conn)
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+
+    @staticmethod
+    def _dumps(task: Dict) -> bytes:
+        raw = json.dumps(task, ensure_ascii=False, separators=(",", ":"))
+        return zlib.compress(raw.encode("utf-8"), 6)
+
+    @staticmethod
+    def _loads(data: bytes) -> Dict:
+        return json.loads(zlib.decompress(data).decode("utf-8"))
+
+    def create(self, task: Dict):
+        now = time.time()
+        task = dict(task)
+        task.setdefault("created_at", now)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tasks "
+                "(task_id, status, created_at, expires_at, data) VALUES (?, ?, ?, ?, ?)",
+                (
+                    task["task_id"],
+                    task["status"],
+                    task["created_at"],
+                    now + self.ttl_seconds,
+                    self._dumps(task),
+                ),
+            )
+            self._after_write(now)
+
+    def get(self, task_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM tasks WHERE task_id = ? AND expires_at > ?",
+                (task_id, time.time()),
+            ).fetchone()
+        return self._loads(row[0]) if row else None
+
+    def update(self, task_id: str, **fields) -> Optional[Dict]:
+        now = time.time()
+        with self._lock:
+            # 读-改-写放在同一个写事务中，避免多个 worker 相互覆盖
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT data FROM tasks WHERE task_id = ? AND expires_at > ?",
+                    (task_id, now),
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                task = self._loads(row[0])
+                task.update(fields)
+                self._conn.execute(
+                    "UPDATE tasks SET status = ?, expires_at = ?, data = ? "
+                    "WHERE task_id = ?",
+                    (task["status"], now + self.ttl_seconds, self._dumps(task), task_id),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._after_write(now)
+        return task
+
+    def delete(self, task_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM tasks WHERE task_id = ?", (task_id,))
+
+    def _purge(self, now: float) -> int:
+        cursor = self._conn.execute("DELETE FROM tasks WHERE expires_at <= ?", (now,))
+        return cursor.rowcount
+
+    def _after_write(self, now: float):
+        """写入计数，定期清理过期任务（调用方持有锁）"""
+        self._writes += 1
+        if self._writes >= self.PURGE_EVERY:
+            self._writes = 0
+            self._purge(now)
+
+
+def create_task_store() -> TaskStore:
+    """根据环境变量创建任务存储"""
+    backend = os.environ.get("TASK_STORE", "sqlite").lower()
+    ttl_seconds = int(os.environ.get("TASK_TTL", 24 * 3600))
+
+    if backend == "memory":
+        max_tasks = int(os.environ.get("TASK_STORE_MAX_TASKS", 10000))
+        return MemoryTaskStore(ttl_seconds, max_tasks)
+
+    path = os.environ.get("TASK_STORE_PATH", "cache/tasks.db")
+    try:
+        return SQLiteTaskStore(path, ttl_seconds)
+    except Exception as e:
+        logger.warning("SQLite任务存储初始化失败，改用内存存储: %s", e)
+        return MemoryTaskStore(ttl_seconds)
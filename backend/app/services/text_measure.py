@@ -0,0 +1,230 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+
+def _pixel(value: int) -> int:
+    """26.6 定点数四舍五入到整数像素（与 FreeType / Pillow 的 PIXEL 宏一致）"""
+    return (value + 32) >> 6
+
+
+class _FontMetrics:
+    """单个 (字体文件, 字号) 的字形度量缓存"""
+
+    __slots__ = ("glyphs", "kerning")
+
+    def __init__(self):
+        # 字符 -> (advance(26.6), x_min, x_max, ink_known, top, bottom)
+        self.glyphs: Dict[str, Tuple[int, int, int, bool, int, int]] = {}
+        # (前一字符, 当前字符) -> 字距调整(26.6)
+        self.kerning: Dict[Tuple[str, str], int] = {}
+
+
+class TextMeasurer:
+    """
+    文字测量服务
+
+    按 (字体, 字号) 缓存每个字符的步进宽度和字形边界，测量一行文字只需
+    一次线性累加，结果与 Pillow 基础排版 (Layout.BASIC) 下
+    ImageDraw.textbbox((0, 0), text, font) 完全一致。
+
+    以下情况无法由单字符度量精确推出，直接回退到 textbbox：
+    - RAQM 排版（连字、复杂文字整形）或非 FreeType 字体
+    - 含换行符的多行文本
+    - 字距调整导致的亚像素位置使某个字形的右边界无法确定
+    """
+
+    def __init__(self, cache_size: Optional[int] = None):
+        self.cache_size = cache_size or int(
+            os.environ.get("TEXT_MEASURE_CACHE_SIZE", 128)
+        )
+        self._metrics: "OrderedDict[Tuple, _FontMetrics]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def line(self, font, text: str = "") -> "LineMeter":
+        """创建一行文字的增量测量器"""
+        meter = LineMeter(self, font, self._font_metrics(font))
+        return meter.extend(text) if text else meter
+
+    def textbbox(self, text: str, font) -> Tuple[int, int, int, int]:
+        """等价于 ImageDraw.textbbox((0, 0), text, font=font)"""
+        return self.line(font, text).bbox()
+
+    def textwidth(self, text: str, font) -> int:
+        bbox = self.textbbox(text, font)
+        return bbox[2] - bbox[0]
+
+    def exact_textbbox(self, text: str, font) -> Tuple[int, int, int, int]:
+        """直接调用 Pillow 测量（回退路径）"""
+        draw = getattr(self._local, "draw", None)
+        if draw is None:
+            draw = ImageDraw.Draw(Image.new("RGB", (1, 1)))
+            self._local.draw = draw
+        return draw.textbbox((0, 0), text, font=font)
+
+    def _font_metrics(self, font) -> Optional[_FontMetrics]:
+        """获取字体的度量缓存，不支持逐字符测量的字体返回 None"""
+        if not isinstance(font, ImageFont.FreeTypeFont):
+            return None
+        if font.layout_engine != ImageFont.Layout.BASIC:
+            return None
+        path = getattr(font, "path", None)
+        if not isinstance(path, str):
+            return None
+
+        key = (path, font.index, font.size, font.encoding)
+        with self._lock:
+            metrics = self._metrics.get(key)
+            if metrics is None:
+                metrics = _FontMetrics()
+                self._metrics[key] = metrics
+                while len(self._metrics) > self.cache_size:
+                    self._metrics.popitem(last=False)
+            else:
+                self._metrics.move_to_end(key)
+        return metrics
+
+
+class LineMeter:
+    """
+    一行文字的增量测量器（不可变）
+
+    extend() 返回追加文字后的新测量器，原对象不变，
+    便于换行算法先试探下一个字符/单词，再决定是否采用。
+    """
+
+    __slots__ = (
+        "_measurer",
+        "_font",
+        "_metrics",
+        "text",
+        "_position",
+        "_x_min",
+        "_x_max",
+        "_top",
+        "_bottom",
+        "_pending",
+        "_exact",
+    )
+
+    def __init__(self, measurer: TextMeasurer, font, metrics: Optional[_FontMetrics]):
+        self._measurer = measurer
+        self._font = font
+        self._metrics = metrics
+        self.text = ""
+        self._position = 0  # 笔位置（26.6，尚未计入与下一个字符的字距）
+        self._x_min = 0
+        self._x_max = 0  # 不含最后一个字形步进位置的右边界
+        self._top = None
+        self._bottom = None
+        # 最后一个字形墨迹右边界的上界（仅当墨迹位于步进宽度之内、无法精确得知时）
+        self._pending = None
+        self._exact = metrics is not None
+
+    def extend(self, text: str) -> "LineMeter":
+        meter = self._copy()
+        meter.text = self.text + text
+        if not meter._exact:
+            return meter
+        if "\n" in text:
+            meter._exact = False
+            return meter
+
+        metrics = self._metrics
+        glyphs = metrics.glyphs
+        position = meter._position
+        x_min, x_max = meter._x_min, meter._x_max
+        top, bottom = meter._top, meter._bottom
+        pending = meter._pending
+        previous = self.text[-1] if self.text else None
+
+        for char in text:
+            glyph = glyphs.get(char)
+            if glyph is None:
+                glyph = self._load_glyph(char)
+
+            if previous is not None:
+                # 前一个字形的步进（含字距调整）在这里才确定
+                position += self._kerning(previous, char)
+                advanced = _pixel(position)
+                if advanced > x_max:
+                    x_max = advanced
+                if pending is not None and pending > x_max:
+                    meter._exact = False
+                    return meter
+            previous = char
+
+            advance, g_min, g_max, ink_known, g_top, g_bottom = glyph
+            px = _pixel(position)
+            if px + g_min < x_min:
+                x_min = px + g_min
+            if ink_known:
+                if px + g_max > x_max:
+                    x_max = px + g_max
+                pending = None
+            else:
+                # 墨迹在步进宽度之内：只有被步进位置覆盖时结果才确定
+                pending = px + g_max
+            if top is None or g_top < top:
+                top = g_top
+            if bottom is None or g_bottom > bottom:
+                bottom = g_bottom
+            position += advance
+
+        meter._position = position
+        meter._x_min, meter._x_max = x_min, x_max
+        meter._top, meter._bottom = top, bottom
+        meter._pending = pending
+        return meter
+
+    def bbox(self) -> Tuple[int, int, int, int]:
+        """当前文字的 textbbox((0, 0))"""
+        if not self.text or not self._exact:
+            return self._measurer.exact_textbbox(self.text, self._font)
+
+        x_max = max(self._x_max, _pixel(self._position))
+        if self._pending is not None and self._pending > x_max:
+            return self._measurer.exact_textbbox(self.text, self._font)
+        return (self._x_min, self._top, x_max, self._bottom)
+
+    @property
+    def width(self) -> int:
+        bbox = self.bbox()
+        return bbox[2] - bbox[0]
+
+    @property
+    def right(self) -> int:
+        return self.bbox()[2]
+
+    def _copy(self) -> "LineMeter":
+        meter = LineMeter.__new__(LineMeter)
+        for name in LineMeter.__slots__:
+            setattr(meter, name, getattr(self, name))
+        return meter
+
+    def _load_glyph(self, char: str) -> Tuple[int, int, int, bool, int, int]:
+        font = self._font
+        advance = round(font.getlength(char) * 64)
+        x0, y0, x1, y1 = font.getbbox(char)
+        # getbbox 的右边界取墨迹和步进位置中的较大者；相等时墨迹右边界只知道上界
+        glyph = (advance, x0, x1, x1 > _pixel(advance), y0, y1)
+        self._metrics.glyphs[char] = glyph
+        return glyph
+
+    def _kerning(self, previous: str, char: str) -> int:
+        kerning = self._metrics.kerning
+        pair = (previous, char)
+        value = kerning.get(pair)
+        if value is None:
+            glyphs = self._metrics.glyphs
+            value = (
+                round(self._font.getlength(previous + char) * 64)
+                - glyphs[previous][0]
+                - glyphs[char][0]
+            )
+            kerning[pair] = value
+        return value
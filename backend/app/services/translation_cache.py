@@ -0,0 +1,277 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from app.utils.forksafe import abandon, after_fork_in_child
+
+
+class TranslationCache:
+    """
+    翻译记忆缓存
+
+    两级结构：
+    - 进程内 LRU 热缓存，命中时不访问磁盘
+    - SQLite 持久化存储，重启后仍然有效，多个进程可共享
+
+    键为 (规范化原文, 源语言, 目标语言, 模型)，条目超过 TTL 后失效，
+    超过最大条数时按最近访问时间淘汰。
+    """
+
+    # 命中时最多每隔多久回写一次访问时间，避免每次命中都写磁盘
+    TOUCH_INTERVAL = 3600
+    # stats() 中的条目数最多缓存多久：COUNT(*) 需要扫描整张表，不在每次抓取 /metrics 时执行
+    # （多个进程共享数据库，无法在本进程内增量计数）
+    ENTRIES_REFRESH_INTERVAL = 30
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[int] = None,
+        hot_size: Optional[int] = None,
+    ):
+        self.path = path or os.environ.get(
+            "TRANSLATION_CACHE_PATH", "cache/translation_memory.db"
+        )
+        self.max_entries = max_entries or int(
+            os.environ.get("TRANSLATION_CACHE_MAX_ENTRIES", 200000)
+        )
+        self.ttl_seconds = ttl_seconds or int(
+            os.environ.get("TRANSLATION_CACHE_TTL", 30 * 24 * 3600)
+        )
+        self.hot_size = hot_size or int(
+            os.environ.get("TRANSLATION_CACHE_HOT_SIZE", 5000)
+        )
+
+        self._hot: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes_since_evict = 0
+        self._entries: Optional[int] = None
+        self._entries_at = 0.0
+
+        self.hits = 0
+        self.hot_hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = self._connect()
+        after_fork_in_child(self._reopen)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS translations (
+                key TEXT PRIMARY KEY,
+                translation TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_translations_accessed "
+            "ON translations (accessed_at)"
+        )
+        conn.commit()
+        return conn
+
+    def _reopen(self):
+        """fork 后在子进程中重新打开连接（热缓存随进程内存复制，无需处理）"""
+        abandon(self._conn)
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """规范化原文：统一Unicode形式并合并空白"""
+        text = unicodedata.normalize("NFC", text)
+        return re.sub(r"\s+", " ", text).strip()
+
+    def make_key(
+        self, text: str, source_language: Optional[str], target_language: str, model: str
+    ) -> str:
+        raw = "\x1f".join(
+            [self.normalize(text), source_language or "auto", target_language, model]
+        )
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def get(
+        self, text: str, source_language: Optional[str], target_language: str, model: str
+    ) -> Optional[str]:
+        """查询单条翻译，未命中返回 None"""
+        return self.get_many([text], source_language, target_language, model).get(0)
+
+    def get_many(
+        self,
+        texts: List[str],
+        source_language: Optional[str],
+        target_language: str,
+        model: str,
+    ) -> Dict[int, str]:
+        """批量查询，返回 {下标: 译文}，只包含命中的条目"""
+        now = time.time()
+        found: Dict[int, str] = {}
+        cold: Dict[str, List[int]] = {}
+
+        with self._lock:
+            for i, text in enumerate(texts):
+                key = self.make_key(text, source_language, target_language, model)
+                entry = self._hot.get(key)
+                if entry is not None and now - entry[1] <= self.ttl_seconds:
+                    self._hot.move_to_end(key)
+                    found[i] = entry[0]
+                    self.hot_hits += 1
+                    continue
+                if entry is not None:
+                    del self._hot[key]
+                cold.setdefault(key, []).append(i)
+
+            if cold:
+                rows = self._select(list(cold.keys()))
+                touch = []
+                for key, translation, created_at, accessed_at in rows:
+                    if now - created_at > self.ttl_seconds:
+                        continue
+                    for i in cold.pop(key):
+                        found[i] = translation
+                    self._remember(key, translation, created_at)
+                    if now - accessed_at > self.TOUCH_INTERVAL:
+                        touch.append((now, key))
+                if touch:
+                    self._conn.executemany(
+                        "UPDATE translations SET accessed_at = ? WHERE key = ?", touch
+                    )
+                    self._conn.commit()
+
+            hit_count = len(found)
+            self.hits += hit_count
+            self.misses += len(texts) - hit_count
+
+        return found
+
+    def set(
+        self,
+        text: str,
+        source_language: Optional[str],
+        target_language: str,
+        model: str,
+        translation: str,
+    ):
+        """写入单条翻译"""
+        self.set_many([(text, translation)], source_language, target_language, model)
+
+    def set_many(
+        self,
+        items: List[Tuple[str, str]],
+        source_language: Optional[str],
+        target_language: str,
+        model: str,
+    ):
+        """批量写入 (原文, 译文)"""
+        if not items:
+            return
+
+        now = time.time()
+        rows = []
+        with self._lock:
+            for text, translation in items:
+                key = self.make_key(text, source_language, target_language, model)
+                self._remember(key, translation, now)
+                rows.append((key, translation, now, now))
+
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO translations "
+                "(key, translation, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+
+            self._writes_since_evict += len(rows)
+            if self._writes_since_evict >= 500:
+                self._evict(now)
+                self._writes_since_evict = 0
+
+    def stats(self) -> Dict:
+        """缓存统计信息"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            now = time.monotonic()
+            if (
+                self._entries is None
+                or now - self._entries_at > self.ENTRIES_REFRESH_INTERVAL
+            ):
+                self._set_entries(self._count())
+            return {
+                "hits": self.hits,
+                "hot_hits": self.hot_hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "hot_entries": len(self._hot),
+                "entries": self._entries,
+            }
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._hot.clear()
+            self._conn.execute("DELETE FROM translations")
+            self._conn.commit()
+            self._set_entries(0)
+
+    def _select(self, keys: List[str]) -> List[Tuple]:
+        rows = []
+        # SQLite 默认最多 999 个绑定参数
+        for start in range(0, len(keys), 500):
+            chunk = keys[start : start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows.extend(
+                self._conn.execute(
+                    "SELECT key, translation, created_at, accessed_at "
+                    f"FROM translations WHERE key IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+            )
+        return rows
+
+    def _remember(self, key: str, translation: str, created_at: float):
+        """放入热缓存（调用方持有锁）"""
+        self._hot[key] = (translation, created_at)
+        self._hot.move_to_end(key)
+        while len(self._hot) > self.hot_size:
+            self._hot.popitem(last=False)
+
+    def _evict(self, now: float):
+        """删除过期条目，并按最近访问时间淘汰超出上限的条目（调用方持有锁）"""
+        self._conn.execute(
+            "DELETE FROM translations WHERE created_at < ?", (now - self.ttl_seconds,)
+        )
+        count = self._count()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM translations WHERE key IN ("
+                "SELECT key FROM translations ORDER BY accessed_at LIMIT ?)",
+                (overflow,),
+            )
+            count = self.max_entries
+        self._conn.commit()
+        self._set_entries(count)
+
+    def _count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+
+    def _set_entries(self, count: int):
+        """更新缓存的条目数（调用方持有锁）"""
+        self._entries = count
+        self._entries_at = time.monotonic()
@@ -1,8 +1,31 @@
+import asyncio
+import httpx
 import requests
 import os
 import json
 import re
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
+
+from app.services.translation_cache import TranslationCache
+from app.utils.executors import get_io_executor, run_io
+from app.utils.log import SAMPLED, get_logger
+
+logger = get_logger(__name__)
+
+
+# 语言代码映射
+LANG_NAMES = {
+    "zh": "中文",
+    "en": "英文",
+    "ja": "日文",
+    "ko": "韩文",
+    "fr": "法文",
+    "de": "德文",
+    "es": "西班牙文",
+    "ru": "俄文",
+    "it": "意大利文",
+    "pt": "葡萄牙文",
+}
 
 
 class TranslationService:
@@ -10,10 +33,41 @@ class TranslationService:
         # 阿里云DashScope API配置
         self.api_key = os.environ.get("DASHSCOPE_API_KEY", "")
         if not self.api_key:
-            print("警告: 未设置DASHSCOPE_API_KEY环境变量")
+            logger.warning("未设置DASHSCOPE_API_KEY环境变量")
         self.base_url = "https://dashscope.aliyuncs.com/api/v1/services/aigc/text-generation/generation"
         self.model = "qwen-turbo"  # 可以使用 qwen-turbo, qwen-plus, qwen-max
 
+        # 批量翻译：一张图片的所有片段合并为一次（或按token预算分为几次）请求
+        self.batch_enabled = os.environ.get(
+            "TRANSLATION_BATCH_ENABLED", "true"
+        ).lower() in ("1", "true", "yes")
+        self.batch_max_tokens = int(os.environ.get("TRANSLATION_BATCH_MAX_TOKENS", 800))
+        self.batch_max_items = int(os.environ.get("TRANSLATION_BATCH_MAX_ITEMS", 60))
+        self.batch_max_output_tokens = 2000
+
+        # HTTP连接复用：同步路径使用 Session，异步路径使用 httpx 连接池
+        self.max_concurrency = int(os.environ.get("TRANSLATION_MAX_CONCURRENCY", 8))
+        self._session = requests.Session()
+        self._session.mount(
+            "https://",
+            requests.adapters.HTTPAdapter(pool_maxsize=self.max_concurrency),
+        )
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._async_semaphore: Optional[asyncio.Semaphore] = None
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # 翻译记忆：相同原文不重复请求API
+        self.cache: Optional[TranslationCache] = None
+        if os.environ.get("TRANSLATION_CACHE_ENABLED", "true").lower() in (
+            "1",
+            "true",
+            "yes",
+        ):
+            try:
+                self.cache = TranslationCache()
+            except Exception as e:
+                logger.warning("翻译记忆初始化失败，已禁用: %s", e)
+
     def _should_translate(self, text: str, target_language: str = "en") -> bool:
         """
         检测文本是否需要翻译
@@ -153,30 +207,83 @@ class TranslationService:
             source_language: 源语言代码，None表示自动检测
 
         Returns:
-            翻译后的文字列表
+            翻译结果列表 [{"text", "skip_redraw"}]；翻译失败的片段保留原文，
+            并带有 "failed": True
         """
-        results = []
+        results, pending = self._prepare(texts, target_language)
+        misses = self._apply_cached(results, pending, source_language, target_language)
 
-        # 语言代码映射
-        lang_map = {
-            "zh": "中文",
-            "en": "英文",
-            "ja": "日文",
-            "ko": "韩文",
-            "fr": "法文",
-            "de": "德文",
-            "es": "西班牙文",
-            "ru": "俄文",
-            "it": "意大利文",
-            "pt": "葡萄牙文",
-        }
+        if misses:
+            target_lang_name, source_lang_name = self._lang_names(
+                target_language, source_language
+            )
+            translated = self._translate_pending(
+                [text for _, text in misses], target_lang_name, source_lang_name
+            )
+            self._apply_translated(
+                results, misses, translated, source_language, target_language
+            )
 
-        target_lang_name = lang_map.get(target_language, target_language)
+        return results
+
+    async def translate_async(
+        self,
+        texts: List[str],
+        target_language: str,
+        source_language: Optional[str] = None,
+    ) -> List[str]:
+        """
+        translate 的异步版本
+
+        使用连接池复用的异步HTTP客户端，批次和无法批量的片段并发请求，
+        并发数受 max_concurrency 限制；返回顺序与输入一致。
+        """
+        results, pending = self._prepare(texts, target_language)
+        misses = await run_io(
+            self._apply_cached, results, pending, source_language, target_language
+        )
+
+        if misses:
+            target_lang_name, source_lang_name = self._lang_names(
+                target_language, source_language
+            )
+            translated = await self._translate_pending_async(
+                [text for _, text in misses], target_lang_name, source_lang_name
+            )
+            await run_io(
+                self._apply_translated,
+                results,
+                misses,
+                translated,
+                source_language,
+                target_language,
+            )
+
+        return results
+
+    def _lang_names(
+        self, target_language: str, source_language: Optional[str]
+    ) -> Tuple[str, str]:
+        """语言代码转换为提示词中使用的语言名称"""
+        target_lang_name = LANG_NAMES.get(target_language, target_language)
         source_lang_name = (
-            lang_map.get(source_language, source_language)
+            LANG_NAMES.get(source_language, source_language)
             if source_language
             else "自动检测"
         )
+        return target_lang_name, source_lang_name
+
+    def _prepare(
+        self, texts: List[str], target_language: str
+    ) -> Tuple[List[Dict], List[Tuple[int, str]]]:
+        """
+        预处理：跳过无需翻译的文本，缩写原文
+
+        Returns:
+            (结果列表（默认值为原文）, 需要翻译的 (结果下标, 文本) 列表)
+        """
+        results = []
+        pending = []
 
         for text in texts:
             if not text or not text.strip():
@@ -185,113 +292,503 @@ class TranslationService:
 
             # 检查是否需要翻译（传入目标语言）
             if not self._should_translate(text, target_language):
-                print(f"⏭️ 跳过翻译（无需翻译）: {text}")
+                logger.debug("跳过翻译（无需翻译）: %s", text, extra=SAMPLED)
                 results.append({"text": text, "skip_redraw": True})
                 continue
 
-            try:
-                # 翻译前先缩写中文原文
-                original_text = text
-                text = self._abbreviate_before_translate(text)
+            # 翻译前先缩写中文原文；翻译失败时保留缩写后的原文
+            text = self._abbreviate_before_translate(text)
+            results.append({"text": text, "skip_redraw": False})
+            pending.append((len(results) - 1, text))
 
-                translated = self._translate_single(
-                    text, target_lang_name, source_lang_name
-                )
-                results.append({"text": translated, "skip_redraw": False})
+        return results, pending
 
-            except Exception as e:
-                print(f"翻译失败 '{text}': {str(e)}")
-                # 如果翻译失败，保留原文
-                results.append({"text": text, "skip_redraw": False})
+    def _apply_cached(
+        self,
+        results: List[Dict],
+        pending: List[Tuple[int, str]],
+        source_language: Optional[str],
+        target_language: str,
+    ) -> List[Tuple[int, str]]:
+        """查翻译记忆并写入结果，返回未命中的片段"""
+        if not pending:
+            return []
+
+        hits = self._cache_lookup(
+            [text for _, text in pending], source_language, target_language
+        )
+        for j, translation in hits.items():
+            results[pending[j][0]]["text"] = translation
+        if hits:
+            logger.info("翻译记忆命中 %d / %d", len(hits), len(pending))
+
+        return [item for j, item in enumerate(pending) if j not in hits]
+
+    def _apply_translated(
+        self,
+        results: List[Dict],
+        misses: List[Tuple[int, str]],
+        translated: List[Optional[str]],
+        source_language: Optional[str],
+        target_language: str,
+    ):
+        """写入API翻译结果并更新翻译记忆"""
+        learned = []
+        for (index, text), translation in zip(misses, translated):
+            if translation is None:
+                # 翻译失败，保留原文，不写入缓存
+                results[index]["failed"] = True
+                continue
+            results[index]["text"] = translation
+            learned.append((text, translation))
+        self._cache_store(learned, source_language, target_language)
+
+    def _cache_lookup(
+        self, texts: List[str], source_language: Optional[str], target_language: str
+    ) -> Dict[int, str]:
+        """查询翻译记忆，返回 {下标: 译文}"""
+        if not self.cache:
+            return {}
+        try:
+            return self.cache.get_many(
+                texts, source_language, target_language, self.model
+            )
+        except Exception as e:
+            logger.warning("查询翻译记忆失败: %s", e)
+            return {}
+
+    def _cache_store(
+        self,
+        items: List[Tuple[str, str]],
+        source_language: Optional[str],
+        target_language: str,
+    ):
+        """写入翻译记忆"""
+        if not self.cache or not items:
+            return
+        try:
+            self.cache.set_many(items, source_language, target_language, self.model)
+        except Exception as e:
+            logger.warning("写入翻译记忆失败: %s", e)
+
+    def _translate_pending(
+        self, texts: List[str], target_language: str, source_language: str
+    ) -> List[Optional[str]]:
+        """
+        翻译需要调用模型的文本
+
+        批量模式下按token预算分组，每组一次请求；超长片段和批量结果中缺失
+        （解析失败或缺少编号）的片段再逐条请求。批量请求本身失败（网络错误、
+        非200响应）时重试一次，仍失败则整批保留原文，不再逐条请求已经出错的API。
+
+        Returns:
+            与输入等长的译文列表，翻译失败的片段为 None
+        """
+        if not self.batch_enabled or len(texts) == 1:
+            return [
+                self._request_single(text, target_language, source_language)
+                for text in texts
+            ]
+
+        results: List[Optional[str]] = [None] * len(texts)
+        batches, singles = self._split_batches(texts)
+
+        unparsed = []
+        for batch in batches:
+            translated = self._translate_batch(
+                [texts[i] for i in batch], target_language, source_language
+            )
+            if translated is None:
+                continue
+            for i, text in zip(batch, translated):
+                results[i] = text
+                if text is None:
+                    unparsed.append(i)
+
+        if unparsed:
+            logger.warning("批量翻译有 %d 个片段解析失败，逐条重试", len(unparsed))
+
+        for i in singles + unparsed:
+            results[i] = self._request_single(
+                texts[i], target_language, source_language
+            )
 
         return results
 
-    def _translate_single(
-        self, text: str, target_language: str, source_language: str
-    ) -> str:
+    async def _translate_pending_async(
+        self, texts: List[str], target_language: str, source_language: str
+    ) -> List[Optional[str]]:
+        """_translate_pending 的异步版本：所有批次和单条请求并发执行"""
+        if not self.batch_enabled or len(texts) == 1:
+            batches, singles = [], list(range(len(texts)))
+        else:
+            batches, singles = self._split_batches(texts)
+
+        results: List[Optional[str]] = [None] * len(texts)
+        unparsed: List[int] = []
+
+        async def run_batch(batch: List[int]):
+            translated = await self._translate_batch_async(
+                [texts[i] for i in batch], target_language, source_language
+            )
+            if translated is None:
+                return
+            for i, text in zip(batch, translated):
+                results[i] = text
+                if text is None:
+                    unparsed.append(i)
+
+        async def run_single(i: int):
+            results[i] = await self._request_single_async(
+                texts[i], target_language, source_language
+            )
+
+        await asyncio.gather(
+            *[run_batch(batch) for batch in batches],
+            *[run_single(i) for i in singles],
+        )
+
+        # 批量结果中解析失败的片段逐条重试（请求失败的批次不重试）
+        if unparsed:
+            logger.warning("批量翻译有 %d 个片段解析失败，逐条重试", len(unparsed))
+            await asyncio.gather(*[run_single(i) for i in unparsed])
+
+        return results
+
+    def _estimate_tokens(self, text: str) -> int:
+        """粗略估算文本token数：CJK字符约1个token，其余约4个字符1个token"""
+        cjk = sum(1 for c in text if ord(c) > 0x2E80)
+        return cjk + (len(text) - cjk + 3) // 4 + 1
+
+    def _split_batches(self, texts: List[str]) -> Tuple[List[List[int]], List[int]]:
         """
-        使用千问模型翻译单个文本
+        按token预算将文本分组
 
-        Args:
-            text: 待翻译的文本
-            target_language: 目标语言名称
-            source_language: 源语言名称
+        Returns:
+            (批次列表（每批为下标列表）, 超出单批预算需要逐条翻译的下标)
+        """
+        batches = []
+        singles = []
+        current: List[int] = []
+        current_tokens = 0
+
+        for i, text in enumerate(texts):
+            tokens = self._estimate_tokens(text)
+            if tokens > self.batch_max_tokens:
+                singles.append(i)
+                continue
+
+            if current and (
+                current_tokens + tokens > self.batch_max_tokens
+                or len(current) >= self.batch_max_items
+            ):
+                batches.append(current)
+                current, current_tokens = [], 0
+
+            current.append(i)
+            current_tokens += tokens
+
+        if current:
+            batches.append(current)
+
+        return batches, singles
+
+    def _translate_batch(
+        self, texts: List[str], target_language: str, source_language: str
+    ) -> Optional[List[Optional[str]]]:
+        """
+        一次请求翻译多个编号片段，要求模型返回JSON
 
         Returns:
-            翻译后的文本
+            与输入等长的译文列表，解析失败的片段为 None；
+            请求失败（重试一次后仍失败）时返回 None
         """
+        payload = self._batch_payload(texts, target_language, source_language)
+        content = self._call_api(payload)
+        if content is None:
+            logger.warning("批量翻译请求失败，重试一次")
+            content = self._call_api(payload)
+        if content is None:
+            return None
+
+        return self._parse_batch_content(content, len(texts))
+
+    async def _translate_batch_async(
+        self, texts: List[str], target_language: str, source_language: str
+    ) -> Optional[List[Optional[str]]]:
+        """_translate_batch 的异步版本"""
+        payload = self._batch_payload(texts, target_language, source_language)
+        content = await self._call_api_async(payload)
+        if content is None:
+            logger.warning("批量翻译请求失败，重试一次")
+            content = await self._call_api_async(payload)
+        if content is None:
+            return None
+
+        return self._parse_batch_content(content, len(texts))
+
+    def _batch_payload(
+        self, texts: List[str], target_language: str, source_language: str
+    ) -> dict:
+        """构建批量翻译请求体：编号片段输入，JSON输出"""
+        segments = [{"id": i + 1, "text": text} for i, text in enumerate(texts)]
+        source = (
+            source_language
+            if source_language and source_language != "自动检测"
+            else "原文"
+        )
+        prompt = (
+            f"请将下面JSON数组中的{len(texts)}段{source}逐段翻译成{target_language}。"
+            f'返回JSON对象 {{"translations": [{{"id": 编号, "text": 译文}}, ...]}}，'
+            f"数组长度必须为{len(texts)}，编号与输入一一对应，不要合并或拆分片段，"
+            "不要添加任何解释：\n\n"
+            + json.dumps(segments, ensure_ascii=False)
+        )
+
+        return self._build_payload(
+            f"你是一个专业的翻译助手，请将用户提供的文字翻译成{target_language}。只返回JSON格式的翻译结果。",
+            prompt,
+            max_tokens=self.batch_max_output_tokens,
+            json_output=True,
+        )
+
+    def _parse_batch_content(self, content: str, count: int) -> List[Optional[str]]:
+        """解析批量翻译返回的JSON，按编号映射回片段"""
+        results: List[Optional[str]] = [None] * count
+
+        # 去掉可能的 markdown 代码块
+        content = re.sub(r"^```(?:json)?\s*|\s*```$", "", content.strip())
+        try:
+            data = json.loads(content)
+        except ValueError:
+            match = re.search(r"[\[{].*[\]}]", content, re.S)
+            if not match:
+                logger.warning("批量翻译结果不是JSON: %.200s", content)
+                return results
+            try:
+                data = json.loads(match.group(0))
+            except ValueError:
+                logger.warning("批量翻译结果不是JSON: %.200s", content)
+                return results
+
+        if isinstance(data, dict):
+            data = data.get("translations", data.get("results"))
+        if not isinstance(data, list):
+            logger.warning("批量翻译结果格式错误: %.200s", content)
+            return results
+
+        if len(data) != count:
+            logger.warning("批量翻译条数不匹配: 期望 %d，实际 %d", count, len(data))
+
+        for position, item in enumerate(data):
+            if isinstance(item, dict):
+                index = item.get("id")
+                text = item.get("text")
+                try:
+                    index = int(index) - 1
+                except (TypeError, ValueError):
+                    continue
+            elif isinstance(item, str) and len(data) == count:
+                # 模型只返回了字符串数组，条数一致时按位置对应
+                index, text = position, item
+            else:
+                continue
+
+            if 0 <= index < count and isinstance(text, str):
+                text = self._clean_translation(text)
+                if text:
+                    results[index] = text
+
+        return results
+
+    def _request_single(
+        self, text: str, target_language: str, source_language: str
+    ) -> Optional[str]:
+        """请求千问API翻译单个文本，失败时返回 None"""
+        content = self._call_api(
+            self._single_payload(text, target_language, source_language)
+        )
+        translated_text = self._clean_translation(content) if content else ""
+        return translated_text or None
+
+    async def _request_single_async(
+        self, text: str, target_language: str, source_language: str
+    ) -> Optional[str]:
+        """_request_single 的异步版本"""
+        content = await self._call_api_async(
+            self._single_payload(text, target_language, source_language)
+        )
+        translated_text = self._clean_translation(content) if content else ""
+        return translated_text or None
+
+    def _single_payload(
+        self, text: str, target_language: str, source_language: str
+    ) -> dict:
+        """构建单条翻译请求体"""
         # 构建提示词
         if source_language and source_language != "自动检测":
             prompt = f"请将以下{source_language}翻译成{target_language}，只返回翻译结果，不要解释：\n\n{text}"
         else:
             prompt = f"请将以下内容翻译成{target_language}，只返回翻译结果，不要解释：\n\n{text}"
 
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}",
+        return self._build_payload(
+            f"你是一个专业的翻译助手，请将用户提供的文字翻译成{target_language}。只返回翻译结果，不要添加任何解释、说明或额外内容。",
+            prompt,
+        )
+
+    def _build_payload(
+        self,
+        system_prompt: str,
+        prompt: str,
+        max_tokens: int = 1500,
+        json_output: bool = False,
+    ) -> dict:
+        """构建千问API请求体"""
+        parameters = {
+            "result_format": "message",
+            "max_tokens": max_tokens,
+            "temperature": 0.3,  # 降低温度以获得更稳定的翻译结果
         }
+        if json_output:
+            parameters["response_format"] = {"type": "json_object"}
 
-        payload = {
+        return {
             "model": self.model,
             "input": {
                 "messages": [
-                    {
-                        "role": "system",
-                        "content": f"你是一个专业的翻译助手，请将用户提供的文字翻译成{target_language}。只返回翻译结果，不要添加任何解释、说明或额外内容。",
-                    },
+                    {"role": "system", "content": system_prompt},
                     {"role": "user", "content": prompt},
                 ]
             },
-            "parameters": {
-                "result_format": "message",
-                "max_tokens": 1500,
-                "temperature": 0.3,  # 降低温度以获得更稳定的翻译结果
-            },
+            "parameters": parameters,
         }
 
+    def _headers(self) -> dict:
+        return {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_key}",
+        }
+
+    def _call_api(self, payload: dict) -> Optional[str]:
+        """调用千问API，返回模型输出内容，失败时返回 None"""
         try:
-            response = requests.post(
-                self.base_url, headers=headers, json=payload, timeout=30
+            response = self._session.post(
+                self.base_url, headers=self._headers(), json=payload, timeout=30
             )
             response.raise_for_status()
-
             data = response.json()
+        except requests.exceptions.RequestException as e:
+            logger.warning("请求千问API失败: %s", e)
+            return None
+        except Exception as e:
+            logger.warning("处理千问API响应失败: %s", e)
+            return None
 
-            # 解析响应
-            if "output" in data and "choices" in data["output"]:
-                choices = data["output"]["choices"]
-                if choices and len(choices) > 0:
-                    message = choices[0].get("message", {})
-                    translated_text = message.get("content", "").strip()
-
-                    # 清理翻译结果中的特殊字符
-                    translated_text = translated_text.strip()
-
-                    # 修复常见的温度格式问题
-                    # 将 "60 °C" 或 "60° C" 统一为 "60°C"
-                    translated_text = re.sub(
-                        r"(\d+)\s*°\s*([Cc])", r"\1°C", translated_text
-                    )
-                    # 修复 "60°℃" 这种错误格式
-                    translated_text = translated_text.replace("°℃", "°C")
-                    translated_text = translated_text.replace("℃", "°C")
-
-                    # 清理可能的引号或多余内容
-                    translated_text = translated_text.strip("\"'")
-
-                    if translated_text:
-                        return translated_text
-
-            # 如果解析失败，返回原文
-            print(f"千问API响应解析失败: {data}")
-            return text
+        content = self._extract_content(data)
+        if content is None:
+            logger.warning("千问API响应解析失败: %s", data)
+        return content
 
-        except requests.exceptions.RequestException as e:
-            print(f"请求千问API失败: {str(e)}")
-            return text
+    async def _call_api_async(self, payload: dict) -> Optional[str]:
+        """_call_api 的异步版本，受全局并发上限约束"""
+        client, semaphore = self._get_async_client()
+        try:
+            async with semaphore:
+                response = await client.post(
+                    self.base_url, headers=self._headers(), json=payload
+                )
+            response.raise_for_status()
+            data = response.json()
+        except httpx.HTTPError as e:
+            logger.warning("请求千问API失败: %s", e)
+            return None
         except Exception as e:
-            print(f"处理千问API响应失败: {str(e)}")
-            return text
+            logger.warning("处理千问API响应失败: %s", e)
+            return None
+
+        content = self._extract_content(data)
+        if content is None:
+            logger.warning("千问API响应解析失败: %s", data)
+        return content
+
+    def _get_async_client(self) -> Tuple[httpx.AsyncClient, asyncio.Semaphore]:
+        """获取当前事件循环的异步客户端（连接池 + 并发信号量）"""
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            if self._async_client is not None:
+                self._close_client_in_loop(self._async_client, self._async_loop)
+            self._async_client = httpx.AsyncClient(
+                timeout=httpx.Timeout(30, pool=None),
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+            )
+            self._async_semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._async_loop = loop
+        return self._async_client, self._async_semaphore
+
+    def _close_client_in_loop(
+        self, client: httpx.AsyncClient, loop: asyncio.AbstractEventLoop
+    ):
+        """在客户端所属的事件循环中关闭它，释放连接池（连接不能跨事件循环关闭）"""
+        if loop.is_closed():
+            # 循环已关闭，无法再执行异步关闭，连接随对象回收
+            logger.debug("异步HTTP客户端所属的事件循环已关闭，丢弃客户端")
+        elif loop.is_running():
+            # 旧循环在其他线程中运行
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+        else:
+            # 旧循环已停止但未关闭：在I/O线程中驱动它完成关闭
+            get_io_executor().submit(loop.run_until_complete, client.aclose())
+
+    async def warm_up(self) -> str:
+        """创建异步HTTP客户端，并预先建立到 DashScope 的连接（失败不影响后续请求）"""
+        client, _ = self._get_async_client()
+        if not self.api_key:
+            return "no api key"
+        try:
+            # 只为完成 DNS 解析和 TLS 握手，响应状态码无关紧要
+            await client.head(self.base_url, timeout=5)
+        except httpx.HTTPError as e:
+            logger.warning("预先连接翻译API失败: %s", e)
+            return "connect failed"
+        return "connected"
+
+    async def aclose(self):
+        """关闭异步HTTP客户端（应用退出时调用）"""
+        if self._async_client is not None:
+            if self._async_loop is asyncio.get_running_loop():
+                await self._async_client.aclose()
+            else:
+                self._close_client_in_loop(self._async_client, self._async_loop)
+            self._async_client = None
+            self._async_loop = None
+
+    def _extract_content(self, data: dict) -> Optional[str]:
+        """从千问API响应中取出模型输出"""
+        if "output" in data and "choices" in data["output"]:
+            choices = data["output"]["choices"]
+            if choices and len(choices) > 0:
+                message = choices[0].get("message", {})
+                content = message.get("content", "").strip()
+                if content:
+                    return content
+        return None
+
+    def _clean_translation(self, translated_text: str) -> str:
+        """清理翻译结果中的特殊字符"""
+        translated_text = translated_text.strip()
+
+        # 修复常见的温度格式问题
+        # 将 "60 °C" 或 "60° C" 统一为 "60°C"
+        translated_text = re.sub(r"(\d+)\s*°\s*([Cc])", r"\1°C", translated_text)
+        # 修复 "60°℃" 这种错误格式
+        translated_text = translated_text.replace("°℃", "°C")
+        translated_text = translated_text.replace("℃", "°C")
+
+        # 清理可能的引号或多余内容
+        return translated_text.strip("\"'")
 
     def translate_with_fallback(
         self,
@@ -0,0 +1,129 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, List, Optional, Tuple
+
+from app.utils.forksafe import after_fork_in_child
+
+
+class EnginePool:
+    """
+    推理引擎实例池
+
+    引擎实例（如 PaddleOCR）不能被多个线程同时调用。池中的每个实例同一时间
+    只借给一个线程：checkout 取出空闲实例，用完后 checkin 归还。
+    - 按需增长：没有空闲实例且未达到上限时才创建新实例（创建在锁外进行）
+    - 空闲收缩：超过 idle_seconds 未使用的实例在下一次借出/归还时释放，
+      至少保留 min_size 个
+    - 等待时间：没有可用实例时等待归还，等待时长交给 wait_observer（如监控直方图）
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Any],
+        max_size: int,
+        min_size: int = 1,
+        idle_seconds: float = 300.0,
+    ):
+        self.factory = factory
+        self.max_size = max(1, max_size)
+        self.min_size = max(0, min(min_size, self.max_size))
+        self.idle_seconds = idle_seconds
+        self.wait_observer: Optional[Callable[[float], None]] = None
+
+        # 空闲实例及其最后归还时间（后进先出，常用的实例保持热缓存）
+        self._idle: List[Tuple[Any, float]] = []
+        self._size = 0
+        self._cond = threading.Condition()
+        self.created = 0
+        self.destroyed = 0
+        self.waits = 0
+        after_fork_in_child(self._reinit)
+
+    def _reinit(self):
+        """fork 后在子进程中重建条件变量（已创建的实例由写时复制共享）"""
+        self._cond = threading.Condition()
+
+    def add(self, engine: Any):
+        """放入一个已创建的实例（如启动时预加载的实例）"""
+        with self._cond:
+            self._size += 1
+            self.created += 1
+            self._idle.append((engine, time.monotonic()))
+            self._cond.notify()
+
+    def checkout(self) -> Any:
+        """借出一个实例；没有空闲实例且已达上限时阻塞等待"""
+        waited_since = None
+        with self._cond:
+            while True:
+                self._shrink()
+                if self._idle:
+                    engine, _ = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    # 先占位再在锁外创建，创建很慢，不阻塞其他线程归还实例
+                    self._size += 1
+                    engine = None
+                    break
+                if waited_since is None:
+                    waited_since = time.monotonic()
+                    self.waits += 1
+                self._cond.wait()
+
+        if engine is None:
+            try:
+                engine = self.factory()
+            except BaseException:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self.created += 1
+
+        if self.wait_observer is not None:
+            waited = time.monotonic() - waited_since if waited_since else 0.0
+            self.wait_observer(waited)
+        return engine
+
+    def checkin(self, engine: Any):
+        """归还实例"""
+        with self._cond:
+            self._idle.append((engine, time.monotonic()))
+            self._shrink()
+            self._cond.notify()
+
+    @contextmanager
+    def engine(self):
+        engine = self.checkout()
+        try:
+            yield engine
+        finally:
+            self.checkin(engine)
+
+    def stats(self):
+        with self._cond:
+            idle = len(self._idle)
+            return {
+                "size": self._size,
+                "idle": idle,
+                "in_use": self._size - idle,
+                "max_size": self.max_size,
+                "created": self.created,
+                "destroyed": self.destroyed,
+                "waits": self.waits,
+            }
+
+    def _shrink(self):
+        """释放空闲太久的实例（调用方持有锁）"""
+        if self._size <= self.min_size or not self._idle:
+            return
+        deadline = time.monotonic() - self.idle_seconds
+        # 空闲列表按归还时间排序，最久未用的在前
+        while (
+            self._idle and self._size > self.min_size and self._idle[0][1] < deadline
+        ):
+            self._idle.pop(0)
+            self._size -= 1
+            self.destroyed += 1
@@ -0,0 +1,76 @@
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+
+def _env_int(name: str, default: int) -> int:
+    """读取整数环境变量，非法值回退到默认值"""
+    try:
+        value = int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+    return max(1, value)
+
+
+# CPU密集型任务（OCR、样式提取、重绘）的线程数，默认等于CPU核数
+# PaddleOCR / OpenCV / NumPy 在计算时会释放GIL，线程池即可利用多核
+CPU_WORKERS = _env_int("CPU_WORKERS", os.cpu_count() or 1)
+
+# I/O密集型任务（翻译API请求）的线程数
+IO_WORKERS = _env_int("IO_WORKERS", 16)
+
+_cpu_executor: Optional[ThreadPoolExecutor] = None
+_io_executor: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+
+
+def get_cpu_executor() -> ThreadPoolExecutor:
+    """获取CPU任务线程池（延迟创建）"""
+    global _cpu_executor
+    with _lock:
+        if _cpu_executor is None:
+            _cpu_executor = ThreadPoolExecutor(
+                max_workers=CPU_WORKERS, thread_name_prefix="cpu-worker"
+            )
+        return _cpu_executor
+
+
+def get_io_executor() -> ThreadPoolExecutor:
+    """获取I/O任务线程池（延迟创建）"""
+    global _io_executor
+    with _lock:
+        if _io_executor is None:
+            _io_executor = ThreadPoolExecutor(
+                max_workers=IO_WORKERS, thread_name_prefix="io-worker"
+            )
+        return _io_executor
+
+
+async def run_cpu(func: Callable, *args: Any, **kwargs: Any) -> Any:
+    """在CPU线程池中执行阻塞函数，不阻塞事件循环"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_cpu_executor(), functools.partial(func, *args, **kwargs)
+    )
+
+
+async def run_io(func: Callable, *args: Any, **kwargs: Any) -> Any:
+    """在I/O线程池中执行阻塞函数，不阻塞事件循环"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_io_executor(), functools.partial(func, *args, **kwargs)
+    )
+
+
+def shutdown_executors(wait: bool = True):
+    """关闭所有线程池（应用退出时调用）"""
+    global _cpu_executor, _io_executor
+    with _lock:
+        for executor in (_cpu_executor, _io_executor):
+            if executor is not None:
+                executor.shutdown(wait=wait)
+        _cpu_executor = None
+        _io_executor = None
@@ -0,0 +1,28 @@
+import os
+import weakref
+from typing import Callable, List
+
+# 子进程从父进程继承、但不能再使用的资源（如 SQLite 连接）
+# 保留引用而不是关闭：在子进程中关闭会影响父进程持有的同一个数据库连接
+_inherited: List[object] = []
+
+
+def after_fork_in_child(method: Callable[[], None]):
+    """
+    注册 fork 后在子进程中调用的绑定方法（用于重新打开连接、重建锁）
+
+    只持有对象的弱引用，不会延长对象的生命周期。
+    """
+    ref = weakref.WeakMethod(method)
+
+    def callback():
+        bound = ref()
+        if bound is not None:
+            bound()
+
+    os.register_at_fork(after_in_child=callback)
+
+
+def abandon(resource: object):
+    """放弃继承自父进程的资源：子进程不再使用它，也不关闭它"""
+    _inherited.append(resource)
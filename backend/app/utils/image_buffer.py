@@ -0,0 +1,117 @@
+from typing import Optional, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+
+class ImageBuffer:
+    """
+    流水线共享的图片对象
+
+    图片只解码一次，OCR、样式提取和重绘都从同一份数据取视图：
+    - rgb:  HxWx3 uint8 数组（基础数据）
+    - bgr:  OpenCV / PaddleOCR 使用的通道顺序
+    - gray: 灰度图（Tesseract 使用）
+    - rgba_image(): 重绘使用的 RGBA 画布（每次返回新图，可直接修改）
+
+    派生视图在第一次访问时才计算，并缓存在对象上。
+    """
+
+    def __init__(self, path: str, content_hash: Optional[str] = None):
+        self.path = path
+        self.content_hash = content_hash
+
+        image = Image.open(path)
+        image.load()
+        self.format = image.format
+        self.mode = image.mode
+        self.size: Tuple[int, int] = image.size
+
+        if image.mode == "RGB":
+            self._rgb: Optional[np.ndarray] = np.asarray(image)
+            # RGB 原图可以直接由数组还原，不需要保留 PIL 对象
+            self._source: Optional[Image.Image] = None
+        else:
+            # 其他模式（P / L / RGBA 等）保留原图，保证 RGBA 转换时透明通道不丢失
+            self._rgb = None
+            self._source = image
+
+        self._bgr: Optional[np.ndarray] = None
+        self._gray: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_array(cls, rgb: np.ndarray, path: str = "<memory>") -> "ImageBuffer":
+        """由已有的 RGB 数组构造（不经过文件解码）"""
+        buffer = cls.__new__(cls)
+        buffer.path = path
+        buffer.content_hash = None
+        buffer.format = None
+        buffer.mode = "RGB"
+        buffer.size = (rgb.shape[1], rgb.shape[0])
+        buffer._rgb = rgb
+        buffer._source = None
+        buffer._bgr = None
+        buffer._gray = None
+        return buffer
+
+    @classmethod
+    def ensure(
+        cls, image: Union[str, "ImageBuffer"], content_hash: Optional[str] = None
+    ) -> "ImageBuffer":
+        """传入路径时解码为 ImageBuffer，已经是 ImageBuffer 时原样返回"""
+        if isinstance(image, ImageBuffer):
+            return image
+        return cls(image, content_hash)
+
+    @property
+    def width(self) -> int:
+        return self.size[0]
+
+    @property
+    def height(self) -> int:
+        return self.size[1]
+
+    @property
+    def rgb(self) -> np.ndarray:
+        if self._rgb is None:
+            self._rgb = np.asarray(self._source.convert("RGB"))
+        return self._rgb
+
+    @property
+    def bgr(self) -> np.ndarray:
+        if self._bgr is None:
+            self._bgr = np.ascontiguousarray(self.rgb[:, :, ::-1])
+        return self._bgr
+
+    @property
+    def gray(self) -> np.ndarray:
+        if self._gray is None:
+            import cv2
+
+            self._gray = cv2.cvtColor(self.rgb, cv2.COLOR_RGB2GRAY)
+        return self._gray
+
+    def crop(self, x: int, y: int, width: int, height: int) -> "ImageBuffer":
+        """截取一块区域（共享 RGB 数据，不复制）"""
+        tile = self.rgb[y : y + height, x : x + width]
+        return ImageBuffer.from_array(tile, path=f"{self.path}[{x},{y}]")
+
+    def reduced(self, factor: int) -> "ImageBuffer":
+        """
+        缩小为约 1/factor 的副本（直接缩小已解码的 RGB 数组）
+
+        尺寸按向上取整计算，调用方应按返回的实际尺寸换算坐标。
+        """
+        image = Image.fromarray(self.rgb, "RGB").reduce(factor)
+        return ImageBuffer.from_array(np.asarray(image), path=f"{self.path}@1/{factor}")
+
+    def rgba_image(self) -> Image.Image:
+        """返回新的 RGBA 图片（调用方可以直接在上面绘制）"""
+        if self._source is not None:
+            return self._source.convert("RGBA")
+        return Image.fromarray(self.rgb, "RGB").convert("RGBA")
+
+    def release_views(self):
+        """释放派生视图（BGR / 灰度），只保留基础数据"""
+        self._bgr = None
+        self._gray = None
@@ -0,0 +1,146 @@
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, List, Optional
+
+from app.utils.executors import CPU_WORKERS
+from app.utils.log import get_logger
+
+logger = get_logger(__name__)
+
+
+class QueueFull(Exception):
+    """队列已满，调用方应返回 429"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("任务队列已满")
+        self.retry_after = retry_after
+
+
+class JobQueue:
+    """
+    有界任务队列
+
+    translate 接口只负责入队，固定数量的 worker 协程依次取出任务执行，
+    限制同时运行的流水线数量。排队任务数达到上限时拒绝新任务（QueueFull）。
+    根据最近任务耗时的滑动平均估算排队等待时间。
+    """
+
+    def __init__(
+        self,
+        max_depth: Optional[int] = None,
+        workers: Optional[int] = None,
+        initial_duration: float = 20.0,
+    ):
+        if max_depth is None:
+            max_depth = int(os.environ.get("JOB_QUEUE_MAX_DEPTH", 50))
+        if workers is None:
+            # 默认与CPU线程池大小相同：N 个核心可以同时处理 N 张图片
+            workers = int(os.environ.get("JOB_WORKERS", CPU_WORKERS))
+        # 0 个 worker 时任务永远不会执行，深度为 0 时所有任务都被拒绝，都是配置错误
+        if max_depth < 1:
+            raise ValueError(f"JOB_QUEUE_MAX_DEPTH 必须大于 0: {max_depth}")
+        if workers < 1:
+            raise ValueError(f"JOB_WORKERS 必须大于 0: {workers}")
+        self.max_depth = max_depth
+        self.workers = workers
+        # 任务耗时的指数滑动平均（秒）
+        self.avg_duration = initial_duration
+
+        self._pending: "OrderedDict[str, tuple]" = OrderedDict()
+        self._wakeup: Optional[asyncio.Semaphore] = None
+        self._tasks: List[asyncio.Task] = []
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+
+    async def start(self):
+        """启动 worker 协程（在应用启动时调用）"""
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Semaphore(len(self._pending))
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"job-worker-{i}")
+            for i in range(self.workers)
+        ]
+
+    async def stop(self):
+        """停止 worker；正在执行的任务被取消，排队任务丢弃"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(
+        self, job_id: str, func: Callable[..., Awaitable], *args, **kwargs
+    ) -> int:
+        """
+        任务入队
+
+        Returns:
+            排队位置（1 表示下一个执行）
+        Raises:
+            QueueFull: 排队任务数已达上限
+        """
+        if len(self._pending) >= self.max_depth:
+            self.rejected += 1
+            raise QueueFull(self.retry_after())
+        self._pending[job_id] = (func, args, kwargs, time.monotonic())
+        if self._wakeup is not None:
+            self._wakeup.release()
+        return len(self._pending)
+
+    @property
+    def depth(self) -> int:
+        return len(self._pending)
+
+    def position(self, job_id: str) -> Optional[int]:
+        """任务当前的排队位置，不在队列中（已开始或不存在）返回 None"""
+        for index, pending_id in enumerate(self._pending):
+            if pending_id == job_id:
+                return index + 1
+        return None
+
+    def estimated_wait(self, position: int) -> int:
+        """排在 position 的任务预计还需等待多少秒才开始执行"""
+        # 前面的排队任务加上正在执行的任务（按平均剩余一半耗时计），由 workers 并行消化
+        ahead = (position - 1) + self.running * 0.5
+        return int(math.ceil(ahead / self.workers * self.avg_duration))
+
+    def retry_after(self) -> int:
+        """队列满时建议客户端重试的秒数：大约一个 worker 完成一个任务的时间"""
+        return max(1, int(math.ceil(self.avg_duration / self.workers)))
+
+    def stats(self) -> dict:
+        return {
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "workers": self.workers,
+            "running": self.running,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_duration": self.avg_duration,
+        }
+
+    async def _worker(self):
+        while True:
+            await self._wakeup.acquire()
+            if not self._pending:
+                continue
+            job_id, (func, args, kwargs, _) = self._pending.popitem(last=False)
+
+            self.running += 1
+            start = time.monotonic()
+            try:
+                await func(*args, **kwargs)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception("任务 %s 执行异常: %s", job_id, e, extra={"task_id": job_id})
+            finally:
+                self.running -= 1
+                self.completed += 1
+                duration = time.monotonic() - start
+                self.avg_duration = 0.8 * self.avg_duration + 0.2 * duration
@@ -0,0 +1,115 @@
+import json
+import logging
+import os
+import random
+import sys
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+# 逐区域、逐条文本的调试日志带上这个 extra，按 LOG_SAMPLE_RATE 采样输出
+SAMPLED = {"sampled": True}
+
+# LogRecord 自带的属性；其余属性来自 extra，作为结构化字段输出
+_RECORD_ATTRS = set(
+    logging.LogRecord("", 0, "", 0, "", (), None).__dict__
+) | {"message", "asctime", "sampled"}
+
+_configured = False
+
+
+class JsonFormatter(logging.Formatter):
+    """每条日志输出一行 JSON：时间、级别、模块、消息，以及 extra 中的字段"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """只保留一部分带 SAMPLED 标记的日志，其他日志不受影响"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "sampled", False):
+            return True
+        return self.rate >= 1 or random.random() < self.rate
+
+
+def _parse_levels(spec: str) -> Dict[str, str]:
+    """解析 "app.services.ocr_service=DEBUG,app.api=WARNING" 形式的按模块级别配置"""
+    levels = {}
+    for item in spec.split(","):
+        name, sep, level = item.partition("=")
+        if sep and name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging(
+    level: Optional[str] = None,
+    fmt: Optional[str] = None,
+    module_levels: Optional[str] = None,
+    sample_rate: Optional[float] = None,
+):
+    """
+    配置 app.* 日志（在导入服务模块之前调用一次）
+
+    - LOG_LEVEL：默认级别（INFO）
+    - LOG_LEVELS：按模块覆盖级别，如 app.services.ocr_service=DEBUG
+    - LOG_FORMAT：text（默认）或 json
+    - LOG_SAMPLE_RATE：逐区域调试日志的采样比例（0-1，默认 0.1）
+
+    日志统一使用 %s 延迟格式化：级别未开启时不会拼接消息字符串。
+    """
+    global _configured
+    if _configured:
+        return
+    _configured = True
+
+    level = (level or os.environ.get("LOG_LEVEL", "INFO")).upper()
+    fmt = (fmt or os.environ.get("LOG_FORMAT", "text")).lower()
+    module_levels = (
+        module_levels
+        if module_levels is not None
+        else os.environ.get("LOG_LEVELS", "")
+    )
+    sample_rate = (
+        sample_rate
+        if sample_rate is not None
+        else float(os.environ.get("LOG_SAMPLE_RATE", 0.1))
+    )
+
+    handler = logging.StreamHandler(sys.stdout)
+    if fmt == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(
+            logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+        )
+    handler.addFilter(SamplingFilter(sample_rate))
+
+    root = logging.getLogger("app")
+    root.handlers[:] = [handler]
+    root.setLevel(level)
+    root.propagate = False
+    for name, module_level in _parse_levels(module_levels).items():
+        logging.getLogger(name).setLevel(module_level)
+
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(name)
@@ -0,0 +1,100 @@
+import threading
+import time
+from typing import Any, Callable, List, Optional
+
+from app.utils.forksafe import after_fork_in_child
+
+
+class _Batch:
+    def __init__(self):
+        self.items: List[Any] = []
+        self.results: Optional[List[Any]] = None
+        self.error: Optional[BaseException] = None
+        self.done = threading.Event()
+
+
+class MicroBatcher:
+    """
+    跨线程的微批处理
+
+    多个线程在很短的时间窗口内提交的条目合并为一批，调用一次 run_batch，
+    再把结果按提交顺序分给各自的调用方。
+
+    不使用后台线程：打开新批次的线程（leader）等待时间窗口结束或批次装满，
+    然后在自己的线程中执行整批；其他线程把条目加入批次后等待结果。
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[List[Any]], List[Any]],
+        window_seconds: float,
+        max_items: int,
+    ):
+        self.run_batch = run_batch
+        self.window_seconds = window_seconds
+        self.max_items = max(1, max_items)
+        self.batch_observer: Optional[Callable[[int], None]] = None
+
+        self._open: Optional[_Batch] = None
+        self._cond = threading.Condition()
+        after_fork_in_child(self._reinit)
+
+    def _reinit(self):
+        """fork 后在子进程中丢弃父进程的批次状态"""
+        self._open = None
+        self._cond = threading.Condition()
+
+    def submit(self, items: List[Any], wait: bool = True) -> List[Any]:
+        """
+        提交一组条目，返回对应的结果（顺序与 items 相同）
+
+        wait=False 表示调用方知道没有其他线程会在窗口内提交（如当前只有一个请求），
+        批次立即执行，不等待时间窗口。
+        """
+        if not items:
+            return []
+
+        with self._cond:
+            batch = self._open
+            leader = batch is None
+            if leader:
+                batch = self._open = _Batch()
+            start = len(batch.items)
+            batch.items.extend(items)
+            if len(batch.items) >= self.max_items and self._open is batch:
+                # 批次已满：关闭批次并唤醒 leader 立即执行
+                self._open = None
+                self._cond.notify_all()
+
+        if leader:
+            self._lead(batch, wait)
+        else:
+            batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+        return batch.results[start : start + len(items)]
+
+    def _lead(self, batch: _Batch, wait: bool):
+        with self._cond:
+            deadline = time.monotonic() + (self.window_seconds if wait else 0.0)
+            while self._open is batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._open = None
+                    break
+                self._cond.wait(remaining)
+
+        try:
+            if self.batch_observer is not None:
+                self.batch_observer(len(batch.items))
+            results = self.run_batch(batch.items)
+            if len(results) != len(batch.items):
+                raise RuntimeError(
+                    f"批处理结果数量不匹配: {len(results)} != {len(batch.items)}"
+                )
+            batch.results = results
+        except BaseException as e:
+            batch.error = e
+        finally:
+            batch.done.set()
@@ -0,0 +1,70 @@
+import asyncio
+import threading
+from typing import Dict, List, Tuple
+
+# 每个订阅者最多积压的事件数；进度事件只关心最新状态，溢出时丢弃最旧的
+SUBSCRIBER_QUEUE_SIZE = 64
+
+
+class ProgressBus:
+    """
+    进程内任务进度发布/订阅
+
+    后台任务更新状态时 publish，SSE 连接 subscribe 后从队列中读取事件。
+    publish 可以在任意线程调用，事件通过订阅者所在事件循环投递。
+    只覆盖当前进程：多 worker 部署时订阅方需要回退到轮询任务存储。
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[
+            str, List[Tuple[asyncio.Queue, asyncio.AbstractEventLoop]]
+        ] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, task_id: str) -> asyncio.Queue:
+        """订阅任务事件（需在事件循环中调用）"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._subscribers.setdefault(task_id, []).append((queue, loop))
+        return queue
+
+    def unsubscribe(self, task_id: str, queue: asyncio.Queue):
+        with self._lock:
+            subscribers = self._subscribers.get(task_id)
+            if not subscribers:
+                return
+            subscribers[:] = [s for s in subscribers if s[0] is not queue]
+            if not subscribers:
+                del self._subscribers[task_id]
+
+    def publish(self, task_id: str, event: Dict):
+        """向任务的所有订阅者发送事件"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(task_id, ()))
+        if not subscribers:
+            return
+
+        try:
+            current_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            current_loop = None
+
+        for queue, loop in subscribers:
+            if loop is current_loop:
+                self._offer(queue, event)
+            elif not loop.is_closed():
+                loop.call_soon_threadsafe(self._offer, queue, event)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(s) for s in self._subscribers.values())
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, event: Dict):
+        if queue.full():
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+        queue.put_nowait(event)
@@ -0,0 +1,60 @@
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+
+class Readiness:
+    """
+    启动预热状态
+
+    每个组件预热完成（或失败）后更新状态；全部组件完成后才报告就绪。
+    可选组件失败时只记录错误，不影响就绪。
+    """
+
+    def __init__(self, components: Iterable[str], optional: Iterable[str] = ()):
+        self._started = time.time()
+        self._optional = set(optional)
+        self._components: Dict[str, Dict] = {
+            name: {"status": "pending"} for name in components
+        }
+        self._lock = threading.Lock()
+
+    def start(self, name: str):
+        self._set(name, status="warming")
+
+    def mark_ready(self, name: str, detail: Optional[str] = None):
+        self._set(name, status="ready", detail=detail)
+
+    def mark_failed(self, name: str, error: str):
+        self._set(name, status="failed", error=error)
+
+    def mark_skipped(self, name: str):
+        self._set(name, status="skipped")
+
+    @property
+    def ready(self) -> bool:
+        with self._lock:
+            return all(
+                c["status"] in ("ready", "skipped")
+                or (name in self._optional and c["status"] == "failed")
+                for name, c in self._components.items()
+            )
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            components = {name: dict(c) for name, c in self._components.items()}
+        return {
+            "status": "ready" if self.ready else "warming_up",
+            "uptime_seconds": round(time.time() - self._started, 1),
+            "components": components,
+        }
+
+    def _set(self, name: str, **fields):
+        now = time.time()
+        with self._lock:
+            component = self._components.setdefault(name, {})
+            if fields.get("status") == "warming":
+                component["started_at"] = now
+            elif "started_at" in component:
+                component["seconds"] = round(now - component.pop("started_at"), 2)
+            component.update({k: v for k, v in fields.items() if v is not None})
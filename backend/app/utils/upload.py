@@ -0,0 +1,275 @@
+import hashlib
+import json
+import os
+import struct
+from typing import Iterable, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException, UploadFile
+from PIL import Image
+
+from app.utils.executors import run_io
+
+# 单个上传文件的大小上限（MB）
+MAX_FILE_SIZE = int(float(os.environ.get("MAX_FILE_SIZE", 10)) * 1024 * 1024)
+# 整个 multipart 请求体允许比文件多出的字节数（边界和表单字段）
+MULTIPART_OVERHEAD = 64 * 1024
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# 读取图片头部（格式和尺寸）最多缓冲的字节数；JPEG 的 EXIF/ICC 段可能较大
+MAX_HEADER_BYTES = 2 * 1024 * 1024
+
+# 检测到的格式 -> 保存时使用的扩展名
+FORMAT_EXTENSIONS = {"PNG": ".png", "JPEG": ".jpg", "WEBP": ".webp", "BMP": ".bmp"}
+
+
+class UploadRejected(Exception):
+    """上传内容不符合要求（由路由转换为 HTTP 错误）"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class UploadInfo(NamedTuple):
+    path: str
+    size: int
+    content_hash: str
+    format: str
+    width: int
+    height: int
+
+
+def sniff_image(head: bytes) -> Optional[Tuple[str, int, int]]:
+    """
+    根据文件头识别图片格式和尺寸（不解码像素）
+
+    Returns:
+        (格式, 宽, 高)；头部数据还不够时返回 None
+    Raises:
+        UploadRejected: 不是支持的图片格式或头部损坏
+    """
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        if len(head) < 24:
+            return None
+        if head[12:16] != b"IHDR":
+            raise UploadRejected(400, "PNG文件头损坏")
+        width, height = struct.unpack(">II", head[16:24])
+        return "PNG", width, height
+
+    if head.startswith(b"\xff\xd8\xff"):
+        return _sniff_jpeg(head)
+
+    if head.startswith(b"RIFF") and head[8:12] == b"WEBP":
+        return _sniff_webp(head)
+
+    if head.startswith(b"BM"):
+        if len(head) < 26:
+            return None
+        header_size = struct.unpack("<I", head[14:18])[0]
+        if header_size == 12:
+            width, height = struct.unpack("<HH", head[18:22])
+        else:
+            width, height = struct.unpack("<ii", head[18:26])
+        return "BMP", abs(width), abs(height)
+
+    if len(head) < 12:
+        return None
+    raise UploadRejected(400, "文件内容不是支持的图片格式")
+
+
+def _sniff_jpeg(head: bytes) -> Optional[Tuple[str, int, int]]:
+    # SOF0-SOF15，不含 DHT(C4)、JPG(C8)、DAC(CC)
+    sof_markers = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+    pos = 2
+    while True:
+        # 跳过段之间的填充字节
+        while pos < len(head) and head[pos] == 0xFF:
+            pos += 1
+        if pos >= len(head):
+            return None
+        marker = head[pos]
+        pos += 1
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            continue  # 无长度字段的标记
+        if marker == 0xDA or marker == 0xD9:
+            raise UploadRejected(400, "JPEG文件缺少尺寸信息")
+        if pos + 2 > len(head):
+            return None
+        length = struct.unpack(">H", head[pos : pos + 2])[0]
+        if marker in sof_markers:
+            if pos + 7 > len(head):
+                return None
+            height, width = struct.unpack(">HH", head[pos + 3 : pos + 7])
+            return "JPEG", width, height
+        pos += length
+
+
+def _sniff_webp(head: bytes) -> Optional[Tuple[str, int, int]]:
+    if len(head) < 30:
+        return None
+    chunk = head[12:16]
+    if chunk == b"VP8X":
+        width = int.from_bytes(head[24:27], "little") + 1
+        height = int.from_bytes(head[27:30], "little") + 1
+        return "WEBP", width, height
+    if chunk == b"VP8L":
+        bits = struct.unpack("<I", head[21:25])[0]
+        return "WEBP", (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8 ":
+        width, height = struct.unpack("<HH", head[26:30])
+        return "WEBP", width & 0x3FFF, height & 0x3FFF
+    raise UploadRejected(400, "WebP文件头损坏")
+
+
+def _max_image_pixels() -> int:
+    return int(os.environ.get("MAX_IMAGE_PIXELS", Image.MAX_IMAGE_PIXELS or 0))
+
+
+async def ingest_upload(
+    upload: UploadFile,
+    path_prefix: str,
+    max_bytes: int,
+    max_pixels: Optional[int] = None,
+    allowed_formats: Iterable[str] = FORMAT_EXTENSIONS,
+) -> UploadInfo:
+    """
+    流式保存上传文件
+
+    分块读取，边读边计算 SHA-256 并写入临时文件：
+    - 第一批数据到达时根据文件头识别格式和尺寸，拒绝不支持的格式和像素数超限的图片
+      （解压炸弹），此时还没有写入多少数据；
+    - 累计大小超过上限立即中止，不再继续读取；
+    全部通过后才原子替换到 path_prefix + 检测到的格式对应的扩展名（不使用客户端文件名的
+    扩展名），保存路径随 UploadInfo 返回。任何拒绝都会删除临时文件并抛出 UploadRejected。
+    """
+    max_pixels = _max_image_pixels() if max_pixels is None else max_pixels
+    digest = hashlib.sha256()
+    size = 0
+    head = b""
+    sniffed = None
+    tmp_path = f"{path_prefix}.part"
+
+    out = await run_io(open, tmp_path, "wb")
+    try:
+        while True:
+            chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadRejected(
+                    413, f"文件太大。最大允许: {max_bytes / 1024 / 1024}MB"
+                )
+
+            if sniffed is None:
+                head += chunk
+                sniffed = sniff_image(head)
+                if sniffed is None and len(head) > MAX_HEADER_BYTES:
+                    raise UploadRejected(400, "无法识别图片尺寸")
+                if sniffed is not None:
+                    _check_image(sniffed, max_pixels, allowed_formats)
+                    head = b""
+
+            digest.update(chunk)
+            await run_io(out.write, chunk)
+    except BaseException:
+        out.close()
+        _remove_quietly(tmp_path)
+        raise
+    out.close()
+
+    if sniffed is None:
+        _remove_quietly(tmp_path)
+        raise UploadRejected(400, "文件为空或不是完整的图片")
+
+    image_format = sniffed[0]
+    path = path_prefix + FORMAT_EXTENSIONS.get(image_format, f".{image_format.lower()}")
+    os.replace(tmp_path, path)
+    return UploadInfo(path, size, digest.hexdigest(), *sniffed)
+
+
+def _check_image(sniffed: Tuple[str, int, int], max_pixels: int, allowed_formats):
+    image_format, width, height = sniffed
+    if image_format not in allowed_formats:
+        raise UploadRejected(400, f"不支持的图片格式: {image_format}")
+    if width <= 0 or height <= 0:
+        raise UploadRejected(400, "图片尺寸无效")
+    if max_pixels and width * height > max_pixels:
+        raise UploadRejected(
+            400,
+            f"图片尺寸过大（{width}x{height}）。最大允许: {max_pixels} 像素",
+        )
+
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class UploadSizeLimitMiddleware:
+    """
+    请求体大小限制（ASGI 中间件）
+
+    在表单解析之前生效：Content-Length 超限直接返回 413；
+    没有 Content-Length（分块传输）时边接收边计数，超限立即中止，
+    避免超大请求被完整写入临时文件后才被拒绝。
+    """
+
+    def __init__(self, app, max_body_size: int, paths: Iterable[str]):
+        self.app = app
+        self.max_body_size = max_body_size
+        self.paths = tuple(paths)
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or not scope["path"].endswith(self.paths)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        content_length = headers.get(b"content-length")
+        if content_length and content_length.isdigit():
+            if int(content_length) > self.max_body_size:
+                await self._reject(send)
+                return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    # 表单解析过程中抛出的 HTTPException 会原样返回给客户端
+                    raise HTTPException(status_code=413, detail=self._detail())
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    def _detail(self) -> str:
+        return f"请求体太大。最大允许: {self.max_body_size / 1024 / 1024:.1f}MB"
+
+    async def _reject(self, send):
+        body = json.dumps({"detail": self._detail()}, ensure_ascii=False).encode(
+            "utf-8"
+        )
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 413,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"connection", b"close"),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+样式提取基准测试：向量化 extract_styles 与旧版逐区域实现对比
+
+用法（在 backend 目录下）:
+    python benchmarks/bench_extract_styles.py
+    python benchmarks/bench_extract_styles.py --width 4000 --height 3000 --regions 60
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.image_service import ImageService  # noqa: E402
+from app.utils.image_buffer import ImageBuffer  # noqa: E402
+
+
+def legacy_extract_styles(service, img_array, text_regions):
+    """旧版实现：每个区域复制整张图，并逐像素收集边缘颜色"""
+    results = []
+    for region in text_regions:
+        img = np.array(img_array)
+        bbox = region["bbox"]
+        x1 = min(p[0] for p in bbox)
+        x2 = max(p[0] for p in bbox)
+        y1 = min(p[1] for p in bbox)
+        y2 = max(p[1] for p in bbox)
+        x1, y1 = max(0, x1 - 3), max(0, y1 - 3)
+        x2, y2 = min(img.shape[1], x2 + 3), min(img.shape[0], y2 + 3)
+        region_img = img[y1:y2, x1:x2]
+
+        bg_color = [255, 255, 255]
+        text_color = [0, 0, 0]
+        if region_img.size:
+            h, w = region_img.shape[:2]
+            edge = []
+            for i in range(0, w, max(1, w // 20)):
+                edge.append(region_img[0, i, :].tolist())
+                edge.append(region_img[-1, i, :].tolist())
+            if h > 2:
+                for i in range(0, h, max(1, h // 10)):
+                    edge.append(region_img[i, 0, :].tolist())
+                    edge.append(region_img[i, -1, :].tolist())
+            colors, counts = np.unique(np.array(edge), axis=0, return_counts=True)
+            bg_color = colors[np.argmax(counts)].tolist()
+
+            cy, cx = h // 2, w // 2
+            center = region_img[
+                max(0, cy - 3) : min(h, cy + 3), max(0, cx - 10) : min(w, cx + 10)
+            ]
+            if center.size:
+                pixels = center.reshape(-1, 3)
+                distances = np.linalg.norm(pixels - np.array(bg_color), axis=1)
+                text_pixels = pixels[distances > 30]
+                if len(text_pixels):
+                    text_color = np.mean(text_pixels, axis=0).astype(int).tolist()
+
+        results.append(
+            {
+                "font_color": text_color,
+                "background_color": bg_color,
+                "font_size": service._estimate_font_size(y2 - y1, region["text"]),
+                "bbox": [x1, y1, x2, y2],
+            }
+        )
+    return results
+
+
+def synthetic_case(width, height, count, seed=0):
+    """生成带文字块的合成图片和随机区域"""
+    rng = np.random.default_rng(seed)
+    img = np.full((height, width, 3), 245, dtype=np.uint8)
+    img += rng.integers(0, 8, size=img.shape, dtype=np.uint8)
+    regions = []
+    for i in range(count):
+        w = int(rng.integers(40, max(41, min(600, width // 2))))
+        h = int(rng.integers(12, max(13, min(60, height // 4))))
+        x = int(rng.integers(0, width - w))
+        y = int(rng.integers(0, height - h))
+        img[y + h // 4 : y + 3 * h // 4, x + 4 : x + w - 4] = rng.integers(
+            0, 80, size=3
+        )
+        regions.append(
+            {
+                "id": i + 1,
+                "bbox": [[x, y], [x + w, y], [x + w, y + h], [x, y + h]],
+                "text": "文字" * (w // 40),
+            }
+        )
+    return img, regions
+
+
+def compare(service, img_array, regions, repeat):
+    legacy = legacy_extract_styles(service, img_array, regions)
+    buffer = ImageBuffer.from_array(img_array)
+    styles = [r["style"] for r in service.extract_styles(buffer, regions)]
+    for old, new in zip(legacy, styles):
+        for key in old:
+            assert old[key] == new[key], (key, old[key], new[key])
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        legacy_extract_styles(service, img_array, regions)
+    legacy_time = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        service.extract_styles(buffer, regions)
+    new_time = (time.perf_counter() - start) / repeat
+    return legacy_time, new_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--width", type=int, default=4000)
+    parser.add_argument("--height", type=int, default=3000)
+    parser.add_argument("--regions", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    service = ImageService()
+
+    img, regions = synthetic_case(args.width, args.height, args.regions)
+    legacy_time, new_time = compare(service, img, regions, args.repeat)
+    print(
+        f"合成图片 {args.width}x{args.height}, {args.regions} 个区域: "
+        f"旧版 {legacy_time * 1000:.1f} ms, 向量化 {new_time * 1000:.1f} ms, "
+        f"加速 {legacy_time / new_time:.1f}x"
+    )
+
+    # backend/uploads 中的样例图片（使用合成区域）
+    for path in sorted(glob.glob("uploads/*"))[:5]:
+        buffer = ImageBuffer(path)
+        img = np.ascontiguousarray(buffer.rgb)
+        _, regions = synthetic_case(img.shape[1], img.shape[0], args.regions, seed=1)
+        legacy_time, new_time = compare(service, img, regions, args.repeat)
+        print(
+            f"{os.path.basename(path)} {img.shape[1]}x{img.shape[0]}: "
+            f"旧版 {legacy_time * 1000:.1f} ms, 向量化 {new_time * 1000:.1f} ms, "
+            f"加速 {legacy_time / new_time:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
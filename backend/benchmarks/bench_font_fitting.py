@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+字号搜索基准测试：二分查找与旧版逐个字号尝试对比
+
+用法（在 backend 目录下）:
+    python benchmarks/bench_font_fitting.py
+    python benchmarks/bench_font_fitting.py --cases 500 --repeat 3
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.image_service import ImageService  # noqa: E402
+
+# 图表/说明图中常见的译文（中英两个方向，长短混合）
+SAMPLE_TEXTS = [
+    "Battery",
+    "PV",
+    "Grid",
+    "Load",
+    "Battery charging period",
+    "Discharge period: the load draws power from the battery",
+    "When the PV output is insufficient, the grid supplies the load "
+    "and charges the battery during off-peak hours",
+    "Time-of-use tariff: peak 8:00-11:00, 18:00-23:00; valley 23:00-7:00",
+    "The inverter automatically switches to off-grid mode within 10 ms "
+    "when a grid failure is detected",
+    "电池",
+    "光伏",
+    "电网供电",
+    "电池充电时段",
+    "放电时段：负载由电池供电，光伏（PV）多余电量并网",
+    "当光伏发电不足时，由电网向负载供电，并在谷电时段为电池充电，"
+    "以降低峰时段的用电成本。",
+    "逆变器检测到电网故障后，在10毫秒内自动切换到离网模式，保证重要负载不断电。",
+]
+
+
+def legacy_fit(service, text, width, height, min_size, max_size, line_height_mult):
+    """旧版实现：从最大字号逐个往下尝试"""
+    for font_size in range(max_size, min_size - 1, -1):
+        font = service._get_font(font_size)
+        lines = service._wrap_text_to_lines(text, width, font)
+        total_height = len(lines) * (font_size * line_height_mult)
+        if total_height <= height and all(
+            service.text_measurer.textbbox(line, font)[2] <= width for line in lines
+        ):
+            return font_size, lines
+    return None
+
+
+def make_cases(count, seed=0):
+    """生成 (文本, 区域宽高, 字号范围) 组合，参数与 _calculate_optimal_font_and_lines 一致"""
+    rng = random.Random(seed)
+    cases = []
+    for _ in range(count):
+        text = rng.choice(SAMPLE_TEXTS)
+        region_width = rng.randint(40, 500)
+        region_height = rng.randint(14, 80)
+        original_font_size = max(12, min(48, int(region_height * 0.8)))
+        if rng.random() < 0.3:
+            # 底部区域
+            case = (
+                text,
+                int(region_width * 2.5),
+                int(region_height * 2.5),
+                24,
+                min(original_font_size, 40),
+                1.2,
+            )
+        else:
+            case = (
+                text,
+                int(region_width * 3.5),
+                int(region_height * 2.0),
+                18,
+                max(original_font_size, 32),
+                1.25,
+            )
+        cases.append(case)
+    return cases
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cases", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    service = ImageService()
+    cases = make_cases(args.cases)
+
+    mismatches = 0
+    for case in cases:
+        if legacy_fit(service, *case) != service._fit_font_size(*case):
+            mismatches += 1
+    assert mismatches == 0, f"{mismatches} 个用例结果不一致"
+
+    # 最大字号即可放下的组合（最常见）和需要缩小字号的组合（长文本 / 小区域）单独统计
+    shrink = [
+        case
+        for case in cases
+        if (legacy_fit(service, *case) or (case[3], None))[0] != case[4]
+    ]
+    fits_max = [case for case in cases if case not in shrink]
+    for label, subset in (
+        ("全部", cases),
+        ("最大字号即可放下", fits_max),
+        ("需缩小字号", shrink),
+    ):
+        if not subset:
+            continue
+        legacy_time, new_time = timeit(service, subset, args.repeat)
+        print(
+            f"{label} {len(subset)} 个区域/文本组合（结果一致）: "
+            f"逐个尝试 {legacy_time * 1000:.1f} ms, 二分查找 {new_time * 1000:.1f} ms, "
+            f"加速 {legacy_time / new_time:.1f}x"
+        )
+
+
+def timeit(service, cases, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for case in cases:
+            legacy_fit(service, *case)
+    legacy_time = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for case in cases:
+            service._fit_font_size(*case)
+    new_time = (time.perf_counter() - start) / repeat
+    return legacy_time, new_time
+
+
+if __name__ == "__main__":
+    main()
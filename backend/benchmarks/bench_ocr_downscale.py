@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+缩小检测基准测试：原图检测 与 缩小检测 + 原图裁剪识别 的耗时和准确率对比
+
+准确率以原图检测的结果为基准：两边的区域按外接矩形 IoU >= 0.5 配对，
+统计召回率（基准区域被找到的比例）和文字完全一致的比例。
+识别对比需要 PaddleOCR；未安装时只输出检测输入的预处理耗时。
+
+用法（在 backend 目录下）:
+    python benchmarks/bench_ocr_downscale.py
+    python benchmarks/bench_ocr_downscale.py --factors 2 4 --limit 10 --repeat 3
+"""
+
+import argparse
+import glob
+import os
+import statistics
+import sys
+import time
+
+os.environ.setdefault("OCR_CACHE_ENABLED", "false")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.ocr_service import OCRService  # noqa: E402
+from app.utils.image_buffer import ImageBuffer  # noqa: E402
+
+
+def sample_images(limit):
+    """每种 (格式, 尺寸) 取一张样例图片"""
+    seen = set()
+    paths = []
+    for path in sorted(glob.glob("uploads/*")):
+        try:
+            buffer = ImageBuffer(path)
+        except Exception:
+            continue
+        key = (buffer.format, buffer.size)
+        if key not in seen:
+            seen.add(key)
+            paths.append(path)
+    return paths[:limit]
+
+
+def timed(func, repeat):
+    """返回 (最后一次的结果, 耗时中位数秒)"""
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return result, statistics.median(times)
+
+
+def bounds(region):
+    xs = [p[0] for p in region["bbox"]]
+    ys = [p[1] for p in region["bbox"]]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def iou(a, b):
+    ix = min(a[2], b[2]) - max(a[0], b[0])
+    iy = min(a[3], b[3]) - max(a[1], b[1])
+    if ix <= 0 or iy <= 0:
+        return 0.0
+    inter = ix * iy
+    area_a = (a[2] - a[0]) * (a[3] - a[1])
+    area_b = (b[2] - b[0]) * (b[3] - b[1])
+    return inter / (area_a + area_b - inter)
+
+
+def agreement(reference, candidate):
+    """返回 (召回率, 文字一致率)，基准没有区域时都为 1"""
+    if not reference:
+        return 1.0, 1.0
+    remaining = [(bounds(r), r["text"]) for r in candidate]
+    found = same_text = 0
+    for region in reference:
+        rect = bounds(region)
+        best = max(
+            range(len(remaining)),
+            key=lambda i: iou(rect, remaining[i][0]),
+            default=None,
+        )
+        if best is None or iou(rect, remaining[best][0]) < 0.5:
+            continue
+        found += 1
+        same_text += remaining.pop(best)[1] == region["text"]
+    return found / len(reference), same_text / len(reference)
+
+
+def bench_preprocess(paths, factors, repeat):
+    """检测输入的准备耗时：整图 BGR 视图 与 缩小副本"""
+    print("== 检测输入预处理 ==")
+    for path in paths:
+        buffer = ImageBuffer(path)
+
+        def full():
+            buffer.release_views()
+            return buffer.bgr
+
+        _, full_time = timed(full, repeat)
+        line = (
+            f"{os.path.basename(path)} {buffer.format} {buffer.width}x{buffer.height}: "
+            f"原图 {full_time * 1000:.1f} ms"
+        )
+        for factor in factors:
+            _, reduced_time = timed(lambda: buffer.reduced(factor).bgr, repeat)
+            line += f", 1/{factor} {reduced_time * 1000:.1f} ms"
+        print(line)
+
+
+def bench_ocr(service, paths, factors, repeat):
+    print("== 识别耗时和准确率（以原图检测为基准） ==")
+    totals = {factor: [] for factor in [1] + factors}
+    for path in paths:
+        buffer = ImageBuffer(path)
+        service.detect_downscale = 1
+        reference, base_time = timed(lambda: service.recognize(buffer), repeat)
+        totals[1].append(base_time)
+        line = (
+            f"{os.path.basename(path)} {buffer.width}x{buffer.height}: "
+            f"原图 {base_time * 1000:.0f} ms / {len(reference)} 个区域"
+        )
+
+        for factor in factors:
+            service.detect_downscale = factor
+            applied = service.detect_factor(buffer.size)
+            regions, elapsed = timed(lambda: service.recognize(buffer), repeat)
+            totals[factor].append(elapsed)
+            recall, text_match = agreement(reference, regions)
+            line += (
+                f" | 1/{factor}（实际 1/{applied}）{elapsed * 1000:.0f} ms, "
+                f"召回 {recall:.0%}, 文字一致 {text_match:.0%}"
+            )
+        print(line)
+
+    base = sum(totals[1])
+    for factor in factors:
+        total = sum(totals[factor])
+        print(
+            f"合计: 1/{factor} 耗时 {total:.2f} s，原图 {base:.2f} s，"
+            f"加速 {base / total:.2f}x"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--factors", type=int, nargs="+", default=[2, 4])
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--min-side",
+        type=int,
+        default=None,
+        help="缩小后长边的下限（默认读取 OCR_DETECT_MIN_SIDE）",
+    )
+    args = parser.parse_args()
+
+    paths = sample_images(args.limit)
+    if not paths:
+        print("uploads/ 中没有样例图片")
+        return
+
+    bench_preprocess(paths, args.factors, args.repeat)
+
+    service = OCRService()
+    service.cache = None
+    if args.min_side:
+        service.detect_min_side = args.min_side
+    try:
+        engine = service.preload()
+    except Exception as e:
+        print(f"OCR引擎初始化失败，跳过识别对比: {e}")
+        return
+    if engine != "paddleocr":
+        print(f"缩小检测只支持 PaddleOCR（当前引擎: {engine}），跳过识别对比")
+        return
+    bench_ocr(service, paths, args.factors, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,12 +6,13 @@ import LanguageSelector from '../components/LanguageSelector';
 import ProgressBar from '../components/ProgressBar';
 import ImagePreview from '../components/ImagePreview';
 import { useStore } from '../store';
-import { uploadImage, getTaskStatus, getLanguages, downloadResult } from '../services/api';
+import { uploadImage, getTaskStatus, getLanguages, downloadResult, subscribeTaskEvents } from '../services/api';
+import { TaskStatus } from '../types';
 
 const { Header, Content } = Layout;
 const { Title } = Typography;
 
-const POLLING_INTERVAL = 1000; // 1秒轮询一次
+const POLLING_INTERVAL = 1000; // 推送不可用时 1秒轮询一次
 
 const HomePage: React.FC = () => {
   const {
@@ -46,35 +47,63 @@ const HomePage: React.FC = () => {
     loadLanguages();
   }, [setLanguages]);
 
-  // 轮询任务状态
+  // 订阅任务进度：优先使用服务端推送（SSE），连接失败时回退到轮询
+  const taskId = currentTask?.task_id;
+  const taskFinished = !currentTask || currentTask.status === 'completed' || currentTask.status === 'failed';
+
   useEffect(() => {
-    if (!currentTask || currentTask.status === 'completed' || currentTask.status === 'failed') {
+    if (!taskId || taskFinished) {
       return;
     }
 
-    const interval = setInterval(async () => {
-      try {
-        const status = await getTaskStatus(currentTask.task_id);
-        setCurrentTask(status);
-
-        if (status.status === 'completed') {
-          if (status.result_url) {
-            setTranslatedImage(downloadResult(currentTask.task_id));
-          }
-          setIsLoading(false);
-          message.success('翻译完成！');
-        } else if (status.status === 'failed') {
-          setIsLoading(false);
-          setError(status.error_message || '处理失败');
-          message.error(status.error_message || '处理失败');
+    const handleStatus = (status: TaskStatus) => {
+      setCurrentTask(status);
+
+      if (status.status === 'completed') {
+        if (status.result_url) {
+          setTranslatedImage(downloadResult(taskId));
+        }
+        setIsLoading(false);
+        message.success('翻译完成！');
+      } else if (status.status === 'failed') {
+        setIsLoading(false);
+        setError(status.error_message || '处理失败');
+        message.error(status.error_message || '处理失败');
+      }
+    };
+
+    let interval: ReturnType<typeof setInterval> | undefined;
+    const startPolling = () => {
+      interval = setInterval(async () => {
+        try {
+          handleStatus(await getTaskStatus(taskId));
+        } catch (err) {
+          console.error('获取任务状态失败:', err);
+        }
+      }, POLLING_INTERVAL);
+    };
+
+    // SSE 事件只带进度字段（没有 text_regions / timings）：合并到已有任务状态上，
+    // 任务结束时重新获取一次完整状态
+    const handleEvent = async (event: TaskStatus) => {
+      if (event.status === 'completed' || event.status === 'failed') {
+        try {
+          handleStatus(await getTaskStatus(taskId));
+          return;
+        } catch (err) {
+          console.error('获取任务状态失败:', err);
         }
-      } catch (err) {
-        console.error('获取任务状态失败:', err);
       }
-    }, POLLING_INTERVAL);
+      handleStatus({ ...useStore.getState().currentTask, ...event });
+    };
 
-    return () => clearInterval(interval);
-  }, [currentTask, setCurrentTask, setTranslatedImage, setIsLoading, setError]);
+    const unsubscribe = subscribeTaskEvents(taskId, handleEvent, startPolling);
+
+    return () => {
+      unsubscribe();
+      if (interval) clearInterval(interval);
+    };
+  }, [taskId, taskFinished, setCurrentTask, setTranslatedImage, setIsLoading, setError]);
 
   const handleUpload = useCallback(async (file: File) => {
     setIsLoading(true);
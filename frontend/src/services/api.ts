@@ -12,12 +12,15 @@ const api = axios.create({
 
 export const uploadImage = async (
   file: File,
-  targetLanguage: string,
+  targetLanguage: string | string[],
   sourceLanguage?: string
 ): Promise<TranslationResponse> => {
   const formData = new FormData();
   formData.append('image', file);
-  formData.append('target_language', targetLanguage);
+  // 多个目标语言：OCR只做一次，结果按语言记录在任务的 results 中
+  for (const language of ([] as string[]).concat(targetLanguage)) {
+    formData.append('target_language', language);
+  }
   if (sourceLanguage) {
     formData.append('source_language', sourceLanguage);
   }
@@ -26,13 +29,52 @@ export const uploadImage = async (
   return response.data;
 };
 
+// /tasks/{id} 直接返回 TaskStatus，不像 /translate 那样包在 { success, data } 中
 export const getTaskStatus = async (taskId: string): Promise<TaskStatus> => {
   const response = await api.get(`/tasks/${taskId}`);
-  return response.data.data;
+  return response.data;
+};
+
+// 把已完成任务的图片翻译成另一种语言（复用原任务的识别结果）
+export const retranslateTask = async (
+  taskId: string,
+  targetLanguage: string,
+  sourceLanguage?: string
+): Promise<TranslationResponse> => {
+  const response = await api.post(`/tasks/${taskId}/retranslate`, null, {
+    params: { target_language: targetLanguage, source_language: sourceLanguage },
+  });
+  return response.data;
+};
+
+// 订阅任务进度推送（SSE），返回取消订阅函数；浏览器不支持或连接失败时调用 onError
+export const subscribeTaskEvents = (
+  taskId: string,
+  onEvent: (status: TaskStatus) => void,
+  onError: () => void
+): (() => void) => {
+  if (!window.EventSource) {
+    onError();
+    return () => {};
+  }
+  const source = new EventSource(`${API_BASE_URL}/tasks/${taskId}/events`);
+  source.addEventListener('progress', (e) => {
+    const status: TaskStatus = JSON.parse((e as MessageEvent).data);
+    onEvent(status);
+    if (status.status === 'completed' || status.status === 'failed') {
+      source.close();
+    }
+  });
+  source.onerror = () => {
+    source.close();
+    onError();
+  };
+  return () => source.close();
 };
 
-export const downloadResult = (taskId: string): string => {
-  return `${API_BASE_URL}/download/${taskId}`;
+export const downloadResult = (taskId: string, language?: string): string => {
+  const query = language ? `?language=${encodeURIComponent(language)}` : '';
+  return `${API_BASE_URL}/download/${taskId}${query}`;
 };
 
 export const getLanguages = async (): Promise<Language[]> => {
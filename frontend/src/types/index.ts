@@ -16,13 +16,24 @@ export interface StyleInfo {
   is_vertical: boolean;
 }
 
+export interface LanguageResult {
+  status: 'pending' | 'processing' | 'completed' | 'failed';
+  result_url?: string;
+  text_regions?: TextRegion[];
+  timings?: Record<string, number>;
+  error_message?: string;
+}
+
 export interface TaskStatus {
   task_id: string;
   status: 'pending' | 'processing' | 'completed' | 'failed';
   progress: number;
+  stage?: string;
   result_url?: string;
   detected_language?: string;
   text_regions?: TextRegion[];
+  results?: Record<string, LanguageResult>;
+  timings?: Record<string, number>;
   error_message?: string;
 }
 
@@ -38,6 +49,8 @@ export interface TranslationResponse {
     task_id: string;
     status: string;
     progress: number;
+    source_task_id?: string;
+    target_languages?: string[];
   };
   message?: string;
 }